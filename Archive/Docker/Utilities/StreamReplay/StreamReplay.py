@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+import sys
+import time
+
+# set by the ScriptCoordinator when it copies this script next to a recording
+RECORDING = "/app/data/recording"
+SCALE = 1.0
+
+
+def iter_recording(path: str):
+    # lines are "<arrival offset in ns>\t<record>", comment lines start with '#'
+    with open(path, "r") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            offset, _, record = line.rstrip("\n").partition("\t")
+            yield int(offset), record
+
+
+def main() -> int:
+    # Emits every record at its recorded arrival offset divided by SCALE. The schedule is absolute, so a late
+    # write does not delay the records after it.
+    start = time.perf_counter_ns()
+    for offset, record in iter_recording(RECORDING):
+        wait_ns = start + int(offset / SCALE) - time.perf_counter_ns()
+        if wait_ns > 0:
+            time.sleep(wait_ns / 1e9)
+        sys.stdout.write(record + "\n")
+        sys.stdout.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
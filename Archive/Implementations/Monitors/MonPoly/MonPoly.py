@@ -1,3 +1,4 @@
+import os
 from typing import Dict, AnyStr, Any, Tuple, List, Optional
 
 from Infrastructure.AutoConversion.InputOutputPolicyFormats import InputOutputPolicyFormats
@@ -5,10 +6,13 @@ from Infrastructure.AutoConversion.InputOutputTraceFormats import InputOutputTra
 from Infrastructure.Builders.ToolBuilder.ToolImageManager import AbstractToolImageManager
 from Infrastructure.DataTypes.PathManager.PathManager import PathManager
 from Infrastructure.DataTypes.Verification.OutputStructures.AbstractOutputStrucutre import AbstractOutputStructure
-from Infrastructure.DataTypes.Verification.OutputStructures.Structures.Verdicts import Verdicts
-from Infrastructure.DataTypes.Verification.OutputStructures.SubTypes.VariableOrder import VariableOrder, DefaultVariableOrder
+from Infrastructure.DataTypes.Verification.OutputStructures.Structures.DiskVerdicts import new_verdicts
+from Infrastructure.DataTypes.Verification.OutputStructures.SubTypes.VariableOrder import VariableOrder, DefaultVariableOrder, \
+    VariableOrdering
 from Infrastructure.Monitors.BaseMonitorTemplate import BaseMonitorTemplate, OfflineRunnable, OnlineRunnable
-from Archive.Implementations.Monitors.SharedFunctions import parse_variable_order_monpoly, parse_monpoly_output
+from Archive.Implementations.Monitors.SharedFunctions import parse_variable_order_monpoly, cached_variable_order
+from Infrastructure.DataTypes.Verification.MonPolyOutputParser import parse_monpoly_output, parse_monpoly_file, \
+    monpoly_line_parser, monpoly_online_line_parser
 from Infrastructure.constants import SIGNATURE_KEY, POLICY_KEY, TRACE_KEY, FOLDER_KEY
 
 
@@ -62,10 +66,25 @@ class MonPoly(BaseMonitorTemplate, OfflineRunnable, OnlineRunnable):
         return cmd, None
 
     def post_processing_offline(self, stdout_input: AnyStr) -> AbstractOutputStructure:
+        return parse_monpoly_output(new_verdicts(self._variable_order(), len(stdout_input)), stdout_input)
+
+    def post_processing_offline_file(self, path: str) -> AbstractOutputStructure:
+        return parse_monpoly_file(new_verdicts(self._variable_order(), os.path.getsize(path)), path)
+
+    @staticmethod
+    def offline_verdict_line(line: bytes) -> bool:
+        return line.startswith(b"@") and not line.startswith(b"@MaxTS")
+
+    def offline_stream_parser(self):
+        return monpoly_line_parser(self._variable_order())
+
+    def _variable_order(self) -> VariableOrdering:
         cmd = ["-sig", str(self.params[SIGNATURE_KEY]), "-formula", str(self.params[POLICY_KEY]), "-check"]
-        logs, code = self.image.run_offline(self.params[FOLDER_KEY], cmd, measure=False)
-        variable_order = VariableOrder(parse_variable_order_monpoly(logs)) if code == 0 else DefaultVariableOrder()
-        return parse_monpoly_output(Verdicts(variable_order=variable_order), stdout_input)
+        variable_order, _ = cached_variable_order(
+            self.image, self.params[FOLDER_KEY], cmd, [self.params[SIGNATURE_KEY], self.params[POLICY_KEY]],
+            parse_variable_order_monpoly
+        )
+        return VariableOrder(variable_order) if variable_order is not None else DefaultVariableOrder()
 
     def construct_online_command(self) -> Tuple[List[str], Optional[str]]:
         cmd = [
@@ -98,6 +117,9 @@ class MonPoly(BaseMonitorTemplate, OfflineRunnable, OnlineRunnable):
     def post_processing_online(self, stdout_input: AnyStr) -> AbstractOutputStructure:
         pass
 
+    def online_stream_parser(self):
+        return monpoly_online_line_parser(self._variable_order())
+
     @staticmethod
     def supported_policy_formats() -> List[InputOutputPolicyFormats]:
         return [InputOutputPolicyFormats.MFOTL, InputOutputPolicyFormats.NEGATED_MFOTL]
@@ -1,4 +1,9 @@
+import os
 import re
+from typing import List, Optional, Tuple, Callable
+
+from Infrastructure.Builders.ToolBuilder.AbstractToolImageManager import AbstractToolImageManager
+from Infrastructure.DataTypes.FileRepresenters.VariableOrderCache import VariableOrderCache
 
 
 def parse_variable_order_monpoly(text):
@@ -7,29 +12,38 @@ def parse_variable_order_monpoly(text):
     return [v.strip() for v in result]
 
 
-def parse_pattern(pattern_str: str):
-    match = re.match(r'@(\d+)\s*\(time point (\d+)\):\s*(.*)', pattern_str)
-    tuples_list = [[num for num in tup.split(',') if num] for tup in re.findall(r'\(([^)]*)\)', match.group(3))]
-    return int(match.group(1)), int(match.group(2)), tuples_list
-
-
 def parse_variable_order_timely(text):
     match = re.search(r"Order of free variables:\s*\((.*?)\)", text)
     result = match.group(1).split(", ") if match and match.group(1) else []
     return [v.strip() for v in result]
 
 
-def parse_monpoly_output(verdicts, stdout_input):
-    if stdout_input == "":
-        return verdicts
-
-    for line in stdout_input.strip().split("\n"):
-        try:
-            ts, tp, vals = parse_pattern(line)
-            verdicts.insert(vals, tp, ts)
-        except Exception:
-            if line.startswith("@MaxTS"):
-                pass
-            else:
-                raise ValueError(f"Could not parse line: {line}")
-    return verdicts
+def _resolve_input_file(path_to_folder, file) -> Optional[str]:
+    for candidate in [str(file), os.path.join(str(path_to_folder), str(file))]:
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def cached_variable_order(
+        image: AbstractToolImageManager, path_to_folder, check_cmd: List[str], input_files: List[str],
+        parse_order: Callable[[str], List[str]]
+) -> Tuple[Optional[List[str]], str]:
+    image_digest = image.get_image_id()
+    resolved = [_resolve_input_file(path_to_folder, f) for f in input_files]
+    if image_digest is None or None in resolved:
+        logs, code = image.run_offline(path_to_folder, check_cmd, measure=False)
+        return (parse_order(logs) if code == 0 else None), logs
+
+    cache = VariableOrderCache.for_build_path(image.get_build_path())
+    key = VariableOrderCache.key(image_digest, resolved)
+    variable_order = cache.get(key)
+    if variable_order is not None:
+        return variable_order, ""
+
+    logs, code = image.run_offline(path_to_folder, check_cmd, measure=False)
+    if code != 0:
+        return None, logs
+    variable_order = parse_order(logs)
+    cache.put(key, variable_order)
+    return variable_order, logs
@@ -10,7 +10,7 @@ from Infrastructure.DataTypes.Verification.OutputStructures.Structures.OooVerdic
 from Infrastructure.DataTypes.Verification.OutputStructures.SubTypes.VariableOrder import VariableOrder, DefaultVariableOrder
 from Infrastructure.AutoConversion.InputOutputTraceFormats import InputOutputTraceFormats
 from Infrastructure.Monitors.BaseMonitorTemplate import BaseMonitorTemplate, OfflineRunnable, OnlineRunnable
-from Archive.Implementations.Monitors.SharedFunctions import parse_variable_order_timely
+from Archive.Implementations.Monitors.SharedFunctions import parse_variable_order_timely, cached_variable_order
 from Infrastructure.constants import POLICY_KEY, TRACE_KEY, SIGNATURE_KEY
 
 
@@ -63,8 +63,10 @@ class TimelyMon(BaseMonitorTemplate, OfflineRunnable, OnlineRunnable):
 
     def post_processing_offline(self, stdout_input: AnyStr) -> AbstractOutputStructure:
         cmd = [self.params[POLICY_KEY], "--check"]
-        logs, code = self.image.run_offline(self.params["folder"], cmd, measure=False)
-        variable_order = VariableOrder(parse_variable_order_timely(logs)) if code == 0 else DefaultVariableOrder()
+        variable_order, _ = cached_variable_order(
+            self.image, self.params["folder"], cmd, [self.params[POLICY_KEY]], parse_variable_order_timely
+        )
+        variable_order = VariableOrder(variable_order) if variable_order is not None else DefaultVariableOrder()
         if self.params["output_mode"] == 0:
             res_file_path = self.params["folder"] + "/" + self.params["output_file"]
             if os.path.exists(res_file_path):
@@ -75,6 +77,11 @@ class TimelyMon(BaseMonitorTemplate, OfflineRunnable, OnlineRunnable):
         else:
             return parse_output_structure(stdout_input, variable_order)
 
+    def offline_result_files(self) -> List[str]:
+        if self.params.get("output_mode") == 0:
+            return [self.params["folder"] + "/" + self.params["output_file"]]
+        return []
+
     def construct_online_command(self) -> Tuple[List[str], Optional[str]]:
         cmd = ["additional/policy.policy"]
         if not self.params.get("ignore_signature", False):
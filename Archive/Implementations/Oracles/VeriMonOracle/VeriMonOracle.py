@@ -1,17 +1,19 @@
 import ast
 import copy
-from typing import AnyStr, Tuple
+import os
+from typing import AnyStr, Tuple, Optional
 
 from Infrastructure.AutoConversion.InputOutputPolicyFormats import InputOutputPolicyFormats
 from Infrastructure.AutoConversion.InputOutputTraceFormats import InputOutputTraceFormats
 from Infrastructure.DataTypes.PathManager.PathManager import PathManager
 from Infrastructure.DataTypes.Verification.OutputStructures.AbstractOutputStrucutre import AbstractOutputStructure
 from Infrastructure.DataTypes.Verification.OutputStructures.Compare.Comparing import comparing
-from Infrastructure.DataTypes.Verification.OutputStructures.Structures.Verdicts import Verdicts
+from Infrastructure.DataTypes.Verification.OutputStructures.Structures.DiskVerdicts import new_verdicts
 from Infrastructure.DataTypes.Verification.OutputStructures.SubTypes.VariableOrder import VariableOrder, \
     DefaultVariableOrder
 from Infrastructure.Monitors.BaseMonitorTemplate import BaseMonitorTemplate
-from Archive.Implementations.Monitors.SharedFunctions import parse_variable_order_monpoly, parse_monpoly_output
+from Archive.Implementations.Monitors.SharedFunctions import parse_variable_order_monpoly, cached_variable_order
+from Infrastructure.DataTypes.Verification.MonPolyOutputParser import parse_monpoly_file
 from Infrastructure.Oracles.AbstractOracleTemplate import AbstractOracleTemplate
 from Infrastructure.constants import SIGNATURE_KEY, POLICY_KEY, FOLDER_KEY, TRACE_KEY
 
@@ -44,11 +46,13 @@ class VeriMonOracle(AbstractOracleTemplate):
 
     def post_process_data(self, std_out_str, output_file_name):
         cmd = ["-sig", str(self.verimon.params[SIGNATURE_KEY]), "-formula", str(self.verimon.params[POLICY_KEY]), "-check"]
-        logs, code = self.verimon.image.run_offline(self.verimon.params[FOLDER_KEY], cmd, measure=False)
-        if code != 0:
+        variable_order, logs = cached_variable_order(
+            self.verimon.image, self.verimon.params[FOLDER_KEY], cmd,
+            [self.verimon.params[SIGNATURE_KEY], self.verimon.params[POLICY_KEY]], parse_variable_order_monpoly
+        )
+        if variable_order is None:
             raise Exception(f"Error in post-processing VeriMon output Variable order: {logs}")
 
-        variable_order = parse_variable_order_monpoly(logs) if code == 0 else []
         with open(f"{output_file_name}.vo", "w") as file:
             file.write(str(variable_order))
         with open(output_file_name, "w") as file:
@@ -59,14 +63,13 @@ class VeriMonOracle(AbstractOracleTemplate):
         oracle_verdicts = get_oracle_verdicts(result_file)
         return comparing(oracle_verdicts, tool_verdicts)
 
+    def reference_verdicts(self, result_file: str) -> Optional[AbstractOutputStructure]:
+        return get_oracle_verdicts(result_file)
+
 
 def get_oracle_verdicts(result_file) -> AbstractOutputStructure:
     with open(f"{result_file}.vo", "r") as file:
         raw_vo = file.read()
     variable_order = VariableOrder(ast.literal_eval(raw_vo)) if raw_vo.strip() else DefaultVariableOrder()
-    verdicts = Verdicts(variable_order=variable_order)
-
-    with open(result_file, "r") as file:
-        stdout_input = file.read()
-
-    return parse_monpoly_output(verdicts, stdout_input)
+    verdicts = new_verdicts(variable_order, os.path.getsize(result_file))
+    return parse_monpoly_file(verdicts, result_file)
@@ -1,18 +1,53 @@
-from abc import ABC, abstractmethod
+import os
+from abc import ABC
+from typing import List, Optional
 
+import pandas as pd
+
+from Infrastructure.Analysis.Aggregators.ColumnarStore import ColumnarTable, ResultStore, TableFlusher
 from Infrastructure.DataTypes.Types.custome_type import OnlineOffline
 
 
 class AbstractAggregator(ABC):
-    @abstractmethod
+    def __init__(self, tables: List[ColumnarTable], store: Optional[ResultStore] = None):
+        self.tables = {table.name: table for table in tables}
+        self.store = store
+        self.flusher = TableFlusher(store)
+
+    def _add(self, table: str, values: List) -> None:
+        self.tables[table].append(values)
+        self.flusher.maybe_flush(list(self.tables.values()))
+
+    def close(self) -> None:
+        # writes the rows not yet in the result store and closes it
+        self.flusher.flush(list(self.tables.values()))
+        if self.store is not None:
+            self.store.close()
+
+    def csv_tables(self) -> List[str]:
+        return list(self.tables)
+
+    def csv_frame(self, table: str) -> pd.DataFrame:
+        return self.tables[table].frame()
+
     def to_csv(self, path: str, name: str) -> None:
-        pass
+        """
+        Write all non-empty tables to CSV files in the specified folder, one {name}_{table}.csv per table.
+        """
+        os.makedirs(path, exist_ok=True)
+        print(f"Writing results to: {path} with name: {name}")
+        for table in self.csv_tables():
+            if self.tables[table].empty:
+                continue
+            filepath = os.path.join(path, f"{name}_{table}.csv")
+            print(f"  Writing {table} results ({len(self.tables[table])} rows) to: {filepath}")
+            self.csv_frame(table).to_csv(filepath, index=False)
 
 
-def dispatch_aggregator(mode: OnlineOffline) -> AbstractAggregator:
+def dispatch_aggregator(mode: OnlineOffline, store: Optional[ResultStore] = None) -> AbstractAggregator:
     if mode == OnlineOffline.Online:
         from Infrastructure.Analysis.Aggregators.ResultAggregatorOnline import ResultAggregatorOnline
-        return ResultAggregatorOnline()
+        return ResultAggregatorOnline(store)
     else:
         from Infrastructure.Analysis.Aggregators.ResultAggregatorOffline import ResultAggregatorOffline
-        return ResultAggregatorOffline()
+        return ResultAggregatorOffline(store)
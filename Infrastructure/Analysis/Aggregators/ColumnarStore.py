@@ -0,0 +1,209 @@
+import math
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from array import array
+from enum import Enum
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+FLUSH_ROWS = 1024
+FLUSH_INTERVAL_S = 30.0
+RESULT_STORE_FORMATS = ["sqlite", "parquet", "none"]
+
+# column dtypes: int64 and float64 columns are typed arrays (float64 holds missing values as NaN), the nullable
+# Int64 and boolean columns and object columns are lists
+_TYPECODES = {"int64": "q", "float64": "d"}
+_SQLITE_TYPES = {"int64": "INTEGER", "Int64": "INTEGER", "float64": "REAL", "boolean": "INTEGER", "object": ""}
+
+
+def _plain(value):
+    # sqlite and pyarrow only take Python scalars; enum members (Status) keep the str form of the csv export
+    if isinstance(value, Enum):
+        return str(value)
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class ColumnarTable:
+    # Rows of one result table, appended column by column instead of growing a DataFrame row by row. Rows after
+    # the flushed mark have not been written to the result store yet.
+    def __init__(self, name: str, columns: Dict[str, str]):
+        self.name = name
+        self.dtypes = columns
+        self.columns = {c: array(_TYPECODES[t]) if t in _TYPECODES else [] for (c, t) in columns.items()}
+        self.flushed = 0
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values())))
+
+    @property
+    def empty(self) -> bool:
+        return len(self) == 0
+
+    def append(self, values: Sequence):
+        if len(values) != len(self.columns):
+            raise ValueError(f"Table {self.name} has {len(self.columns)} columns, got {len(values)} values")
+        for (column, value) in zip(self.columns.values(), values):
+            if isinstance(column, array) and column.typecode == "d":
+                value = math.nan if value is None else float(value)
+            column.append(value)
+
+    def extend(self, columns: Dict[str, Sequence]):
+        # bulk append of equally long columns, e.g. all output pairs of a run
+        lengths = {len(columns[c]) for c in self.columns}
+        if len(lengths) > 1:
+            raise ValueError(f"Columns of different lengths for table {self.name}: {sorted(lengths)}")
+        for (name, column) in self.columns.items():
+            column.extend(columns[name])
+
+    def pending(self) -> int:
+        return len(self) - self.flushed
+
+    def pending_columns(self) -> Dict[str, List]:
+        # typed arrays already hold Python scalars
+        return {
+            c: column[self.flushed:].tolist() if isinstance(column, array) else [_plain(v) for v in column[self.flushed:]]
+            for (c, column) in self.columns.items()
+        }
+
+    def frame(self) -> pd.DataFrame:
+        data = dict()
+        for (name, column) in self.columns.items():
+            dtype = self.dtypes[name]
+            if isinstance(column, array):
+                data[name] = pd.Series(np.asarray(column), dtype=dtype)
+            elif dtype == "object":
+                # numeric columns that may hold "N/A" stay objects, the others become numbers
+                data[name] = pd.Series(column, dtype=object).infer_objects()
+            else:
+                data[name] = pd.Series(pd.array(column, dtype=dtype))
+        return pd.DataFrame(data, columns=list(self.columns))
+
+
+class ResultStore(ABC):
+    @abstractmethod
+    def write(self, table: ColumnarTable, columns: Dict[str, List]) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class SqliteResultStore(ResultStore):
+    # one database per experiment with a table per result table; every flush is one transaction
+    def __init__(self, path: str):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.created = set()
+
+    def write(self, table: ColumnarTable, columns: Dict[str, List]) -> None:
+        if table.name not in self.created:
+            definition = ", ".join(f'"{c}" {_SQLITE_TYPES[t]}'.strip() for (c, t) in table.dtypes.items())
+            self.connection.execute(f'CREATE TABLE IF NOT EXISTS "{table.name}" ({definition})')
+            self.created.add(table.name)
+        placeholders = ", ".join("?" for _ in columns)
+        self.connection.executemany(
+            f'INSERT INTO "{table.name}" VALUES ({placeholders})', zip(*columns.values())
+        )
+        self.connection.commit()
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class ParquetResultStore(ResultStore):
+    # a folder with a {table}.parquet file per result table, every flush is one row group
+    def __init__(self, folder: str):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ValueError("The parquet result store requires pyarrow, install it or use --result-store sqlite")
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        self.writers = dict()
+
+    def _schema(self, table: ColumnarTable):
+        types = {
+            "int64": self.pa.int64(), "Int64": self.pa.int64(), "float64": self.pa.float64(),
+            "boolean": self.pa.bool_(), "object": self.pa.string()
+        }
+        return self.pa.schema([(c, types[t]) for (c, t) in table.dtypes.items()])
+
+    def write(self, table: ColumnarTable, columns: Dict[str, List]) -> None:
+        if table.name not in self.writers:
+            path = os.path.join(self.folder, f"{table.name}.parquet")
+            self.writers[table.name] = self.pq.ParquetWriter(path, self._schema(table))
+        writer = self.writers[table.name]
+        arrays = []
+        for field in writer.schema:
+            values = columns[field.name]
+            if field.type == self.pa.string():
+                values = [None if v is None else str(v) for v in values]
+            arrays.append(self.pa.array(values, type=field.type, from_pandas=True))
+        writer.write_table(self.pa.Table.from_arrays(arrays, schema=writer.schema))
+
+    def close(self) -> None:
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = dict()
+
+
+def open_result_store(result_format: str, folder: str, name: str) -> Optional[ResultStore]:
+    os.makedirs(folder, exist_ok=True)
+    if result_format == "sqlite":
+        return SqliteResultStore(os.path.join(folder, f"{name}.db"))
+    elif result_format == "parquet":
+        return ParquetResultStore(os.path.join(folder, f"{name}_parquet"))
+    elif result_format == "none":
+        return None
+    raise ValueError(f"Unknown result store {result_format}, expected one of {RESULT_STORE_FORMATS}")
+
+
+def read_result_store(path: str) -> Dict[str, pd.DataFrame]:
+    # the tables of a stored experiment: a .db file, or a folder of {table}.parquet files
+    if path.endswith(".db"):
+        connection = sqlite3.connect(path)
+        try:
+            names = [n for (n,) in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+            return {n: pd.read_sql_query(f'SELECT * FROM "{n}"', connection) for n in names}
+        finally:
+            connection.close()
+    tables = dict()
+    for file in sorted(os.listdir(path)):
+        if file.endswith(".parquet"):
+            tables[file.removesuffix(".parquet")] = pd.read_parquet(os.path.join(path, file))
+    return tables
+
+
+class TableFlusher:
+    # Writes the pending rows of the tables to the store once FLUSH_ROWS rows are pending or FLUSH_INTERVAL_S
+    # passed since the last flush, so a long suite keeps its results if it is interrupted.
+    def __init__(self, store: Optional[ResultStore]):
+        self.store = store
+        self.last_flush = time.monotonic()
+
+    def maybe_flush(self, tables: Sequence[ColumnarTable]):
+        if self.store is None:
+            return
+        pending = sum(t.pending() for t in tables)
+        if pending >= FLUSH_ROWS or (pending and time.monotonic() - self.last_flush >= FLUSH_INTERVAL_S):
+            self.flush(tables)
+
+    def flush(self, tables: Sequence[ColumnarTable]):
+        if self.store is None:
+            return
+        for table in tables:
+            if table.pending():
+                self.store.write(table, table.pending_columns())
+                table.flushed = len(table)
+        self.last_flush = time.monotonic()
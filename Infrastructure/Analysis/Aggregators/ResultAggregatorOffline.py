@@ -1,10 +1,10 @@
-import os
 from enum import Enum
-from typing import Tuple
+from typing import Tuple, Optional
 
 import pandas as pd
 
 from Infrastructure.Analysis.Aggregators.AbstractAggregator import AbstractAggregator
+from Infrastructure.Analysis.Aggregators.ColumnarStore import ColumnarTable, ResultStore
 from Infrastructure.Analysis.Formatting import parse_wall_time
 from Infrastructure.Analysis.Formatting import parse_memory
 from Infrastructure.Analysis.Formatting import parse_cpu
@@ -19,31 +19,28 @@ class Status(Enum):
 
 
 class ResultAggregatorOffline(AbstractAggregator):
-    def __init__(self):
-        # Valid runs: full timing and stats
-        self.valid_results = pd.DataFrame(columns=[
-            "Status", "Name", "Setting", "pre", "compilation", "runtime", "post", "wall_time", "max_mem", "cpu"
-        ])
-
-        # Timed out runs: only status, tool name, setting, and timeout value
-        self.timeout_results = pd.DataFrame(columns=[
-            "Status", "Name", "Setting", "timeout"
-        ])
-
-        # Tool exceptions: status, tool name, setting, and error message
-        self.tool_error_results = pd.DataFrame(columns=[
-            "Status", "Name", "Setting", "error"
-        ])
-
-        # Result errors: same as valid but with error message
-        self.result_error_results = pd.DataFrame(columns=[
-            "Status", "Name", "Setting", "pre", "compilation", "runtime", "post", "wall_time", "max_mem", "cpu", "error_msg"
-        ])
-
-        # Missing tools: status, tool name, setting
-        self.missing_results = pd.DataFrame(columns=[
-            "Status", "Name", "Setting"
-        ])
+    def __init__(self, store: Optional[ResultStore] = None):
+        super().__init__([
+            # Valid runs: full timing and stats
+            ColumnarTable("valid", {
+                "Status": "object", "Name": "object", "Setting": "object", "pre": "float64",
+                "compilation": "float64", "runtime": "float64", "post": "float64", "wall_time": "object",
+                "max_mem": "object", "cpu": "object", "output_hash": "object", "verification": "object"
+            }),
+            # Timed out runs: only status, tool name, setting, and timeout value
+            ColumnarTable("timeout", {"Status": "object", "Name": "object", "Setting": "object", "timeout": "Int64"}),
+            # Tool exceptions: status, tool name, setting, and error message
+            ColumnarTable("tool_error", {"Status": "object", "Name": "object", "Setting": "object", "error": "object"}),
+            # Result errors: same as valid but with error message
+            ColumnarTable("result_error", {
+                "Status": "object", "Name": "object", "Setting": "object", "pre": "float64",
+                "compilation": "float64", "runtime": "float64", "post": "float64", "wall_time": "object",
+                "max_mem": "object", "cpu": "object", "error_msg": "object", "output_hash": "object",
+                "verification": "object"
+            }),
+            # Missing tools: status, tool name, setting
+            ColumnarTable("missing", {"Status": "object", "Name": "object", "Setting": "object"})
+        ], store)
 
     def add_valid(
             self,
@@ -55,13 +52,15 @@ class ResultAggregatorOffline(AbstractAggregator):
             prop: float,
             wall_time: str,
             max_mem: str,
-            cpu: str
+            cpu: str,
+            output_hash: Optional[str] = None,
+            verification: Optional[str] = None
     ) -> None:
         """Add a valid run result."""
-        self.valid_results.loc[len(self.valid_results)] = [
+        self._add("valid", [
             Status.OK, tool_name, setting_id, prep, compiled, runtime, prop,
-            parse_wall_time(wall_time), parse_memory(max_mem), parse_cpu(cpu)
-        ]
+            parse_wall_time(wall_time), parse_memory(max_mem), parse_cpu(cpu), output_hash, verification
+        ])
 
     def add_timeout(
             self,
@@ -70,9 +69,9 @@ class ResultAggregatorOffline(AbstractAggregator):
             timeout: int
     ) -> None:
         """Add a timed out run result."""
-        self.timeout_results.loc[len(self.timeout_results)] = [
+        self._add("timeout", [
             Status.TO, tool_name, setting_id, timeout
-        ]
+        ])
 
     def add_tool_error(
             self,
@@ -81,9 +80,9 @@ class ResultAggregatorOffline(AbstractAggregator):
             error: str
     ) -> None:
         """Add a tool exception result."""
-        self.tool_error_results.loc[len(self.tool_error_results)] = [
+        self._add("tool_error", [
             Status.TE, tool_name, setting_id, str(error)
-        ]
+        ])
 
     def add_result_error(
             self,
@@ -96,13 +95,15 @@ class ResultAggregatorOffline(AbstractAggregator):
             wall_time: str,
             max_mem: str,
             cpu: str,
-            error_msg: str
+            error_msg: str,
+            output_hash: Optional[str] = None,
+            verification: Optional[str] = None
     ) -> None:
         """Add a result error (verification failed)."""
-        self.result_error_results.loc[len(self.result_error_results)] = [
+        self._add("result_error", [
             Status.RE, tool_name, setting_id, prep, compiled, runtime, prop,
-            parse_wall_time(wall_time), parse_memory(max_mem), parse_cpu(cpu), error_msg
-        ]
+            parse_wall_time(wall_time), parse_memory(max_mem), parse_cpu(cpu), error_msg, output_hash, verification
+        ])
 
     def add_missing(
             self,
@@ -110,29 +111,29 @@ class ResultAggregatorOffline(AbstractAggregator):
             setting_id: str
     ) -> None:
         """Add a missing tool result."""
-        self.missing_results.loc[len(self.missing_results)] = [
+        self._add("missing", [
             Status.MI, tool_name, setting_id
-        ]
+        ])
 
     def get_valid(self) -> pd.DataFrame:
         """Get all valid run results."""
-        return self.valid_results.copy()
+        return self.tables["valid"].frame()
 
     def get_timeout(self) -> pd.DataFrame:
         """Get all timeout results."""
-        return self.timeout_results.copy()
+        return self.tables["timeout"].frame()
 
     def get_tool_error(self) -> pd.DataFrame:
         """Get all tool error results."""
-        return self.tool_error_results.copy()
+        return self.tables["tool_error"].frame()
 
     def get_result_error(self) -> pd.DataFrame:
         """Get all result error results."""
-        return self.result_error_results.copy()
+        return self.tables["result_error"].frame()
 
     def get_missing(self) -> pd.DataFrame:
         """Get all missing tool results."""
-        return self.missing_results.copy()
+        return self.tables["missing"].frame()
 
     def get_all(self) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
         """Get all result dataframes."""
@@ -144,47 +145,14 @@ class ResultAggregatorOffline(AbstractAggregator):
             self.get_missing()
         )
 
-    def to_csv(self, path: str, name: str) -> None:
-        """
-        Write all dataframes to CSV files in the specified folder.
-        Creates files: {name}_valid.csv, {name}_timeout.csv, {name}_tool_error.csv, {name}_result_error.csv
-        """
-        os.makedirs(path, exist_ok=True)
-        print(f"Writing results to: {path} with name: {name}")
-
-        if not self.valid_results.empty:
-            filepath = os.path.join(path, f"{name}_valid.csv")
-            print(f"  Writing valid results ({len(self.valid_results)} rows) to: {filepath}")
-            self.valid_results.to_csv(filepath, index=False)
-
-        if not self.timeout_results.empty:
-            filepath = os.path.join(path, f"{name}_timeout.csv")
-            print(f"  Writing timeout results ({len(self.timeout_results)} rows) to: {filepath}")
-            self.timeout_results.to_csv(filepath, index=False)
-
-        if not self.tool_error_results.empty:
-            filepath = os.path.join(path, f"{name}_tool_error.csv")
-            print(f"  Writing tool_error results ({len(self.tool_error_results)} rows) to: {filepath}")
-            self.tool_error_results.to_csv(filepath, index=False)
-
-        if not self.result_error_results.empty:
-            filepath = os.path.join(path, f"{name}_result_error.csv")
-            print(f"  Writing result_error results ({len(self.result_error_results)} rows) to: {filepath}")
-            self.result_error_results.to_csv(filepath, index=False)
-
-        if not self.missing_results.empty:
-            filepath = os.path.join(path, f"{name}_missing.csv")
-            print(f"  Writing missing results ({len(self.missing_results)} rows) to: {filepath}")
-            self.missing_results.to_csv(filepath, index=False)
-
     def __repr__(self) -> str:
         return (
             f"ResultAggregator(\n"
-            f"  valid={len(self.valid_results)},\n"
-            f"  timeout={len(self.timeout_results)},\n"
-            f"  tool_error={len(self.tool_error_results)},\n"
-            f"  result_error={len(self.result_error_results)},\n"
-            f"  missing={len(self.missing_results)}\n"
+            f"  valid={len(self.tables['valid'])},\n"
+            f"  timeout={len(self.tables['timeout'])},\n"
+            f"  tool_error={len(self.tables['tool_error'])},\n"
+            f"  result_error={len(self.tables['result_error'])},\n"
+            f"  missing={len(self.tables['missing'])}\n"
             f")"
         )
 
@@ -1,10 +1,11 @@
-import os
+import json
 from enum import Enum
-from typing import Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 
 import pandas as pd
 
 from Infrastructure.Analysis.Aggregators.AbstractAggregator import AbstractAggregator
+from Infrastructure.Analysis.Aggregators.ColumnarStore import ColumnarTable, ResultStore
 
 
 class Status(Enum):
@@ -16,30 +17,74 @@ class Status(Enum):
     MI = "Missing"
 
 
-class ResultAggregatorOnline(AbstractAggregator):
-    def __init__(self):
-        self.valid_results = pd.DataFrame(columns=[
-            "Status", "Name", "Setting", "pre", "build", "total_elapsed", "total_count", "output_pairs"
-        ])
-
-        self.timeout_maximum_latency_results = pd.DataFrame(columns=[
-            "Status", "Name", "Setting", "pre", "build", "total_elapsed", "total_count", "output_pairs"
-        ])
+def _run_columns() -> Dict[str, str]:
+    # the per-step (processed, elapsed_ns) pairs of a run are rows of the output_pairs table, keyed by run
+    return {
+        "Status": "object", "Name": "object", "Setting": "object", "run": "int64", "pre": "float64",
+        "build": "float64", "total_elapsed": "float64", "total_count": "Int64", "latency_histogram": "object",
+        "corrected_latency_histogram": "object", "verified": "boolean", "verification": "object"
+    }
 
-        self.timeout_accumulative_latency_results = pd.DataFrame(columns=[
-            "Status", "Name", "Setting", "pre", "build", "total_elapsed", "total_count", "output_pairs"
-        ])
-
-        self.tool_error_results = pd.DataFrame(columns=[
-            "Status", "Name", "Setting", "error"
-        ])
 
-        self.result_error_results = pd.DataFrame(columns=[
-            "Status", "Name", "Setting", "pre", "build", "total_elapsed", "total_count", "error_msg"
+class ResultAggregatorOnline(AbstractAggregator):
+    def __init__(self, store: Optional[ResultStore] = None):
+        super().__init__([
+            ColumnarTable("valid", _run_columns()),
+            ColumnarTable("timeout_accumulative_latency", _run_columns()),
+            ColumnarTable("timeout_maximum_latency", _run_columns()),
+            ColumnarTable("tool_error", {"Status": "object", "Name": "object", "Setting": "object", "error": "object"}),
+            ColumnarTable("result_error", {
+                "Status": "object", "Name": "object", "Setting": "object", "pre": "float64", "build": "float64",
+                "total_elapsed": "float64", "total_count": "Int64", "error_msg": "object"
+            }),
+            ColumnarTable("missing", {"Status": "object", "Name": "object", "Setting": "object"}),
+            ColumnarTable("throughput", {
+                "Name": "object", "Setting": "object", "Policy": "object", "max_rate": "float64",
+                "upper_rate": "float64", "max_scale": "float64", "upper_scale": "float64", "base_rate": "float64",
+                "sustain_probability_lower_bound": "float64", "probes": "object", "reason": "object"
+            }),
+            ColumnarTable("sweep", {
+                "Status": "object", "Name": "object", "Setting": "object", "batch_size": "int64", "scale": "float64",
+                "rate": "float64", "throughput": "float64", "total_elapsed": "float64", "total_count": "Int64",
+                "latency_histogram": "object"
+            }),
+            ColumnarTable("phases", {
+                "Name": "object", "Setting": "object", "phase": "int64", "kind": "object", "start_s": "float64",
+                "end_s": "float64", "blocks": "int64", "p50": "Int64", "p99": "Int64", "max": "Int64",
+                "recovery_s": "float64", "latency_histogram": "object"
+            }),
+            ColumnarTable("steady_state", {
+                "Status": "object", "Name": "object", "Setting": "object", "warmup_s": "float64",
+                "warmup_blocks": "int64", "warmup_events": "int64", "steady_blocks": "int64",
+                "steady_mean": "float64", "steady_p50": "Int64", "steady_p99": "Int64",
+                "steady_throughput": "float64", "steady_latency_histogram": "object"
+            }),
+            ColumnarTable("output_pairs", {
+                "run": "int64", "series": "object", "index": "int64", "processed": "int64", "elapsed_ns": "int64"
+            })
+        ], store)
+        self.runs = 0
+
+    def _add_run(
+            self, table: str, status: Status, tool_name: str, setting_id: str, prep: float, build: float,
+            total_elapsed: Optional[float], total_count: Optional[int], output_pairs: Optional[List[List[int]]],
+            latency_histogram: Optional[str], corrected_output_pairs: Optional[List[List[int]]],
+            corrected_latency_histogram: Optional[str], verified: Optional[bool], verification: Optional[str],
+            wall_output_pairs: Optional[List[List[int]]]
+    ) -> None:
+        run = self.runs
+        self.runs += 1
+        for (series, pairs) in (("raw", output_pairs), ("corrected", corrected_output_pairs), ("wall", wall_output_pairs)):
+            if pairs:
+                self.tables["output_pairs"].extend({
+                    "run": [run] * len(pairs), "series": [series] * len(pairs), "index": range(len(pairs)),
+                    "processed": [p[0] for p in pairs], "elapsed_ns": [p[1] for p in pairs]
+                })
+        self._add(table, [
+            status, tool_name, setting_id, run, prep, build, total_elapsed, total_count, latency_histogram,
+            corrected_latency_histogram, verified, verification
         ])
 
-        self.missing_results = pd.DataFrame(columns=["Status", "Name", "Setting"])
-
     def add_valid(
             self,
             tool_name: str,
@@ -48,11 +93,19 @@ class ResultAggregatorOnline(AbstractAggregator):
             build: float,
             total_elapsed: Optional[float],
             total_count: Optional[int],
-            output_pairs: Optional[str] = None
+            output_pairs: Optional[List[List[int]]] = None,
+            latency_histogram: Optional[str] = None,
+            corrected_output_pairs: Optional[List[List[int]]] = None,
+            corrected_latency_histogram: Optional[str] = None,
+            verified: Optional[bool] = None,
+            verification: Optional[str] = None,
+            wall_output_pairs: Optional[List[List[int]]] = None
     ) -> None:
-        self.valid_results.loc[len(self.valid_results)] = [
-            Status.OK, tool_name, setting_id, prep, build, total_elapsed, total_count, output_pairs
-        ]
+        self._add_run(
+            "valid", Status.OK, tool_name, setting_id, prep, build, total_elapsed, total_count, output_pairs,
+            latency_histogram, corrected_output_pairs, corrected_latency_histogram, verified, verification,
+            wall_output_pairs
+        )
 
     def add_timeout_accumulative_latency(
             self,
@@ -62,11 +115,19 @@ class ResultAggregatorOnline(AbstractAggregator):
             build: float,
             total_elapsed: Optional[float],
             total_count: Optional[int],
-            output_pairs: Optional[str] = None
+            output_pairs: Optional[List[List[int]]] = None,
+            latency_histogram: Optional[str] = None,
+            corrected_output_pairs: Optional[List[List[int]]] = None,
+            corrected_latency_histogram: Optional[str] = None,
+            verified: Optional[bool] = None,
+            verification: Optional[str] = None,
+            wall_output_pairs: Optional[List[List[int]]] = None
     ) -> None:
-        self.timeout_accumulative_latency_results.loc[len(self.timeout_accumulative_latency_results)] = [
-            Status.ATO, tool_name, setting_id, prep, build, total_elapsed, total_count, output_pairs
-        ]
+        self._add_run(
+            "timeout_accumulative_latency", Status.ATO, tool_name, setting_id, prep, build, total_elapsed, total_count, output_pairs,
+            latency_histogram, corrected_output_pairs, corrected_latency_histogram, verified, verification,
+            wall_output_pairs
+        )
 
     def add_timeout_maximum_latency(
             self,
@@ -76,11 +137,19 @@ class ResultAggregatorOnline(AbstractAggregator):
             build: float,
             total_elapsed: Optional[float],
             total_count: Optional[int],
-            output_pairs: Optional[str] = None
+            output_pairs: Optional[List[List[int]]] = None,
+            latency_histogram: Optional[str] = None,
+            corrected_output_pairs: Optional[List[List[int]]] = None,
+            corrected_latency_histogram: Optional[str] = None,
+            verified: Optional[bool] = None,
+            verification: Optional[str] = None,
+            wall_output_pairs: Optional[List[List[int]]] = None
     ) -> None:
-        self.timeout_maximum_latency_results.loc[len(self.timeout_maximum_latency_results)] = [
-            Status.MTO, tool_name, setting_id, prep, build, total_elapsed, total_count, output_pairs
-        ]
+        self._add_run(
+            "timeout_maximum_latency", Status.MTO, tool_name, setting_id, prep, build, total_elapsed, total_count, output_pairs,
+            latency_histogram, corrected_output_pairs, corrected_latency_histogram, verified, verification,
+            wall_output_pairs
+        )
 
     def add_tool_error(
             self,
@@ -88,9 +157,9 @@ class ResultAggregatorOnline(AbstractAggregator):
             setting_id: str,
             error: str
     ) -> None:
-        self.tool_error_results.loc[len(self.tool_error_results)] = [
+        self._add("tool_error", [
             Status.TE, tool_name, setting_id, str(error)
-        ]
+        ])
 
     def add_result_error(
             self,
@@ -102,36 +171,125 @@ class ResultAggregatorOnline(AbstractAggregator):
             total_count: Optional[int],
             error_msg: str
     ) -> None:
-        self.result_error_results.loc[len(self.result_error_results)] = [
+        self._add("result_error", [
             Status.RE, tool_name, setting_id, prep, build, total_elapsed, total_count, error_msg
-        ]
+        ])
 
     def add_missing(
             self,
             tool_name: str,
             setting_id: str
     ) -> None:
-        self.missing_results.loc[len(self.missing_results)] = [
+        self._add("missing", [
             Status.MI, tool_name, setting_id
-        ]
+        ])
+
+    def add_throughput(
+            self,
+            tool_name: str,
+            setting_id: str,
+            policy: str,
+            max_rate: Optional[float],
+            upper_rate: Optional[float],
+            max_scale: Optional[float],
+            upper_scale: Optional[float],
+            base_rate: Optional[float],
+            sustain_probability_lower_bound: float,
+            probes: str,
+            reason: str
+    ) -> None:
+        self._add("throughput", [
+            tool_name, setting_id, policy, max_rate, upper_rate, max_scale, upper_scale, base_rate,
+            sustain_probability_lower_bound, probes, reason
+        ])
+
+    def add_sweep(
+            self,
+            status: Status,
+            tool_name: str,
+            setting_id: str,
+            batch_size: int,
+            scale: float,
+            rate: Optional[float],
+            throughput: Optional[float],
+            total_elapsed: Optional[float],
+            total_count: Optional[int],
+            latency_histogram: Optional[str] = None
+    ) -> None:
+        self._add("sweep", [
+            status, tool_name, setting_id, batch_size, scale, rate, throughput, total_elapsed, total_count,
+            latency_histogram
+        ])
+
+    def add_phase(
+            self,
+            tool_name: str,
+            setting_id: str,
+            phase: int,
+            kind: str,
+            start_s: float,
+            end_s: Optional[float],
+            blocks: int,
+            p50: Optional[int],
+            p99: Optional[int],
+            max_latency: Optional[int],
+            recovery_s: Optional[float],
+            latency_histogram: Optional[str] = None
+    ) -> None:
+        self._add("phases", [
+            tool_name, setting_id, phase, kind, start_s, end_s, blocks, p50, p99, max_latency, recovery_s,
+            latency_histogram
+        ])
+
+    def add_steady_state(
+            self,
+            status: Status,
+            tool_name: str,
+            setting_id: str,
+            warmup_s: float,
+            warmup_blocks: int,
+            warmup_events: int,
+            steady_blocks: int,
+            steady_mean: Optional[float],
+            steady_p50: Optional[int],
+            steady_p99: Optional[int],
+            steady_throughput: Optional[float],
+            steady_latency_histogram: Optional[str] = None
+    ) -> None:
+        self._add("steady_state", [
+            status, tool_name, setting_id, warmup_s, warmup_blocks, warmup_events, steady_blocks, steady_mean,
+            steady_p50, steady_p99, steady_throughput, steady_latency_histogram
+        ])
 
     def get_valid(self) -> pd.DataFrame:
-        return self.valid_results.copy()
+        return self._with_output_pairs("valid")
 
     def get_timeout_accumulative_latency(self) -> pd.DataFrame:
-        return self.timeout_accumulative_latency_results.copy()
+        return self._with_output_pairs("timeout_accumulative_latency")
 
     def get_timeout_maximum_latency(self) -> pd.DataFrame:
-        return self.timeout_maximum_latency_results.copy()
+        return self._with_output_pairs("timeout_maximum_latency")
 
     def get_tool_error(self) -> pd.DataFrame:
-        return self.tool_error_results.copy()
+        return self.tables["tool_error"].frame()
 
     def get_result_error(self) -> pd.DataFrame:
-        return self.result_error_results.copy()
+        return self.tables["result_error"].frame()
 
     def get_missing(self) -> pd.DataFrame:
-        return self.missing_results.copy()
+        return self.tables["missing"].frame()
+
+    def get_throughput(self) -> pd.DataFrame:
+        return self.tables["throughput"].frame()
+
+    def get_sweep(self) -> pd.DataFrame:
+        return self.tables["sweep"].frame()
+
+    def get_phases(self) -> pd.DataFrame:
+        return self.tables["phases"].frame()
+
+    def get_steady_state(self) -> pd.DataFrame:
+        return self.tables["steady_state"].frame()
 
     def get_all(self) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
         return (
@@ -143,48 +301,55 @@ class ResultAggregatorOnline(AbstractAggregator):
             self.get_missing()
         )
 
-    def to_csv(self, path: str, name: str) -> None:
-        os.makedirs(path, exist_ok=True)
-        print(f"Writing results to: {path} with name: {name}")
-
-        if not self.valid_results.empty:
-            filepath = os.path.join(path, f"{name}_valid.csv")
-            print(f"  Writing valid results ({len(self.valid_results)} rows) to: {filepath}")
-            self.valid_results.to_csv(filepath, index=False)
-
-        if not self.timeout_accumulative_latency_results.empty:
-            filepath = os.path.join(path, f"{name}_timeout_accumulative_latency.csv")
-            print(f"  Writing timeout_accumulative_latency results ({len(self.timeout_accumulative_latency_results)} rows) to: {filepath}")
-            self.timeout_accumulative_latency_results.to_csv(filepath, index=False)
-
-        if not self.timeout_maximum_latency_results.empty:
-            filepath = os.path.join(path, f"{name}_timeout_maximum_latency.csv")
-            print(f"  Writing timeout_maximum_latency results ({len(self.timeout_maximum_latency_results)} rows) to: {filepath}")
-            self.timeout_maximum_latency_results.to_csv(filepath, index=False)
-
-        if not self.tool_error_results.empty:
-            filepath = os.path.join(path, f"{name}_tool_error.csv")
-            print(f"  Writing tool_error results ({len(self.tool_error_results)} rows) to: {filepath}")
-            self.tool_error_results.to_csv(filepath, index=False)
-
-        if not self.result_error_results.empty:
-            filepath = os.path.join(path, f"{name}_result_error.csv")
-            print(f"  Writing result_error results ({len(self.result_error_results)} rows) to: {filepath}")
-            self.result_error_results.to_csv(filepath, index=False)
-
-        if not self.missing_results.empty:
-            filepath = os.path.join(path, f"{name}_missing.csv")
-            print(f"  Writing missing results ({len(self.missing_results)} rows) to: {filepath}")
-            self.missing_results.to_csv(filepath, index=False)
+    def get_output_pairs(self) -> pd.DataFrame:
+        # long format: one row per (run, series, index), series is raw, corrected or wall; the elapsed_ns of a
+        # wall row is the step's send offset from the replay start
+        return self.tables["output_pairs"].frame()
+
+    def get_runs(self, table: str) -> pd.DataFrame:
+        # a run table without its pairs, join get_output_pairs() on run
+        return self.tables[table].frame()
+
+    def _with_output_pairs(self, table: str) -> pd.DataFrame:
+        # the run table with each run's pairs nested back into the output_pairs and corrected_output_pairs lists
+        runs = self.get_runs(table)
+        pairs = self.get_output_pairs()
+        pairs = pairs[pairs["run"].isin(runs["run"])]
+        for (series, column) in (("raw", "output_pairs"), ("corrected", "corrected_output_pairs")):
+            selected = pairs[pairs["series"] == series].sort_values(["run", "index"])
+            nested = pd.Series(
+                list(zip(selected["processed"].tolist(), selected["elapsed_ns"].tolist())), index=selected["run"]
+            ).groupby(level=0).agg(lambda group: [list(pair) for pair in group])
+            position = runs.columns.get_loc("latency_histogram") + (0 if series == "raw" else 1)
+            runs.insert(position, column, runs["run"].map(nested))
+        return runs
+
+    def csv_tables(self) -> List[str]:
+        # the csv export keeps the pairs as JSON cells of the run tables
+        return [table for table in self.tables if table != "output_pairs"]
+
+    def csv_frame(self, table: str) -> pd.DataFrame:
+        if table not in ("valid", "timeout_accumulative_latency", "timeout_maximum_latency"):
+            return super().csv_frame(table)
+        runs = self._with_output_pairs(table)
+        runs["output_pairs"] = runs["output_pairs"].map(lambda pairs: json.dumps(pairs) if isinstance(pairs, list) else "[]")
+        runs["corrected_output_pairs"] = runs["corrected_output_pairs"].map(
+            lambda pairs: json.dumps(pairs) if isinstance(pairs, list) else None
+        )
+        return runs.drop(columns=["run"])
 
     def __repr__(self) -> str:
         return (
             f"ResultAggregatorOnline(\n"
-            f"  valid={len(self.valid_results)},\n"
-            f"  timeout_accumulative_latency={len(self.timeout_accumulative_latency_results)},\n"
-            f"  timeout_maximum_latency={len(self.timeout_maximum_latency_results)},\n"
-            f"  tool_error={len(self.tool_error_results)},\n"
-            f"  result_error={len(self.result_error_results)},\n"
-            f"  missing={len(self.missing_results)}\n"
+            f"  valid={len(self.tables['valid'])},\n"
+            f"  timeout_accumulative_latency={len(self.tables['timeout_accumulative_latency'])},\n"
+            f"  timeout_maximum_latency={len(self.tables['timeout_maximum_latency'])},\n"
+            f"  tool_error={len(self.tables['tool_error'])},\n"
+            f"  result_error={len(self.tables['result_error'])},\n"
+            f"  missing={len(self.tables['missing'])},\n"
+            f"  throughput={len(self.tables['throughput'])},\n"
+            f"  sweep={len(self.tables['sweep'])},\n"
+            f"  phases={len(self.tables['phases'])},\n"
+            f"  steady_state={len(self.tables['steady_state'])}\n"
             f")"
         )
@@ -7,6 +7,9 @@ import pandas as pd
 
 from Infrastructure.Analysis.Aggregators.ResultAggregatorOffline import ResultAggregatorOffline
 from Infrastructure.Analysis.AutomatedAnalysis.BaseAnalysis import AbstractAnalysis
+from Infrastructure.DataTypes.Types.SteadyState import mser_truncation
+
+MIN_REPEATS_FOR_WARMUP = 4
 
 
 class AnalysisOffline(AbstractAnalysis):
@@ -122,6 +125,7 @@ class AnalysisOffline(AbstractAnalysis):
 
             self._render_table_page(pdf, "Memory Ranking (Lowest to Highest max_mem)", memory_ranking, max_rows=40)
             self._render_table_page(pdf, "Stage Breakdown (pre/compilation/runtime/post/total)", stage_breakdown, max_rows=40)
+            self._render_table_page(pdf, "Steady State (warm-up repeats excluded)", analysis_results.get("steady_state", pd.DataFrame()), max_rows=40)
         return pdf_path
 
     @staticmethod
@@ -195,6 +199,10 @@ class AnalysisOffline(AbstractAnalysis):
             re = int((result_error["Name"] == name).sum()) if "Name" in result_error.columns else 0
             mi = int((missing["Name"] == name).sum()) if "Name" in missing.columns else 0
             total = ok + to + te + re + mi
+            nd = sum(
+                int(((df["Name"] == name) & (df["verification"] == "non-deterministic")).sum())
+                for df in (valid, result_error) if "verification" in df.columns
+            )
 
             rows.append(
                 {
@@ -205,6 +213,7 @@ class AnalysisOffline(AbstractAnalysis):
                     "errored": te,
                     "timed_out": to,
                     "missing": mi,
+                    "non_deterministic": nd,
                     "success_rate": (ok / total) if total else 0.0,
                 }
             )
@@ -303,6 +312,31 @@ class AnalysisOffline(AbstractAnalysis):
 
         return stage.sort_values(["setting_prefix", "dataset_size", "Name", "Setting"])
 
+    @staticmethod
+    def _build_steady_state(valid: pd.DataFrame) -> pd.DataFrame:
+        # Across the repeats of a setting in run order, the leading runs MSER singles out as warm-up (cold page
+        # cache, first container start) are left out of the steady means.
+        columns = ["Name", "setting_prefix", "dataset_size", "n_runs", "warmup_runs", "runtime_mean",
+                   "steady_runtime_mean", "wall_time_mean", "steady_wall_time_mean"]
+        if valid.empty:
+            return pd.DataFrame(columns=columns)
+
+        work = AnalysisOffline._safe_numeric(valid, ["runtime", "wall_time"])
+        rows = []
+        for (name, prefix, size), group in work.groupby(["Name", "setting_prefix", "dataset_size"], dropna=False):
+            group = group.sort_values("repeat_idx")
+            runtimes = group["runtime"]
+            detectable = len(runtimes) >= MIN_REPEATS_FOR_WARMUP and runtimes.notna().all()
+            warmup = mser_truncation(runtimes.tolist()) if detectable else 0
+            steady = group.iloc[warmup:]
+            rows.append({
+                "Name": name, "setting_prefix": prefix, "dataset_size": size, "n_runs": len(group),
+                "warmup_runs": warmup, "runtime_mean": group["runtime"].mean(),
+                "steady_runtime_mean": steady["runtime"].mean(), "wall_time_mean": group["wall_time"].mean(),
+                "steady_wall_time_mean": steady["wall_time"].mean()
+            })
+        return pd.DataFrame(rows, columns=columns).sort_values(["setting_prefix", "dataset_size", "Name"])
+
     def run(self, aggregator: ResultAggregatorOffline) -> Dict[str, pd.DataFrame]:
         valid = self._with_setting_parts(aggregator.get_valid())
         timeout = aggregator.get_timeout()
@@ -315,6 +349,7 @@ class AnalysisOffline(AbstractAnalysis):
         setting_tool_comparison = self._build_setting_tool_comparison(valid)
         memory_ranking = self._build_memory_ranking(valid)
         stage_breakdown = self._build_stage_breakdown(valid)
+        steady_state = self._build_steady_state(valid)
 
         return {
             "tool_overview": tool_overview,
@@ -325,4 +360,5 @@ class AnalysisOffline(AbstractAnalysis):
             "wall_time_points": wall_time_points,
             "memory_ranking": memory_ranking,
             "stage_breakdown": stage_breakdown,
+            "steady_state": steady_state,
         }
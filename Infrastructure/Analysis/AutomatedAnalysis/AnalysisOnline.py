@@ -1,43 +1,22 @@
-import json
-import re
 from typing import Dict, List
 import pandas as pd
 
-from Infrastructure.Analysis.Aggregators.ResultAggregatorOnline import ResultAggregatorOnline
+from Infrastructure.Analysis.Aggregators.ResultAggregatorOnline import ResultAggregatorOnline, Status
 from Infrastructure.Analysis.AutomatedAnalysis.BaseAnalysis import AbstractAnalysis
+from Infrastructure.DataTypes.Types.LatencyHistogram import LatencyHistogram
 
 
-class AnalysisOnline(AbstractAnalysis):
-    @staticmethod
-    def _expand_output_pairs(df: pd.DataFrame, prefix: str) -> pd.DataFrame:
-        out = df.copy()
-        if "output_pairs" not in out.columns:
-            return out
-
-        def _parse_pairs(raw):
-            if pd.isna(raw):
-                return []
-            try:
-                parsed = json.loads(raw) if isinstance(raw, str) else raw
-            except Exception:
-                return []
-            if not isinstance(parsed, list):
-                return []
-            cleaned = []
-            for pair in parsed:
-                if isinstance(pair, (list, tuple)) and len(pair) >= 2:
-                    cleaned.append((pair[0], pair[1]))
-            return cleaned
-
-        vectors = out["output_pairs"].apply(_parse_pairs)
-        max_len = int(vectors.map(len).max()) if not vectors.empty else 0
-
-        for i in range(max_len):
-            out[f"{prefix}_processed_{i}"] = vectors.apply(lambda v: v[i][0] if i < len(v) else pd.NA)
-            out[f"{prefix}_elapsed_ns_{i}"] = vectors.apply(lambda v: v[i][1] if i < len(v) else pd.NA)
+# the pairs' counts of processed events locate an output in the stream, latencies are in ns
+RUN_COLUMNS = ["Name", "Setting", "run", "pre", "build", "total_elapsed", "total_count"]
+LATENCY_COLUMNS = [
+    "outputs", "latency_mean_ns", "latency_p50_ns", "latency_p99_ns", "latency_max_ns", "corrected_latency_p99_ns"
+]
+OUTPUT_LATENCY_COLUMNS = [
+    "Name", "Setting", "Status", "run", "index", "processed", "latency_ns", "corrected_latency_ns", "offset_ns"
+]
 
-        return out
 
+class AnalysisOnline(AbstractAnalysis):
     @staticmethod
     def _safe_numeric(df: pd.DataFrame, cols: List[str]) -> pd.DataFrame:
         out = df.copy()
@@ -47,93 +26,200 @@ class AnalysisOnline(AbstractAnalysis):
         return out
 
     @staticmethod
-    def _extract_numeric_tokens(value) -> List[float]:
-        if pd.isna(value):
-            return []
-        # Extract all numeric tokens from the setting text.
-        tokens = re.findall(r"-?\d+(?:\.\d+)?", str(value))
-        out = []
-        for t in tokens:
-            try:
-                out.append(float(t))
-            except ValueError:
-                pass
-        return out
+    def _build_output_latency(pairs: pd.DataFrame, runs: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        # Long format of the per-step output pairs: one row per (run, output index), the raw and the corrected
+        # series side by side, offset_ns is the step's [Wall Offset] if the driver reported it. Built with joins on
+        # the run id, so it grows linearly with the number of outputs.
+        labelled = [df[["Name", "Setting", "run"]].assign(Status=status) for (status, df) in runs.items() if not df.empty]
+        if pairs.empty or not labelled:
+            return pd.DataFrame(columns=OUTPUT_LATENCY_COLUMNS)
+
+        raw = pairs.loc[pairs["series"] == "raw", ["run", "index", "processed", "elapsed_ns"]]
+        corrected = pairs.loc[pairs["series"] == "corrected", ["run", "index", "elapsed_ns"]]
+        wall = pairs.loc[pairs["series"] == "wall", ["run", "index", "elapsed_ns"]]
+        out = raw.rename(columns={"elapsed_ns": "latency_ns"}).merge(
+            corrected.rename(columns={"elapsed_ns": "corrected_latency_ns"}), on=["run", "index"], how="left"
+        ).merge(wall.rename(columns={"elapsed_ns": "offset_ns"}), on=["run", "index"], how="left")
+        out = out.merge(pd.concat(labelled, ignore_index=True), on="run", how="inner")
+        return out.sort_values(["run", "index"])[OUTPUT_LATENCY_COLUMNS].reset_index(drop=True)
 
     @staticmethod
-    def _extract_latency_values_from_setting(df: pd.DataFrame, prefix: str) -> pd.DataFrame:
-        out = df.copy()
-        if "Setting" not in out.columns:
-            return out
+    def _build_run_latency(output_latency: pd.DataFrame) -> pd.DataFrame:
+        # per run over its outputs, indexed by run
+        if output_latency.empty:
+            return pd.DataFrame(columns=LATENCY_COLUMNS, index=pd.Index([], name="run", dtype="int64"))
+        grouped = output_latency.groupby("run")
+        latency = grouped["latency_ns"]
+        return pd.DataFrame({
+            "outputs": grouped.size(),
+            "latency_mean_ns": latency.mean(),
+            "latency_p50_ns": latency.quantile(0.5),
+            "latency_p99_ns": latency.quantile(0.99),
+            "latency_max_ns": latency.max(),
+            "corrected_latency_p99_ns": grouped["corrected_latency_ns"].quantile(0.99),
+        }, columns=LATENCY_COLUMNS)
 
-        vectors = out["Setting"].apply(AnalysisOnline._extract_numeric_tokens)
-        max_len = int(vectors.map(len).max()) if not vectors.empty else 0
+    @staticmethod
+    def _build_tool_overview(valid, to_acc, to_max, tool_error, result_error, missing) -> pd.DataFrame:
+        columns = ["Name", "total_runs", "succeeded", "timeout_accumulative_latency", "timeout_maximum_latency",
+                   "tool_error", "result_error", "verified", "unverified", "missing", "success_rate"]
+        outcomes = {
+            "succeeded": valid, "timeout_accumulative_latency": to_acc, "timeout_maximum_latency": to_max,
+            "tool_error": tool_error, "result_error": result_error, "missing": missing
+        }
+        counts = pd.DataFrame(
+            {outcome: df["Name"].value_counts() for (outcome, df) in outcomes.items() if "Name" in df.columns}
+        ).reindex(columns=list(outcomes)).fillna(0).astype(int)
+        if counts.empty:
+            return pd.DataFrame(columns=columns)
 
-        for idx in range(max_len):
-            col = f"{prefix}_latency_{idx}"
-            out[col] = vectors.apply(lambda vals: vals[idx] if idx < len(vals) else pd.NA)
+        # runs whose streamed output was checked against the oracle, including timed out prefixes
+        checked = [
+            df.loc[df["verified"].eq(True).fillna(False).astype(bool), "Name"]
+            for df in (valid, to_acc, to_max) if "verified" in df.columns
+        ]
+        verified = pd.concat(checked).value_counts() if checked else pd.Series(dtype=int)
+        counts["verified"] = verified.reindex(counts.index).fillna(0).astype(int)
+        # runs that were never compared with the oracle, the reason is printed with the run
+        skipped = [
+            df.loc[df["verification"].eq("unverified").fillna(False).astype(bool), "Name"]
+            for df in (valid, to_acc, to_max) if "verification" in df.columns
+        ]
+        unverified = pd.concat(skipped).value_counts() if skipped else pd.Series(dtype=int)
+        counts["unverified"] = unverified.reindex(counts.index).fillna(0).astype(int)
+        counts["total_runs"] = counts[list(outcomes)].sum(axis=1)
+        counts["success_rate"] = (counts["succeeded"] / counts["total_runs"]).where(counts["total_runs"] > 0, 0.0)
+        overview = counts.sort_index().rename_axis("Name").reset_index()
+        return overview[columns]
 
-        return out
+    @staticmethod
+    def _build_run_table(runs: pd.DataFrame, run_latency: pd.DataFrame) -> pd.DataFrame:
+        # one row per run with its latency over the outputs, the outputs themselves are in output_latency
+        extra = [c for c in ("verified", "verification") if c in runs.columns]
+        if runs.empty:
+            return pd.DataFrame(columns=RUN_COLUMNS + extra + LATENCY_COLUMNS)
+
+        out = AnalysisOnline._safe_numeric(runs[RUN_COLUMNS + extra], ["pre", "build", "total_elapsed", "total_count"])
+        out = out.merge(run_latency, left_on="run", right_index=True, how="left")
+        out["outputs"] = out["outputs"].fillna(0).astype(int)
+        return out.sort_values(["Name", "Setting"])
 
     @staticmethod
-    def _build_tool_overview(valid, to_acc, to_max, tool_error, result_error, missing) -> pd.DataFrame:
-        frames = [valid, to_acc, to_max, tool_error, result_error, missing]
-        names = set()
-        for df in frames:
-            if "Name" in df.columns:
-                names.update(df["Name"].dropna().unique().tolist())
+    def _build_latency_percentiles(valid: pd.DataFrame) -> pd.DataFrame:
+        # Repeats of a setting share its id up to the trailing repeat index; their histograms are merged. The
+        # corrected_* columns measure from the intended send times; the gap to the uncorrected ones is the
+        # waiting hidden by coordinated omission.
+        corrected_columns = ["corrected_mean", "corrected_p50", "corrected_p99", "corrected_p99.9", "corrected_max"]
+        columns = ["Name", "Setting", "runs", "count", "mean", "p50", "p99", "p99.9", "max"] + corrected_columns
+        if valid.empty or "latency_histogram" not in valid.columns:
+            return pd.DataFrame(columns=columns)
 
+        runs = valid.dropna(subset=["latency_histogram"]).copy()
+        runs["Setting"] = runs["Setting"].astype(str).str.replace(r"_\d+$", "", regex=True)
         rows = []
-        for name in sorted(names):
-            ok = int((valid["Name"] == name).sum()) if "Name" in valid.columns else 0
-            ato = int((to_acc["Name"] == name).sum()) if "Name" in to_acc.columns else 0
-            mto = int((to_max["Name"] == name).sum()) if "Name" in to_max.columns else 0
-            te = int((tool_error["Name"] == name).sum()) if "Name" in tool_error.columns else 0
-            re = int((result_error["Name"] == name).sum()) if "Name" in result_error.columns else 0
-            mi = int((missing["Name"] == name).sum()) if "Name" in missing.columns else 0
-            total = ok + ato + mto + te + re + mi
+        for (name, setting), group in runs.groupby(["Name", "Setting"]):
+            histogram = LatencyHistogram.merged(group["latency_histogram"])
+            if histogram is None or histogram.total == 0:
+                continue
+            row = {"Name": name, "Setting": setting, "runs": len(group), **histogram.summary()}
+            if "corrected_latency_histogram" in group.columns:
+                corrected = LatencyHistogram.merged(group["corrected_latency_histogram"].dropna())
+                if corrected is not None and corrected.total > 0:
+                    row.update({f"corrected_{k}": v for (k, v) in corrected.summary().items() if k != "count"})
+            rows.append(row)
+        return pd.DataFrame(rows, columns=columns)
+
+    @staticmethod
+    def _build_phase_latency(phases: pd.DataFrame) -> pd.DataFrame:
+        # per rate profile phase over the repeats of a setting; recovery is None once a repeat never recovered
+        columns = ["Name", "Setting", "phase", "kind", "start_s", "end_s", "runs", "count", "mean", "p50", "p99",
+                   "p99.9", "max", "recovery_s_mean", "recovery_s_max", "unrecovered"]
+        if phases.empty:
+            return pd.DataFrame(columns=columns)
+
+        runs = phases.copy()
+        runs["Setting"] = runs["Setting"].astype(str).str.replace(r"_\d+$", "", regex=True)
+        runs = AnalysisOnline._safe_numeric(runs, ["recovery_s"])
+        rows = []
+        for (name, setting, phase), group in runs.groupby(["Name", "Setting", "phase"]):
+            histogram = LatencyHistogram.merged(group["latency_histogram"].dropna())
+            if histogram is None or histogram.total == 0:
+                continue
+            first = group.iloc[0]
             rows.append({
-                "Name": name,
-                "total_runs": total,
-                "succeeded": ok,
-                "timeout_accumulative_latency": ato,
-                "timeout_maximum_latency": mto,
-                "tool_error": te,
-                "result_error": re,
-                "missing": mi,
-                "success_rate": (ok / total) if total else 0.0,
+                "Name": name, "Setting": setting, "phase": phase, "kind": first["kind"], "start_s": first["start_s"],
+                "end_s": first["end_s"], "runs": len(group), **histogram.summary(),
+                "recovery_s_mean": group["recovery_s"].mean(), "recovery_s_max": group["recovery_s"].max(),
+                "unrecovered": int(group["recovery_s"].isna().sum()) if pd.notna(first["end_s"]) else 0
             })
-        return pd.DataFrame(rows)
+        return pd.DataFrame(rows, columns=columns)
 
     @staticmethod
-    def _build_successful_runs_table(valid: pd.DataFrame) -> pd.DataFrame:
-        if valid.empty:
-            return pd.DataFrame(
-                columns=["Name", "Setting", "pre", "build", "total_elapsed", "total_count", "output_pairs"])
-
-        cols = ["Name", "Setting", "pre", "build", "total_elapsed", "total_count"]
-        if "output_pairs" in valid.columns:
-            cols.append("output_pairs")
-
-        out = valid[cols].copy()
-        out = AnalysisOnline._safe_numeric(out, ["pre", "build", "total_elapsed", "total_count"])
-        out = AnalysisOnline._expand_output_pairs(out, "ok")
-        return out.sort_values(["Name", "Setting"])
+    def _build_steady_state(steady: pd.DataFrame) -> pd.DataFrame:
+        # latency after the detected warm-up, merged over the successful repeats of a setting
+        columns = ["Name", "Setting", "runs", "warmup_s_mean", "warmup_s_max", "warmup_events_mean",
+                   "steady_throughput_mean", "count", "mean", "p50", "p99", "p99.9", "max"]
+        if steady.empty:
+            return pd.DataFrame(columns=columns)
+
+        runs = steady[steady["Status"] == Status.OK].copy()
+        runs["Setting"] = runs["Setting"].astype(str).str.replace(r"_\d+$", "", regex=True)
+        runs = AnalysisOnline._safe_numeric(runs, ["warmup_s", "warmup_events", "steady_throughput"])
+        rows = []
+        for (name, setting), group in runs.groupby(["Name", "Setting"]):
+            histogram = LatencyHistogram.merged(group["steady_latency_histogram"].dropna())
+            if histogram is None or histogram.total == 0:
+                continue
+            rows.append({
+                "Name": name, "Setting": setting, "runs": len(group), "warmup_s_mean": group["warmup_s"].mean(),
+                "warmup_s_max": group["warmup_s"].max(), "warmup_events_mean": group["warmup_events"].mean(),
+                "steady_throughput_mean": group["steady_throughput"].mean(), **histogram.summary()
+            })
+        return pd.DataFrame(rows, columns=columns)
 
     @staticmethod
-    def _build_timeout_table(timeout_df: pd.DataFrame, prefix: str) -> pd.DataFrame:
-        if timeout_df.empty:
-            return pd.DataFrame(
-                columns=["Name", "Setting", "pre", "build", "total_elapsed", "total_count", "output_pairs"])
-
-        cols = ["Name", "Setting", "pre", "build", "total_elapsed", "total_count"]
-        if "output_pairs" in timeout_df.columns:
-            cols.append("output_pairs")
-
-        out = timeout_df[cols].copy()
-        out = AnalysisOnline._safe_numeric(out, ["pre", "build", "total_elapsed", "total_count"])
-        out = AnalysisOnline._expand_output_pairs(out, prefix)
-        return out.sort_values(["Name", "Setting"])
+    def _build_pareto_frontier(sweep: pd.DataFrame) -> pd.DataFrame:
+        # one point per (Name, Setting, batch_size, scale) over the repeats that kept within the latency limits;
+        # a point is on the frontier if no other point of the tool has at least its throughput at a lower p99
+        columns = ["Name", "Setting", "batch_size", "scale", "rate", "runs", "throughput", "p50", "p99", "pareto"]
+        if sweep.empty:
+            return pd.DataFrame(columns=columns)
+
+        runs = sweep[(sweep["Status"].astype(str) == str(Status.OK)) & sweep["latency_histogram"].notna()]
+        runs = AnalysisOnline._safe_numeric(runs, ["rate", "throughput"])
+        rows = []
+        for (name, setting, batch_size, scale), group in runs.groupby(["Name", "Setting", "batch_size", "scale"]):
+            histogram = LatencyHistogram.merged(group["latency_histogram"])
+            if histogram is None or histogram.total == 0:
+                continue
+            rows.append({
+                "Name": name, "Setting": setting, "batch_size": batch_size, "scale": scale,
+                "rate": group["rate"].mean(), "runs": len(group), "throughput": group["throughput"].mean(),
+                "p50": histogram.percentile(50), "p99": histogram.percentile(99), "pareto": False
+            })
+        points = pd.DataFrame(rows, columns=columns)
+        if points.empty:
+            return points
+
+        for _, group in points.groupby(["Name", "Setting"]):
+            best_p99 = None
+            for index in group.sort_values(["throughput", "p99"], ascending=[False, True]).index:
+                p99 = points.at[index, "p99"]
+                if pd.isna(points.at[index, "throughput"]):
+                    continue
+                if best_p99 is None or p99 < best_p99:
+                    points.at[index, "pareto"] = True
+                    best_p99 = p99
+        return points.sort_values(["Name", "Setting", "throughput"]).reset_index(drop=True)
+
+    def save_plots(self, output_folder: str, analysis_results: Dict[str, pd.DataFrame]) -> None:
+        frontier = analysis_results.get("pareto_frontier")
+        if frontier is None or frontier.empty:
+            return
+        from Infrastructure.Analysis.AutomatedAnalysis.OnlineLatencyPlotter import plot_pareto_frontier
+        import os
+        for setting, group in frontier.groupby("Setting"):
+            plot_pareto_frontier(group, out=os.path.join(output_folder, f"pareto_frontier_{setting}.svg"))
 
     @staticmethod
     def save_report(output_folder: str, analysis_results: Dict[str, pd.DataFrame]) -> str:
@@ -144,21 +230,34 @@ class AnalysisOnline(AbstractAnalysis):
         return output_folder
 
     def run(self, aggregator: ResultAggregatorOnline) -> Dict[str, pd.DataFrame]:
-        valid = aggregator.get_valid()
-        to_acc = aggregator.get_timeout_accumulative_latency()
-        to_max = aggregator.get_timeout_maximum_latency()
+        valid = aggregator.get_runs("valid")
+        to_acc = aggregator.get_runs("timeout_accumulative_latency")
+        to_max = aggregator.get_runs("timeout_maximum_latency")
         tool_error = aggregator.get_tool_error()
         result_error = aggregator.get_result_error()
         missing = aggregator.get_missing()
 
         tool_overview = self._build_tool_overview(valid, to_acc, to_max, tool_error, result_error, missing)
-        successful_runs = self._build_successful_runs_table(valid)
-        timeout_accumulative_latency_details = self._build_timeout_table(to_acc, "acc")
-        timeout_maximum_latency_details = self._build_timeout_table(to_max, "max")
+        output_latency = self._build_output_latency(
+            aggregator.get_output_pairs(), {"OK": valid, "ATO": to_acc, "MTO": to_max}
+        )
+        run_latency = self._build_run_latency(output_latency)
+        successful_runs = self._build_run_table(valid, run_latency)
+        timeout_accumulative_latency_details = self._build_run_table(to_acc, run_latency)
+        timeout_maximum_latency_details = self._build_run_table(to_max, run_latency)
+        latency_percentiles = self._build_latency_percentiles(valid)
+        pareto_frontier = self._build_pareto_frontier(aggregator.get_sweep())
+        phase_latency = self._build_phase_latency(aggregator.get_phases())
+        steady_state = self._build_steady_state(aggregator.get_steady_state())
 
         return {
             "tool_overview": tool_overview,
             "successful_runs": successful_runs,
             "timeout_accumulative_latency_details": timeout_accumulative_latency_details,
             "timeout_maximum_latency_details": timeout_maximum_latency_details,
+            "output_latency": output_latency,
+            "latency_percentiles": latency_percentiles,
+            "pareto_frontier": pareto_frontier,
+            "phase_latency": phase_latency,
+            "steady_state": steady_state,
         }
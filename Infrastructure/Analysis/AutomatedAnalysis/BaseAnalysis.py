@@ -10,3 +10,6 @@ class AbstractAnalysis(ABC):
     @abstractmethod
     def run(self, aggregator: AbstractAggregator) -> Dict[str, pd.DataFrame]:
         pass
+
+    def save_plots(self, output_folder: str, analysis_results: Dict[str, pd.DataFrame]) -> None:
+        pass
@@ -12,13 +12,16 @@ Driver log path
       Falls back to ``ts`` when the log predates that field.
 
 Result CSV path
-    Reads the per-step ``output_pairs`` column written by ``AnalysisOnline``
-    / ``BenchmarkBuilder`` (format: ``[[processed_count, elapsed_ns], ...]``).
+    Reads the long ``output_latency`` table written by ``AnalysisOnline``
+    (one row per run and output index), or the per-step ``output_pairs``
+    column of the ``BenchmarkBuilder`` exports and older reports (format:
+    ``[[processed_count, elapsed_ns], ...]``).
     Valid runs, accumulative-timeout runs, and maximum-timeout runs are all
     merged onto one figure and colour-coded by status.  Accepts a single CSV,
-    a folder that contains any of the three report files, or a DataFrame.
-    x-axis: step index (0-based); real-time position is unavailable from the
-    CSV alone.
+    a folder that contains any of the report files, or a DataFrame.
+    x-axis: step index (0-based).  With ``telemetry`` the steps are placed at
+    their ``offset_ns`` column, the ``[Wall Offset]`` recorded for real-time
+    replays, on the same origin as the telemetry's ``offset_s``.
 
 API
 ---
@@ -39,23 +42,31 @@ API
     # stats only, no figure
     s = plot_latency_over_replay("run.log", render=False)
 
+    # container CPU / memory / throttling (written with --telemetry) under the latency
+    s = plot_latency_over_replay("run.log", out="lat.png", x_source="wall",
+                                 telemetry="online_telemetry/setting_TimelyMon.csv")
+
     # result CSV folder (merges all three status groups)
     s = plot_latency_from_csv("/path/to/report/", out="lat_csv.png")
 
     # single CSV
     s = plot_latency_from_csv("successful_runs.csv", out="lat_ok.png")
 
+    # telemetry of the run under its latency, on the wall-clock axis
+    s = plot_latency_from_csv("/path/to/report/", out="lat_csv.png",
+                              telemetry="online_telemetry/setting_TimelyMon.csv")
+
     # DataFrame produced by AnalysisOnline.run()
     results = AnalysisOnline().run(aggregator)
-    s = plot_latency_from_csv(results["successful_runs"], out="lat.png")
+    s = plot_latency_from_csv(results["output_latency"], out="lat.png")
 
 CLI
 ---
     python -m Infrastructure.Analysis.AutomatedAnalysis.OnlineLatencyPlotter \\
-        run.log [--x-source wall] [--y-log] [--out lat.png]
+        run.log [--x-source wall] [--y-log] [--telemetry samples.csv] [--out lat.png]
 
     python -m Infrastructure.Analysis.AutomatedAnalysis.OnlineLatencyPlotter \\
-        --csv /path/to/report/ [--y-log] [--out lat_csv.png]
+        --csv /path/to/report/ [--y-log] [--telemetry samples.csv] [--out lat_csv.png]
 """
 from __future__ import annotations
 
@@ -85,9 +96,12 @@ __all__ = [
     # parsing
     "parse_driver_log",
     "parse_result_csv",
+    "corrected_latency",
+    "parse_telemetry_csv",
     # plotting
     "plot_latency_over_replay",
     "plot_latency_from_csv",
+    "plot_pareto_frontier",
     # constants
     "TS_UNIT_SECONDS",
     "Y_UNIT_FROM_NS",
@@ -137,6 +151,9 @@ _CSV_FILES: List[Tuple[str, str]] = [
     ("timeout_accumulative_latency_details.csv", _STATUS_ATO),
     ("timeout_maximum_latency_details.csv",      _STATUS_MTO),
 ]
+# Long format written by AnalysisOnline, preferred over the files above
+_LONG_CSV = "output_latency.csv"
+_LONG_COLUMNS = {"run", "index", "latency_ns"}
 
 _TS_RE      = re.compile(r"ts\s*=\s*(\d+)")
 _ELAPSED_RE = re.compile(r"^\[Elapsed\]\s+(\d+)")
@@ -181,6 +198,8 @@ class RunSeries:
     steps:      int
     processed:  np.ndarray      # cumulative processed-event counts per step
     latency_ns: np.ndarray      # per-step elapsed latency (ns)
+    corrected_latency_ns: Optional[np.ndarray] = None   # vs. intended send time
+    offset_ns:  Optional[np.ndarray] = None   # [Wall Offset] per step, real-time runs only
 
 
 @dataclass
@@ -196,6 +215,7 @@ class LatencyReplaySummary:
     timed_out:       bool
     timeout_message: Optional[str]
     footers:         Dict[str, str]
+    corrected_p99_ms: Optional[float] = None
 
     def as_dict(self) -> Dict[str, object]:
         return {k: v for k, v in self.__dict__.items()}
@@ -280,6 +300,25 @@ def parse_driver_log(source: LogSource) -> ParsedReplay:
     )
 
 
+def corrected_latency(ts_offset: np.ndarray, wall_ns: np.ndarray, latency_ns: np.ndarray,
+                      ns_per_unit: float) -> np.ndarray:
+    """Per-step latency against the intended send time ``ts_offset`` of the
+    real-time schedule (coordinated-omission correction, as recorded by
+    ``OnlineRunSummary``).  The actual send instant is the ``[Wall Offset]``
+    where present, otherwise the later of the intended time and the end of
+    the previous step."""
+    intended = ts_offset * ns_per_unit
+    if wall_ns.size and not np.any(np.isnan(wall_ns)):
+        return np.maximum(0.0, wall_ns - intended) + latency_ns
+    out = np.empty_like(latency_ns)
+    free = 0.0
+    for i in range(latency_ns.size):
+        sent = wall_ns[i] if i < wall_ns.size and not np.isnan(wall_ns[i]) else max(intended[i], free)
+        free = sent + latency_ns[i]
+        out[i] = max(0.0, sent - intended[i]) + latency_ns[i]
+    return out
+
+
 # =========================================================================== #
 # Parsing — result CSV
 # =========================================================================== #
@@ -319,7 +358,8 @@ def _df_to_series(df: pd.DataFrame, status: str) -> List[RunSeries]:
 
 def _parse_output_pairs(raw) -> Tuple[np.ndarray, np.ndarray]:
     """Parse one ``output_pairs`` cell → (processed_counts, latency_ns)."""
-    if pd.isna(raw) or raw == "":
+    # lists from the aggregator, JSON strings from a CSV
+    if not isinstance(raw, (str, list)) or len(raw) == 0:
         return np.array([], dtype=np.float64), np.array([], dtype=np.float64)
     try:
         pairs = json.loads(raw) if isinstance(raw, str) else raw
@@ -352,6 +392,7 @@ def _df_to_series(df: pd.DataFrame, status: str) -> List[RunSeries]:
         # Only skip if the array is empty or contains strictly NaNs
         if lat_ns.size == 0 or np.all(np.isnan(lat_ns)):
             continue
+        _, corrected_ns = _parse_output_pairs(row.get("corrected_output_pairs", np.nan))
         out.append(RunSeries(
             name=str(row.get("Name", "")),
             setting=str(row.get("Setting", "")),
@@ -359,6 +400,35 @@ def _df_to_series(df: pd.DataFrame, status: str) -> List[RunSeries]:
             steps=int(lat_ns.size),
             processed=processed,
             latency_ns=lat_ns,
+            corrected_latency_ns=corrected_ns if corrected_ns.size else None,
+        ))
+    return out
+
+
+def _long_to_series(df: pd.DataFrame) -> List[RunSeries]:
+    """Convert the long ``output_latency`` table into one RunSeries per run."""
+    out = []
+    if df.empty:
+        return out
+    df = df.sort_values(["run", "index"])
+    has_corrected = "corrected_latency_ns" in df.columns
+    has_offset = "offset_ns" in df.columns
+    for run, grp in df.groupby("run", sort=False):
+        lat_ns = grp["latency_ns"].to_numpy(dtype=np.float64)
+        if lat_ns.size == 0 or np.all(np.isnan(lat_ns)):
+            continue
+        corrected_ns = grp["corrected_latency_ns"].to_numpy(dtype=np.float64) if has_corrected else None
+        offset_ns = grp["offset_ns"].to_numpy(dtype=np.float64) if has_offset else None
+        first = grp.iloc[0]
+        out.append(RunSeries(
+            name=str(first.get("Name", "")),
+            setting=str(first.get("Setting", "")),
+            status=str(first.get("Status", _STATUS_OK)),
+            steps=int(lat_ns.size),
+            processed=grp["processed"].to_numpy(dtype=np.float64) if "processed" in grp.columns else np.arange(lat_ns.size, dtype=np.float64),
+            latency_ns=lat_ns,
+            corrected_latency_ns=corrected_ns if corrected_ns is not None and not np.all(np.isnan(corrected_ns)) else None,
+            offset_ns=offset_ns if offset_ns is not None and not np.all(np.isnan(offset_ns)) else None,
         ))
     return out
 
@@ -369,13 +439,15 @@ def parse_result_csv(source: CsvSource) -> List[RunSeries]:
     Parameters
     ----------
     source:
-        * A **folder** – auto-discovers ``successful_runs.csv``,
+        * A **folder** – uses ``output_latency.csv`` if present, otherwise
+          auto-discovers ``successful_runs.csv``,
           ``timeout_accumulative_latency_details.csv``,
           ``timeout_maximum_latency_details.csv``.
         * A **single CSV path** – status inferred from the filename, defaulting
           to ``OK`` when unrecognised.
-        * A **DataFrame** – treated as a single status group; a ``Status``
-          column is used if present, otherwise assumed ``OK``.
+        * A **DataFrame** – the long ``output_latency`` table, or a single
+          status group; a ``Status`` column is used if present, otherwise
+          assumed ``OK``.
 
     Returns
     -------
@@ -384,6 +456,8 @@ def parse_result_csv(source: CsvSource) -> List[RunSeries]:
         are skipped).
     """
     if isinstance(source, pd.DataFrame):
+        if _LONG_COLUMNS.issubset(source.columns):
+            return _long_to_series(source)
         # Infer status from a Status column when present.
         status_col = source.get("Status") if "Status" in source.columns else None
         if status_col is not None:
@@ -395,6 +469,8 @@ def parse_result_csv(source: CsvSource) -> List[RunSeries]:
 
     path = os.fspath(source)
     if os.path.isdir(path):
+        if os.path.exists(os.path.join(path, _LONG_CSV)):
+            return _long_to_series(pd.read_csv(os.path.join(path, _LONG_CSV)))
         series = []
         for fname, status in _CSV_FILES:
             full = os.path.join(path, fname)
@@ -413,11 +489,48 @@ def parse_result_csv(source: CsvSource) -> List[RunSeries]:
             break
     df = pd.read_csv(path)
     print(f"DEBUG: Read CSV — {len(df)} rows before filtering")  # Add this
+    if _LONG_COLUMNS.issubset(df.columns):
+        return _long_to_series(df)
     series = _df_to_series(df, status)
     print(f"DEBUG: After _df_to_series — {len(series)} series")  # Add this
     return series
 
 
+def parse_telemetry_csv(source: Union[str, "os.PathLike[str]", pd.DataFrame]) -> pd.DataFrame:
+    """Container samples written by ``--telemetry``; ``offset_s`` counts from
+    the replay start, the origin of the driver's ``[Wall Offset]``."""
+    df = source.copy() if isinstance(source, pd.DataFrame) else pd.read_csv(os.fspath(source))
+    if "offset_s" not in df.columns:
+        raise ValueError("telemetry needs an offset_s column")
+    for col in df.columns:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df.dropna(subset=["offset_s"]).sort_values("offset_s")
+
+
+def _plot_telemetry(ax, telemetry: pd.DataFrame) -> None:
+    """CPU % (left) and resident memory (right) with throttled intervals shaded."""
+    x = telemetry["offset_s"].to_numpy()
+    handles = []
+    if "cpu_percent" in telemetry.columns:
+        handles += ax.plot(x, telemetry["cpu_percent"], color="tab:green", lw=1.2, label="CPU %")
+    ax.set_ylabel("CPU (%)", fontsize=12)
+    ax.set_ylim(bottom=0)
+    if "rss_bytes" in telemetry.columns:
+        mem_ax = ax.twinx()
+        handles += mem_ax.plot(x, telemetry["rss_bytes"] / 2**20, color="tab:purple", lw=1.2, label="RSS (MiB)")
+        mem_ax.set_ylabel("RSS (MiB)", fontsize=12)
+        mem_ax.set_ylim(bottom=0)
+    if "throttled_periods" in telemetry.columns:
+        throttled = np.diff(telemetry["throttled_periods"].fillna(0).to_numpy(), prepend=0) > 0
+        for i in np.flatnonzero(throttled[1:]) + 1:
+            ax.axvspan(x[i - 1], x[i], color="tab:red", alpha=0.15, lw=0)
+        if throttled[1:].any():
+            handles.append(plt.Rectangle((0, 0), 1, 1, color="tab:red", alpha=0.15, label="CPU throttled"))
+    ax.grid(True, alpha=0.3)
+    if handles:
+        ax.legend(handles=handles, loc="upper right", fontsize=10)
+
+
 # =========================================================================== #
 # Shared helpers
 # =========================================================================== #
@@ -465,8 +578,14 @@ def plot_latency_over_replay(
     render:          bool           = True,
     title:           Optional[str]  = None,
     label:           Optional[str]  = None,
+    corrected:       bool           = True,
+    telemetry:       Optional[Union[str, "os.PathLike[str]", pd.DataFrame]] = None,
 ) -> LatencyReplaySummary:
-    """Plot per-step latency from a driver log against real-time replay position."""
+    """Plot per-step latency from a driver log against real-time replay position.
+
+    With ``corrected`` the latency against each step's intended send time is
+    overlaid; only meaningful for real-time replays.  ``telemetry`` adds the
+    container's resource samples in a panel below, on the wall-clock axis."""
 
     if x_source not in ("ts", "wall"):
         raise ValueError(f"x_source must be 'ts' or 'wall', got {x_source!r}")
@@ -478,9 +597,12 @@ def plot_latency_over_replay(
     parsed = log if isinstance(log, ParsedReplay) else parse_driver_log(log)
 
     rel_ts, wall_ns, lat_ns = parsed.ts_offset, parsed.wall_ns, parsed.latency_ns
+    # computed over the full run, a stall during warm-up still delays later steps
+    cor_ns = corrected_latency(rel_ts, wall_ns, lat_ns, 1e9 * TS_UNIT_SECONDS[timestamp_units]) if corrected else None
     if drop_warmup:
         n = drop_warmup
         rel_ts, wall_ns, lat_ns = rel_ts[n:], wall_ns[n:], lat_ns[n:]
+        cor_ns = cor_ns[n:] if cor_ns is not None else None
         if lat_ns.size == 0:
             raise ValueError("drop_warmup removed all steps")
 
@@ -504,9 +626,11 @@ def plot_latency_over_replay(
 
     lat_ms = lat_ns / 1e6
     p50, p99, ymax = (float(np.percentile(lat_ms, q)) for q in (50, 99, 100))
+    cor_p99 = float(np.percentile(cor_ns / 1e6, 99)) if cor_ns is not None else None
 
     mask = ~np.isnan(x)
     x, y = x[mask], (lat_ns * yfac)[mask]
+    y_cor = (cor_ns * yfac)[mask] if cor_ns is not None else None
     span_s = float(x.max()) if x.size else 0.0
 
     out_path: Optional[str] = None
@@ -518,9 +642,19 @@ def plot_latency_over_replay(
             else "driver log"
         )
         xs, ys = _downsample(x, y, max_points)
-        fig, ax = plt.subplots(figsize=(12, 5))
+        if telemetry is not None:
+            fig, (ax, res_ax) = plt.subplots(2, 1, figsize=(12, 7), sharex=True,
+                                             gridspec_kw={"height_ratios": [3, 1]})
+            _plot_telemetry(res_ax, parse_telemetry_csv(telemetry))
+            res_ax.set_xlabel(x_label, fontsize=12)
+        else:
+            fig, ax = plt.subplots(figsize=(12, 5))
         ax.scatter(xs, ys, s=3, alpha=0.5, edgecolors="none", rasterized=True,
                    label="per-step latency")
+        if y_cor is not None:
+            xc, yc = _downsample(x, y_cor, max_points)
+            ax.scatter(xc, yc, s=3, alpha=0.35, edgecolors="none", rasterized=True,
+                       color="tab:orange", label="corrected (intended send time)")
         if y_log:
             ax.set_yscale("log")
         if threshold_ms is not None:
@@ -529,12 +663,14 @@ def plot_latency_over_replay(
         if timeout_x is not None:
             ax.axvline(timeout_x, color="black", ls=":", lw=1.5, label="timeout")
         ax.set_xlim(left=0)
-        ax.set_xlabel(x_label, fontsize=12)
+        if telemetry is None:
+            ax.set_xlabel(x_label, fontsize=12)
         ax.set_ylabel(f"Per-step latency ({y_unit})", fontsize=12)
         ax.set_title(title or (
             f"Per-step latency over replay — {src_name}\n"
             f"{lat_ns.size} steps, span {span_s:.1f}s, "
             f"p50 {p50:.3f}ms / p99 {p99:.3f}ms / max {ymax:.3f}ms"
+            + (f" / corrected p99 {cor_p99:.3f}ms" if cor_p99 is not None else "")
         ))
         ax.grid(True, which="both", alpha=0.3)
         ax.legend(loc="upper right", fontsize=16)
@@ -553,6 +689,7 @@ def plot_latency_over_replay(
         timed_out       = parsed.timed_out,
         timeout_message = parsed.timeout_message,
         footers         = dict(parsed.footers),
+        corrected_p99_ms = cor_p99,
     )
 
 
@@ -567,11 +704,21 @@ def plot_latency_from_csv(
         max_points: int = 400_000,
         render: bool = True,
         title: Optional[str] = None,
+        telemetry: Optional[Union[str, "os.PathLike[str]", pd.DataFrame]] = None,
 ) -> LatencyReplaySummary:
+    """Plot per-step latency of result CSV runs against the step index.
+
+    ``telemetry`` adds the container's resource samples in a panel below; the
+    steps are then placed at their ``[Wall Offset]`` (``offset_ns``), so only
+    runs that recorded it are drawn."""
     if y_unit not in Y_UNIT_FROM_NS:
         raise ValueError(f"y_unit must be one of {sorted(Y_UNIT_FROM_NS)}")
 
     all_series = parse_result_csv(source)
+    if telemetry is not None:
+        all_series = [s for s in all_series if s.offset_ns is not None]
+        if not all_series:
+            raise ValueError("telemetry needs runs with an offset_ns column, recorded for real-time replays")
 
     print(f"DEBUG: parse_result_csv returned {len(all_series)} series")
     for i, s in enumerate(all_series):
@@ -598,11 +745,18 @@ def plot_latency_from_csv(
     else:
         p50 = p99 = ymax = 0.0
 
+    cor_ms = [s.corrected_latency_ns[drop_warmup:] / 1e6 for s in all_series if s.corrected_latency_ns is not None]
+    cor_ms_arr = np.concatenate(cor_ms) if cor_ms else np.array([], dtype=np.float64)
+    cor_ms_arr = cor_ms_arr[~np.isnan(cor_ms_arr)]
+    cor_p99 = float(np.percentile(cor_ms_arr, 99)) if cor_ms_arr.size > 0 else None
+
     total_steps = sum(s.steps for s in all_series)
     span_steps = max(
         (s.latency_ns[drop_warmup:].size if drop_warmup < s.steps else 0)
         for s in all_series
     )
+    if telemetry is not None:
+        span_steps = max(float(np.nanmax(s.offset_ns)) * 1e-9 for s in all_series)
 
     timed_out = any(s.status in (_STATUS_ATO, _STATUS_MTO) for s in all_series)
 
@@ -611,7 +765,13 @@ def plot_latency_from_csv(
         if out is None:
             raise ValueError("out must be set when render=True")
 
-        fig, ax = plt.subplots(figsize=(12, 5))
+        if telemetry is not None:
+            fig, (ax, res_ax) = plt.subplots(2, 1, figsize=(12, 7), sharex=True,
+                                             gridspec_kw={"height_ratios": [3, 1]})
+            _plot_telemetry(res_ax, parse_telemetry_csv(telemetry))
+            res_ax.set_xlabel("Real-time replay position (s) — measured wall-clock", fontsize=20)
+        else:
+            fig, ax = plt.subplots(figsize=(12, 5))
         _legend_seen: set = set()
 
         _SERIES_COLORS = {
@@ -626,12 +786,15 @@ def plot_latency_from_csv(
             if lat.size == 0:
                 continue
 
-            # Original unfiltered coordinate scale
-            x = np.arange(lat.size, dtype=np.float64)
+            # Original unfiltered coordinate scale, wall-clock seconds next to telemetry
+            if telemetry is not None:
+                x = (run.offset_ns[drop_warmup:] if drop_warmup < run.steps else run.offset_ns) * 1e-9
+            else:
+                x = np.arange(lat.size, dtype=np.float64)
             y = lat * yfac
 
             # Mask out NaNs so that _downsample respects valid data, index stays correct
-            mask = ~np.isnan(y)
+            mask = ~np.isnan(y) & ~np.isnan(x)
             x_clean, y_clean = x[mask], y[mask]
 
             if y_clean.size == 0:
@@ -653,6 +816,12 @@ def plot_latency_from_csv(
             window_size = 100  # adjust based on data density
             rolling_avg = pd.Series(ys).rolling(window=window_size, center=True).mean()
             ax.plot(xs, rolling_avg, linewidth=1.5, color=color, label=label_str, alpha=0.8)
+            if run.corrected_latency_ns is not None and run.corrected_latency_ns.size == run.steps:
+                cor = run.corrected_latency_ns[drop_warmup:] if drop_warmup < run.steps else run.corrected_latency_ns
+                xc, yc = _downsample(x[mask], (cor * yfac)[mask], max_points)
+                ax.plot(xc, pd.Series(yc).rolling(window=window_size, center=True).mean(), linewidth=1.2,
+                        color=color, ls="--", alpha=0.8,
+                        label=f"{run.name} (corrected)" if label_str is not None else None)
 
             #ax.scatter(xs, ys, s=3, alpha=0.45, edgecolors="none", rasterized=True, color=color, label=label_str)
 
@@ -671,7 +840,8 @@ def plot_latency_from_csv(
                        label=f"threshold {threshold_ms:g} ms")
 
         ax.set_xlim(left=0)
-        ax.set_xlabel("Step index", fontsize=20)
+        if telemetry is None:
+            ax.set_xlabel("Step index", fontsize=20)
         ax.set_ylabel(f"Per-step latency ({y_unit})", fontsize=20)
 
         status_counts = {st: sum(1 for s in all_series if s.status == st)
@@ -701,10 +871,11 @@ def plot_latency_from_csv(
         p50_ms=p50,
         p99_ms=p99,
         max_ms=ymax,
-        x_source="step",
+        x_source="wall" if telemetry is not None else "step",
         timed_out=timed_out,
         timeout_message=None,
         footers={},
+        corrected_p99_ms=cor_p99,
     )
 
 
@@ -712,6 +883,47 @@ def plot_latency_from_csv(
 # Plot — result CSVs (merged valid + timeout)
 # =========================================================================== #
 
+# =========================================================================== #
+# Plot — throughput/latency frontier of a sweep
+# =========================================================================== #
+
+def plot_pareto_frontier(
+        frontier: pd.DataFrame,
+        out: Union[str, "os.PathLike[str]"] = "pareto_frontier.svg",
+        *,
+        y_unit: str = "ms",
+        y_log: bool = True,
+) -> str:
+    """Scatter of every sweep point (achieved events/s vs. p99 latency) per tool,
+    with each tool's frontier drawn as a step line and annotated with batch sizes.
+    Expects the ``pareto_frontier`` frame of ``AnalysisOnline``."""
+    if y_unit not in Y_UNIT_FROM_NS:
+        raise ValueError(f"y_unit must be one of {sorted(Y_UNIT_FROM_NS)}")
+    yfac = Y_UNIT_FROM_NS[y_unit]
+
+    fig, ax = plt.subplots(figsize=(8, 5))
+    colors = plt.rcParams["axes.prop_cycle"].by_key()["color"]
+    for i, (name, group) in enumerate(frontier.dropna(subset=["throughput", "p99"]).groupby("Name")):
+        color = colors[i % len(colors)]
+        ax.scatter(group["throughput"], group["p99"] * yfac, s=14, alpha=0.4, color=color)
+        best = group[group["pareto"].astype(bool)].sort_values("throughput")
+        ax.step(best["throughput"], best["p99"] * yfac, where="post", color=color, linewidth=1.5, label=name)
+        for _, row in best.iterrows():
+            ax.annotate(f"b{int(row['batch_size'])}", (row["throughput"], row["p99"] * yfac),
+                        textcoords="offset points", xytext=(3, 3), fontsize=8, color=color)
+
+    if y_log:
+        ax.set_yscale("log")
+    ax.set_xlabel("Throughput (events/s)")
+    ax.set_ylabel(f"p99 latency ({y_unit})")
+    ax.grid(True, which="both", alpha=0.3)
+    ax.legend(loc="upper left")
+    fig.tight_layout()
+    out_path = os.fspath(out)
+    _save_fig(fig, out_path)
+    return out_path
+
+
 # =========================================================================== #
 # CLI
 # =========================================================================== #
@@ -738,6 +950,12 @@ def main(argv: Optional[List[str]] = None) -> int:
     ap.add_argument("--threshold-ms", type=float, default=None)
     ap.add_argument("--drop-warmup", type=int, default=0)
     ap.add_argument("--max-points", type=int, default=400_000)
+    ap.add_argument("--no-corrected", action="store_true",
+                    help="(driver-log only) hide the coordinated-omission-corrected latency")
+    ap.add_argument("--telemetry", metavar="CSV", default=None,
+                    help="container samples written with --telemetry, drawn below the latency; "
+                         "best with --x-source wall in driver-log mode, CSV mode places the steps "
+                         "at their offset_ns")
     ap.add_argument("--out", default=None,
                     help="output image path (default: latency_over_replay.png "
                          "or latency_from_csv.png)")
@@ -749,7 +967,7 @@ def main(argv: Optional[List[str]] = None) -> int:
             summary = plot_latency_from_csv(
                 args.csv, out=out, y_unit=args.y_unit, y_log=args.y_log,
                 threshold_ms=args.threshold_ms, drop_warmup=args.drop_warmup,
-                max_points=args.max_points,
+                max_points=args.max_points, telemetry=args.telemetry,
             )
         else:
             out = args.out or "latency_over_replay.png"
@@ -758,6 +976,7 @@ def main(argv: Optional[List[str]] = None) -> int:
                 timestamp_units=args.timestamp_units, y_unit=args.y_unit,
                 y_log=args.y_log, threshold_ms=args.threshold_ms,
                 drop_warmup=args.drop_warmup, max_points=args.max_points,
+                corrected=not args.no_corrected, telemetry=args.telemetry,
             )
     except (ValueError, OSError) as exc:
         print(f"[ERROR] {exc}", file=sys.stderr)
@@ -768,6 +987,8 @@ def main(argv: Optional[List[str]] = None) -> int:
     print(f"latency p50    : {summary.p50_ms:.3f} ms")
     print(f"latency p99    : {summary.p99_ms:.3f} ms")
     print(f"latency max    : {summary.max_ms:.3f} ms")
+    if summary.corrected_p99_ms is not None:
+        print(f"corrected p99  : {summary.corrected_p99_ms:.3f} ms")
     if summary.footers:
         for key, val in summary.footers.items():
             print(f"  {key}: {val}")
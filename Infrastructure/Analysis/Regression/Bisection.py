@@ -0,0 +1,102 @@
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from Infrastructure.Analysis.Regression.ResultHistory import ALPHA, MIN_EFFECT, compare_samples
+from Infrastructure.Analysis.Regression.Statistics import min_p_value
+
+BISECT_REPEATS = 6
+BISECT_COLUMNS = ["commit", "position", "verdict", "regressions", "comparisons"]
+
+
+@dataclass
+class BisectionResult:
+    commits: List[str]
+    first_bad: Optional[str]
+    verdicts: Dict[str, str] = field(default_factory=dict)  # commit -> good, bad or baseline
+    comparisons: Dict[str, pd.DataFrame] = field(default_factory=dict)
+
+    def summary(self) -> pd.DataFrame:
+        rows = []
+        for (position, commit) in enumerate(self.commits):
+            if commit not in self.verdicts:
+                continue
+            comparison = self.comparisons.get(commit)
+            rows.append({
+                "commit": commit, "position": position, "verdict": self.verdicts[commit],
+                "regressions": 0 if comparison is None else int((comparison["verdict"] == "regression").sum()),
+                "comparisons": 0 if comparison is None else len(comparison)
+            })
+        return pd.DataFrame(rows, columns=BISECT_COLUMNS)
+
+
+def check_repeats(repeats: int, alpha: float = ALPHA):
+    if min_p_value(repeats, repeats) > alpha:
+        raise ValueError(
+            f"{repeats} repeats per commit cannot reach p < {alpha}, use at least 4 (p = {min_p_value(4, 4):.3f})"
+        )
+
+
+class Bisection:
+    # Binary search for the first commit between a good and a bad one whose measurements regress against the
+    # good commit. probe(commit) builds and runs the commit and returns its history samples. Only the (setting,
+    # metric) pairs that regress at the bad commit decide whether an intermediate commit is bad, every commit is
+    # probed at most once.
+    def __init__(self, commits: List[str], probe: Callable[[str], pd.DataFrame],
+                 alpha: float = ALPHA, min_effect: float = MIN_EFFECT):
+        if len(commits) < 2:
+            raise ValueError("Bisection needs a good and a bad commit")
+        self.commits = commits
+        self.probe = probe
+        self.alpha = alpha
+        self.min_effect = min_effect
+        self.samples: Dict[str, pd.DataFrame] = dict()
+        self.targets: Set[Tuple[str, str, str]] = set()
+
+    def _samples(self, commit: str) -> pd.DataFrame:
+        if commit not in self.samples:
+            print(f"\n-> Probing commit {commit} ({self.commits.index(commit)}/{len(self.commits) - 1})")
+            self.samples[commit] = self.probe(commit)
+        return self.samples[commit]
+
+    def _compare(self, commit: str) -> pd.DataFrame:
+        return compare_samples(self._samples(self.commits[0]), self._samples(commit), self.alpha, self.min_effect)
+
+    def _regresses(self, comparison: pd.DataFrame) -> bool:
+        keys = zip(comparison["tool"], comparison["setting"], comparison["metric"])
+        return any(k in self.targets and v == "regression" for (k, v) in zip(keys, comparison["verdict"]))
+
+    def run(self) -> BisectionResult:
+        good, bad = self.commits[0], self.commits[-1]
+        result = BisectionResult(commits=self.commits, first_bad=None)
+        if self._samples(good).empty:
+            raise ValueError(f"The good commit {good} has no successful runs to compare against")
+        result.verdicts[good] = "baseline"
+
+        comparison = self._compare(bad)
+        result.comparisons[bad] = comparison
+        regressed = comparison[comparison["verdict"] == "regression"]
+        if regressed.empty:
+            if not comparison.empty and (comparison["verdict"] == "insufficient").all():
+                raise ValueError("Too few successful runs per commit for a significant result, raise the repeats")
+            result.verdicts[bad] = "good"
+            return result
+        self.targets = set(zip(regressed["tool"], regressed["setting"], regressed["metric"]))
+        result.verdicts[bad] = "bad"
+
+        # invariant: commits[low] is good, commits[high] is bad
+        (low, high) = (0, len(self.commits) - 1)
+        while high - low > 1:
+            middle = (low + high) // 2
+            commit = self.commits[middle]
+            comparison = self._compare(commit)
+            result.comparisons[commit] = comparison
+            if self._regresses(comparison):
+                result.verdicts[commit] = "bad"
+                high = middle
+            else:
+                result.verdicts[commit] = "good"
+                low = middle
+        result.first_bad = self.commits[high]
+        return result
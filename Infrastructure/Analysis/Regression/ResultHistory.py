@@ -0,0 +1,155 @@
+import os
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from Infrastructure.Analysis.Aggregators.AbstractAggregator import AbstractAggregator
+from Infrastructure.Analysis.Aggregators.ResultAggregatorOnline import ResultAggregatorOnline
+from Infrastructure.Analysis.Regression.Statistics import mann_whitney_u, min_p_value
+from Infrastructure.DataTypes.Types.LatencyHistogram import LatencyHistogram
+
+HISTORY_FILE = "history.db"
+REGRESSION_EXIT_CODE = 3
+ALPHA = 0.05
+# Cliff's delta from which a difference counts, 0.33 is the usual bound of a medium effect
+MIN_EFFECT = 0.33
+OFFLINE_METRICS = ["runtime", "wall_time", "max_mem"]
+ONLINE_METRICS = ["total_elapsed", "latency_p50", "latency_p99"]
+SAMPLE_COLUMNS = ["tool", "image_id", "setting", "repeat", "metric", "value"]
+COMPARISON_COLUMNS = [
+    "tool", "setting", "metric", "baseline_runs", "current_runs", "baseline_median", "current_median", "change",
+    "p_value", "cliffs_delta", "verdict"
+]
+
+
+def history_samples(aggregator: AbstractAggregator, image_ids: Dict[str, Optional[str]]) -> pd.DataFrame:
+    # One row per (run, metric) of the successful runs. Every metric is lower-is-better. Repeats of a setting
+    # share its id up to the trailing repeat index.
+    valid = aggregator.get_valid()
+    if valid.empty:
+        return pd.DataFrame(columns=SAMPLE_COLUMNS)
+    runs = pd.DataFrame({"tool": valid["Name"].astype(str)})
+    runs["image_id"] = runs["tool"].map(image_ids)
+    setting = valid["Setting"].astype(str)
+    runs["setting"] = setting.str.replace(r"_\d+$", "", regex=True)
+    runs["repeat"] = pd.to_numeric(setting.str.extract(r"_(\d+)$")[0], errors="coerce").fillna(0).astype(int)
+    if isinstance(aggregator, ResultAggregatorOnline):
+        metrics = ONLINE_METRICS
+        runs["total_elapsed"] = pd.to_numeric(valid["total_elapsed"], errors="coerce")
+        histograms = valid["latency_histogram"].map(
+            lambda encoded: LatencyHistogram.decode(encoded) if isinstance(encoded, str) else None
+        )
+        for (metric, q) in (("latency_p50", 50), ("latency_p99", 99)):
+            runs[metric] = histograms.map(lambda h: h.percentile(q) if h is not None else None).astype(float)
+    else:
+        metrics = OFFLINE_METRICS
+        for metric in metrics:
+            runs[metric] = pd.to_numeric(valid[metric], errors="coerce")
+    samples = runs.melt(id_vars=["tool", "image_id", "setting", "repeat"], value_vars=metrics, var_name="metric")
+    return samples.dropna(subset=["value"])[SAMPLE_COLUMNS].reset_index(drop=True)
+
+
+def compare_samples(
+        baseline: pd.DataFrame, current: pd.DataFrame, alpha: float = ALPHA, min_effect: float = MIN_EFFECT
+) -> pd.DataFrame:
+    # Mann-Whitney U test per (tool, setting, metric) of the current runs against the baseline runs. A
+    # significant difference with at least min_effect is a regression if the current runs are larger.
+    rows = []
+    current_groups = current.groupby(["tool", "setting", "metric"])
+    baseline_groups = dict(list(baseline.groupby(["tool", "setting", "metric"])))
+    for ((tool, setting, metric), group) in current_groups:
+        base = baseline_groups.get((tool, setting, metric))
+        if base is None:
+            continue
+        x, y = group["value"].tolist(), base["value"].tolist()
+        result = mann_whitney_u(x, y)
+        if min_p_value(len(x), len(y)) > alpha:
+            verdict = "insufficient"
+        elif result.p_value < alpha and result.cliffs_delta >= min_effect:
+            verdict = "regression"
+        elif result.p_value < alpha and result.cliffs_delta <= -min_effect:
+            verdict = "improvement"
+        else:
+            verdict = "unchanged"
+        baseline_median = base["value"].median()
+        rows.append({
+            "tool": tool, "setting": setting, "metric": metric, "baseline_runs": len(y), "current_runs": len(x),
+            "baseline_median": baseline_median, "current_median": group["value"].median(),
+            "change": group["value"].median() / baseline_median - 1 if baseline_median else None,
+            "p_value": result.p_value, "cliffs_delta": result.cliffs_delta, "verdict": verdict
+        })
+    return pd.DataFrame(rows, columns=COMPARISON_COLUMNS)
+
+
+class ResultHistory:
+    # Local SQLite database of the measurements of every experiment run (a session), keyed by experiment,
+    # tool, image id and setting. A baseline is the session of an experiment a tool is compared against.
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session INTEGER PRIMARY KEY AUTOINCREMENT, experiment TEXT, recorded_at TEXT
+            );
+            CREATE TABLE IF NOT EXISTS measurements (
+                session INTEGER, tool TEXT, image_id TEXT, setting TEXT, repeat INTEGER, metric TEXT, value REAL
+            );
+            CREATE INDEX IF NOT EXISTS measurements_key ON measurements (session, tool);
+            CREATE TABLE IF NOT EXISTS baselines (
+                experiment TEXT, tool TEXT, session INTEGER, PRIMARY KEY (experiment, tool)
+            );
+        """)
+
+    def record(self, experiment: str, samples: pd.DataFrame) -> int:
+        cursor = self.connection.execute(
+            "INSERT INTO sessions (experiment, recorded_at) VALUES (?, ?)",
+            (experiment, datetime.now().isoformat(timespec="seconds"))
+        )
+        session = cursor.lastrowid
+        self.connection.executemany(
+            "INSERT INTO measurements VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(session, *row) for row in samples[SAMPLE_COLUMNS].itertuples(index=False, name=None)]
+        )
+        self.connection.commit()
+        return session
+
+    def set_baseline(self, experiment: str, tools: List[str], session: int):
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO baselines VALUES (?, ?, ?)", [(experiment, tool, session) for tool in tools]
+        )
+        self.connection.commit()
+
+    def baseline(self, experiment: str, tool: str) -> Optional[int]:
+        row = self.connection.execute(
+            "SELECT session FROM baselines WHERE experiment = ? AND tool = ?", (experiment, tool)
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def samples(self, session: int, tool: Optional[str] = None) -> pd.DataFrame:
+        query = f"SELECT {', '.join(SAMPLE_COLUMNS)} FROM measurements WHERE session = ?"
+        parameters = [session]
+        if tool is not None:
+            query += " AND tool = ?"
+            parameters.append(tool)
+        return pd.read_sql_query(query, self.connection, params=parameters)
+
+    def compare_to_baseline(self, experiment: str, current: pd.DataFrame) -> Optional[pd.DataFrame]:
+        # None if no tool of the current run has a baseline for the experiment
+        frames = []
+        for tool in sorted(current["tool"].unique()):
+            session = self.baseline(experiment, tool)
+            if session is None:
+                print(f"No baseline stored for {tool} in {experiment}, set one with --set-baseline")
+                continue
+            frames.append(compare_samples(self.samples(session, tool), current[current["tool"] == tool]))
+        if not frames:
+            return None
+        return pd.concat(frames, ignore_index=True)
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
@@ -0,0 +1,86 @@
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+# samples up to this combined size use the exact distribution of U when there are no ties
+EXACT_LIMIT = 40
+
+
+@dataclass
+class MannWhitneyResult:
+    u: float  # pairs where the first sample is larger, ties count half
+    p_value: float  # two-sided
+    cliffs_delta: float  # P(x > y) - P(x < y), positive if the first sample tends to be larger
+    exact: bool
+
+
+def _ranks(values: Sequence[float]) -> List[float]:
+    # ranks starting at 1, tied values share their average rank
+    order = sorted(range(len(values)), key=lambda i: values[i])
+    ranks = [0.0] * len(values)
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and values[order[j + 1]] == values[order[i]]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[order[k]] = (i + j) / 2 + 1
+        i = j + 1
+    return ranks
+
+
+def _u_distribution(m: int, n: int) -> List[int]:
+    # number of orderings of m x-values and n y-values with U = u, built up one value at a time:
+    # f(u; i, j) = f(u - j; i - 1, j) + f(u; i, j - 1)
+    table: Dict[tuple, List[int]] = dict()
+    for i in range(m + 1):
+        for j in range(n + 1):
+            if i == 0 or j == 0:
+                table[(i, j)] = [1]
+                continue
+            counts = [0] * (i * j + 1)
+            for (u, c) in enumerate(table[(i - 1, j)]):
+                counts[u + j] += c
+            for (u, c) in enumerate(table[(i, j - 1)]):
+                counts[u] += c
+            table[(i, j)] = counts
+    return table[(m, n)]
+
+
+def min_p_value(m: int, n: int) -> float:
+    # smallest two-sided p-value samples of these sizes can reach, e.g. 0.1 for three repeats against three
+    if m == 0 or n == 0:
+        return 1.0
+    return min(1.0, 2 / math.comb(m + n, m))
+
+
+def mann_whitney_u(x: Sequence[float], y: Sequence[float]) -> MannWhitneyResult:
+    # Two-sided Mann-Whitney U test of x against y. Exact for small samples without ties, otherwise the normal
+    # approximation with tie and continuity correction.
+    m, n = len(x), len(y)
+    if m == 0 or n == 0:
+        raise ValueError(f"Mann-Whitney U needs two non-empty samples, got {m} and {n} values")
+    combined = list(x) + list(y)
+    ranks = _ranks(combined)
+    u = sum(ranks[:m]) - m * (m + 1) / 2
+    delta = 2 * u / (m * n) - 1
+    ties = len(set(combined)) < len(combined)
+
+    if not ties and m + n <= EXACT_LIMIT:
+        counts = _u_distribution(m, n)
+        total = sum(counts)
+        k = int(round(u))
+        lower = sum(counts[:k + 1]) / total
+        upper = sum(counts[k:]) / total
+        return MannWhitneyResult(u, min(1.0, 2 * min(lower, upper)), delta, True)
+
+    total = m + n
+    tie_term = 0
+    for value in set(combined):
+        t = combined.count(value)
+        tie_term += t ** 3 - t
+    variance = m * n / 12 * ((total + 1) - tie_term / (total * (total - 1)))
+    if variance <= 0:
+        return MannWhitneyResult(u, 1.0, delta, False)
+    z = (abs(u - m * n / 2) - 0.5) / math.sqrt(variance)
+    return MannWhitneyResult(u, min(1.0, math.erfc(max(z, 0.0) / math.sqrt(2))), delta, False)
@@ -1,21 +1,30 @@
+import copy
 import json
 import os.path
 from enum import Enum
 from typing import AnyStr, List, Optional
 
 from Infrastructure.Analysis.Aggregators.AbstractAggregator import dispatch_aggregator, AbstractAggregator
+from Infrastructure.Analysis.Aggregators.ColumnarStore import ResultStore
 from Infrastructure.Analysis.Aggregators.ResultAggregatorOffline import ResultAggregatorOffline
-from Infrastructure.Analysis.Aggregators.ResultAggregatorOnline import ResultAggregatorOnline
+from Infrastructure.Analysis.Aggregators.ResultAggregatorOnline import ResultAggregatorOnline, Status as OnlineStatus
 from Infrastructure.AutoConversion.InputOutputPolicyFormats import InputOutputPolicyFormats
 from Infrastructure.AutoConversion.InputOutputTraceFormats import InputOutputTraceFormats
 from Infrastructure.BenchmarkBuilder.BenchmarkBuilderException import BenchmarkCreationFailed
 from Infrastructure.BenchmarkBuilder.Coordinator.Coordinator import Coordinator
+from Infrastructure.BenchmarkBuilder.RateProfiles import apply_rate_profile, PhaseTracker
+from Infrastructure.BenchmarkBuilder.ThroughputSearch import search_throughput, real_time_contract, trace_rate, \
+    probe_data_file, supports_rate_scaling, UNITS_PER_SECOND
+from Infrastructure.Builders.OnlineDriverProtocol import OnlineRunSummary
 from Infrastructure.DataTypes.Contracts.OnlineExperimentContract import OnlineExperimentContractGeneral
 from Infrastructure.DataTypes.Types.custome_type import OnlineOffline
 from Infrastructure.Frontend.CLI.cli_args import CLIArgs
 from Infrastructure.DataTypes.FileRepresenters.FingerPrintHandler import FingerPrintHandler
 from Infrastructure.DataTypes.FileRepresenters.ScratchFolderHandler import ScratchFolderHandler
 from Infrastructure.DataTypes.FileRepresenters.StatsHandler import StatsHandler
+from Infrastructure.DataTypes.Verification.Differential import DifferentialVerifier, DeferredRun
+from Infrastructure.DataTypes.Verification.OutputDigest import VerificationCache, VerificationStatus
+from Infrastructure.DataTypes.Verification.SampledVerification import sampled_verify
 
 from Infrastructure.Monitors.BaseMonitorTemplate import run_monitor_offline, run_monitor_online
 from Infrastructure.Monitors.MonitorExceptions import TimedOut, ToolException, ResultErrorException
@@ -32,14 +41,19 @@ class RunToolResult(Enum):
 
 
 class BenchmarkBuilder:
-    def __init__(self, experiment_name, coordinator: Coordinator, tools_to_build, repeat_runs, cli_args: CLIArgs):
+    def __init__(
+            self, experiment_name, coordinator: Coordinator, tools_to_build, repeat_runs, cli_args: CLIArgs,
+            result_store: Optional[ResultStore] = None
+    ):
         print_headline("(Starting) Init Benchmark")
         self.coordinator = coordinator
+        self.result_store = result_store
 
         self.experiment_name = experiment_name
         self.cli_args = cli_args
         self.repeat_runs = repeat_runs
         self.tools_to_build = tools_to_build
+        self.coordinator.defer_oracle = cli_args.differential
 
         path_to_project = self.coordinator.get_path(PATH_TO_PROJECT)
         path_to_infrastructure = path_to_project + "/Infrastructure"
@@ -77,14 +91,45 @@ class BenchmarkBuilder:
         print("\n" + "-" * LENGTH)
         normal_line("Run Experiments")
         print("-" * LENGTH)
-        result_aggregator = dispatch_aggregator(self.coordinator.get_runtime_settings())
+        result_aggregator = dispatch_aggregator(self.coordinator.get_runtime_settings(), self.result_store)
+        try:
+            self._run_settings(tools, result_aggregator)
+        finally:
+            result_aggregator.close()
+        return result_aggregator
 
+    def _run_settings(self, tools: List[GetMonitorsReturnType], result_aggregator: AbstractAggregator):
         path_to_debug = self.coordinator.get_path(PATH_TO_DEBUG)
         if os.path.exists(path_to_debug):
             ScratchFolderHandler(path_to_debug).remove_folder()
 
         for ((identifier, data_set_size), path_to_folder, data_file, data_type, policy_file, policy_type, signature, result) in self.coordinator.iterate_settings():
             sfh = ScratchFolderHandler(path_to_folder)
+            verification_cache = VerificationCache()
+            differential = DifferentialVerifier() if self.cli_args.differential else None
+
+            searching = self.cli_args.throughput_search or self.cli_args.pareto_sweep
+            if searching and self.coordinator.get_runtime_settings() == OnlineOffline.Online:
+                # searches and sweeps repeat their runs themselves, repeat_runs does not apply
+                run_search = search_tool_online if self.cli_args.throughput_search else sweep_tool_online
+                setting_id = identifier if data_set_size is None else f"{identifier}_{data_set_size}"
+                for tool in tools:
+                    if isinstance(tool, InvalidReturnType):
+                        print_headline(f"Missing {tool.name}")
+                        result_aggregator.add_missing(tool.name, setting_id)
+                        print_footline()
+                    elif isinstance(tool, ValidReturnType):
+                        run_search(
+                            result_aggregator=result_aggregator, path_to_folder=path_to_folder, tool=tool.tool,
+                            setting_id=setting_id, data_file=data_file, signature_file=signature,
+                            policy_file=policy_file, cli_args=self.cli_args, coordinator=self.coordinator,
+                            policy_type=policy_type, data_type=data_type,
+                            online_experiment_contract=self.coordinator.get_online_settings()
+                        )
+                    else:
+                        raise NotImplemented(f"Not implemented for object {tool}")
+                sfh.remove_folder()
+                continue
 
             for i in range(0, self.repeat_runs):
                 tmp_setting_id = f"{identifier}_{i}" if data_set_size is None else f"{identifier}_{data_set_size}_{i}"
@@ -109,7 +154,7 @@ class BenchmarkBuilder:
                         if self.coordinator.get_runtime_settings() == OnlineOffline.Online:
                             run_tools_online(
                                 result_aggregator=result_aggregator, path_to_folder=path_to_folder, tool=tool.tool,
-                                _result_file=result, setting_id=tmp_setting_id, data_file=data_file,
+                                result_file=result, setting_id=tmp_setting_id, data_file=data_file,
                                 signature_file=signature, policy_file=policy_file, sfh=sfh, cli_args=self.cli_args,
                                 coordinator=self.coordinator, policy_type=policy_type, data_type=data_type,
                                 online_experiment_contract=self.coordinator.get_online_settings()
@@ -119,13 +164,20 @@ class BenchmarkBuilder:
                                 result_aggregator=result_aggregator, path_to_folder=path_to_folder, tool=tool.tool,
                                 result_file=result, setting_id=tmp_setting_id, data_file=data_file, signature_file=signature,
                                 policy_file=policy_file, sfh=sfh, cli_args=self.cli_args,
-                                coordinator=self.coordinator, policy_type=policy_type, data_type=data_type
+                                coordinator=self.coordinator, policy_type=policy_type, data_type=data_type,
+                                verification_cache=verification_cache, differential=differential
                             )
                     else:
                         raise NotImplemented(f"Not implemented for object {tool}")
 
+                if differential is not None:
+                    resolve_differential(
+                        result_aggregator=result_aggregator, differential=differential, path_to_folder=path_to_folder,
+                        data_file=data_file, signature_file=signature, policy_file=policy_file, result_file=result,
+                        coordinator=self.coordinator, policy_type=policy_type, data_type=data_type
+                    )
+
             sfh.remove_folder()
-        return result_aggregator
 
     def seed_retriever(self):
         operator_prefix = "operators_"
@@ -167,33 +219,85 @@ class BenchmarkBuilder:
 def run_tools_online(
         result_aggregator: ResultAggregatorOnline, tool, setting_id: str, path_to_folder: str,
         data_file: str, data_type: InputOutputTraceFormats, policy_file: str, policy_type: InputOutputPolicyFormats,
-        signature_file: str, _result_file: str, cli_args: CLIArgs, coordinator: Coordinator,
+        signature_file: str, result_file: str, cli_args: CLIArgs, coordinator: Coordinator,
         online_experiment_contract: OnlineExperimentContractGeneral, sfh=None
 ):
     debug_path = coordinator.get_path(PATH_TO_DEBUG)
+    raw_records_path = None
+    if cli_args.online_records:
+        raw_records_path = f"{coordinator.get_path(PATH_TO_NAMED_EXPERIMENT)}/online_records/{setting_id}_{tool.name}.jsonl"
+    telemetry_path = telemetry_file(cli_args, coordinator, f"{setting_id}_{tool.name}")
+    profile = online_experiment_contract.rate_profile
+    profiled_file, tracker = None, None
     try:
+        if profile is not None and supports_rate_scaling(data_type):
+            # the driver paces the rewritten timestamps, so the profile needs a real-time replay
+            online_experiment_contract = real_time_contract(online_experiment_contract)
+            profiled_file = f"profiled_{data_file}"
+            first_ts = apply_rate_profile(
+                os.path.join(path_to_folder, data_file), os.path.join(path_to_folder, profiled_file), data_type, profile
+            )
+            if first_ts is not None:
+                tracker = PhaseTracker(profile, first_ts, UNITS_PER_SECOND[online_experiment_contract.timestamp_units])
+        elif profile is not None:
+            print(f"Rate profile ignored, {data_type} traces cannot be rewritten")
+
+        # the oracle's verdicts hold for the original timestamps only
+        oracle = None
+        if cli_args.stream_verify and profiled_file is None:
+            if coordinator.ensure_oracle_result(
+                    path_to_folder, data_file, data_type, policy_file, policy_type, signature_file, result_file
+            ):
+                oracle = coordinator.get_oracle()
+        elif cli_args.stream_verify:
+            print("The rate profile rewrites the trace's timestamps, the oracle's verdicts do not apply")
+
         preprocessing_elapsed, build_comp_elapsed, total_elapsed_s, total_count, output, code = run_monitor_online(
-            mon=tool, path_to_folder=path_to_folder, data_file=data_file, signature_file=signature_file,
+            mon=tool, path_to_folder=path_to_folder, data_file=profiled_file or data_file, signature_file=signature_file,
             policy_file=policy_file, cli_args=cli_args, trace_source_format=data_type, policy_source_format=policy_type,
             path_manager=coordinator.get_path_manager(), online_experiment_contract=online_experiment_contract,
-            script_name=(coordinator.script_name if hasattr(coordinator, "script_name") and coordinator.script_name is not None else None)
+            script_name=(coordinator.script_name if hasattr(coordinator, "script_name") and coordinator.script_name is not None else None),
+            raw_records_path=raw_records_path, on_block=tracker, oracle=oracle, result_file=result_file,
+            telemetry_path=telemetry_path, data_files=coordinator.online_data_files()
         )
 
-        processed_elapsed_pairs = []
-        if isinstance(output, list):
-            for block in output:
-                if isinstance(block, dict):
-                    processed = block.get("processed")
-                    elapsed_ns = block.get("elapsed_ns")
-                    if processed is not None and elapsed_ns is not None:
-                        processed_elapsed_pairs.append([processed, elapsed_ns])
-
-        output_pairs_json = json.dumps(processed_elapsed_pairs)
+        if tracker is not None:
+            for phase in tracker.phases():
+                result_aggregator.add_phase(
+                    tool.name, setting_id, phase["phase"], phase["kind"], phase["start_s"], phase["end_s"],
+                    phase["blocks"], phase["p50"], phase["p99"], phase["max"], phase["recovery_s"],
+                    phase["latency_histogram"]
+                )
+
+        # at most SERIES_CAPACITY pairs, evenly thinned out for long runs
+        output_pairs = output.output_pairs() if isinstance(output, OnlineRunSummary) else []
+        latency_histogram = output.latency.encode() if isinstance(output, OnlineRunSummary) else None
+        # against the intended send times, only for real-time replays
+        corrected_pairs, corrected_histogram = None, None
+        if isinstance(output, OnlineRunSummary) and output.correction is not None:
+            corrected_pairs = output.corrected_output_pairs()
+            corrected_histogram = output.corrected_latency.encode()
+        # send offsets of the same steps, to line the latency up with the --telemetry samples
+        wall_pairs = output.wall_output_pairs() if isinstance(output, OnlineRunSummary) else None
+        verified = output.verified if isinstance(output, OnlineRunSummary) else None
+        verification = None
+        if isinstance(output, OnlineRunSummary) and output.verification_status is not None:
+            verification = output.verification_status.value
+
+        steady = output.steady_state.result() if isinstance(output, OnlineRunSummary) else None
+        if steady is not None:
+            status = OnlineStatus.OK if code == 0 else (OnlineStatus.ATO if code == 200 else OnlineStatus.MTO)
+            print(f"Warm-up of {tool.name}: {steady.warmup_blocks} steps, {steady.warmup_s:.3f}s")
+            result_aggregator.add_steady_state(
+                status, tool.name, setting_id, steady.warmup_s, steady.warmup_blocks, steady.warmup_events,
+                steady.steady_blocks, steady.histogram.mean(), steady.histogram.percentile(50),
+                steady.histogram.percentile(99), steady.steady_throughput, steady.histogram.encode()
+            )
 
         if code == 0:
             result_aggregator.add_valid(
                 tool.name, setting_id, preprocessing_elapsed, build_comp_elapsed, total_elapsed_s, total_count,
-                output_pairs_json
+                output_pairs, latency_histogram, corrected_pairs, corrected_histogram, verified, verification, wall_pairs
             )
             return RunToolResult.OK
         elif code == 200:
@@ -201,7 +305,7 @@ def run_tools_online(
                 sfh.copy_to_debug(debug_path, setting_id, tool.name)
             result_aggregator.add_timeout_accumulative_latency(
                 tool.name, setting_id, preprocessing_elapsed, build_comp_elapsed, total_elapsed_s, total_count,
-                output_pairs_json
+                output_pairs, latency_histogram, corrected_pairs, corrected_histogram, verified, verification, wall_pairs
             )
             return RunToolResult.TIMEOUT
         else:  # code == 250:
@@ -209,7 +313,7 @@ def run_tools_online(
                 sfh.copy_to_debug(debug_path, setting_id, tool.name)
             result_aggregator.add_timeout_maximum_latency(
                 tool.name, setting_id, preprocessing_elapsed, build_comp_elapsed, total_elapsed_s, total_count,
-                output_pairs_json
+                output_pairs, latency_histogram, corrected_pairs, corrected_histogram, verified, verification, wall_pairs
             )
             return RunToolResult.TIMEOUT
     except ToolException as e:
@@ -218,26 +322,206 @@ def run_tools_online(
             sfh.copy_to_debug(debug_path, setting_id, tool.name)
         result_aggregator.add_tool_error(tool.name, setting_id, str(e))
         return RunToolResult.TOOL_ERROR
+    except ResultErrorException as e:
+        print(f"ResultErrorException for monitor {tool.name}: {e.args[1]}")
+        if cli_args.debug and sfh is not None:
+            sfh.copy_to_debug(debug_path, setting_id, tool.name)
+        (preprocessing_elapsed, build_comp_elapsed, total_elapsed_s, total_count) = e.args[0]
+        result_aggregator.add_result_error(
+            tool.name, setting_id, preprocessing_elapsed, build_comp_elapsed, total_elapsed_s, total_count,
+            str(e.args[1])
+        )
+        return RunToolResult.VALIDATION_ERROR
     except Exception as e:
         if cli_args.debug and sfh is not None:
             sfh.copy_to_debug(debug_path, setting_id, tool.name)
         result_aggregator.add_tool_error(tool.name, setting_id, str(e))
         return RunToolResult.TOOL_ERROR
+    finally:
+        if profiled_file is not None and os.path.exists(os.path.join(path_to_folder, profiled_file)):
+            os.remove(os.path.join(path_to_folder, profiled_file))
+
+
+def telemetry_file(cli_args: CLIArgs, coordinator: Coordinator, name: str) -> Optional[str]:
+    if not cli_args.telemetry:
+        return None
+    return f"{coordinator.get_path(PATH_TO_NAMED_EXPERIMENT)}/online_telemetry/{name}.csv"
+
+
+def scripted_source(coordinator: Coordinator) -> bool:
+    # scripts and recordings generate their events in the container, the trace cannot be rescaled beforehand
+    return getattr(coordinator, "script_name", None) is not None
+
+
+def search_tool_online(
+        result_aggregator: ResultAggregatorOnline, tool, setting_id: str, path_to_folder: str,
+        data_file: str, data_type: InputOutputTraceFormats, policy_file: str, policy_type: InputOutputPolicyFormats,
+        signature_file: str, cli_args: CLIArgs, coordinator: Coordinator,
+        online_experiment_contract: OnlineExperimentContractGeneral
+):
+    if scripted_source(coordinator):
+        result_aggregator.add_tool_error(
+            tool.name, setting_id, "Throughput search needs a trace file, script and recording sources are not supported"
+        )
+        return
+    if not supports_rate_scaling(data_type):
+        result_aggregator.add_tool_error(tool.name, setting_id, f"Throughput search cannot rescale {data_type} traces")
+        return
+    contract = real_time_contract(online_experiment_contract)
+    base_rate = trace_rate(os.path.join(path_to_folder, data_file), data_type, contract.timestamp_units)
+    probe_files = []
+
+    def run_at(scale: float):
+        probe_file = probe_data_file(path_to_folder, data_file, data_type, scale)
+        # one telemetry file per run, the repeats of a probe are numbered
+        run = probe_files.count(probe_file)
+        probe_files.append(probe_file)
+        _, _, _, _, output, code = run_monitor_online(
+            mon=tool, path_to_folder=path_to_folder, data_file=probe_file, signature_file=signature_file,
+            policy_file=policy_file, cli_args=cli_args, trace_source_format=data_type, policy_source_format=policy_type,
+            path_manager=coordinator.get_path_manager(), online_experiment_contract=contract,
+            telemetry_path=telemetry_file(cli_args, coordinator, f"{setting_id}_{tool.name}_x{scale:g}_r{run}")
+        )
+        return code, output
+
+    print_headline(f"Throughput search {tool.name} on {setting_id}")
+    try:
+        result = search_throughput(run_at, coordinator.throughput_search, base_rate)
+    except Exception as e:
+        result_aggregator.add_tool_error(tool.name, setting_id, str(e))
+        return
+    finally:
+        for probe_file in set(probe_files):
+            if os.path.exists(os.path.join(path_to_folder, probe_file)):
+                os.remove(os.path.join(path_to_folder, probe_file))
+
+    print(f"Sustained:   x{result.max_scale} ({result.rate(result.max_scale)} events/s), failed at x{result.upper_scale}")
+    print_footline()
+    probes = json.dumps([[p.scale, p.sustained, p.runs, p.reason] for p in result.probes])
+    result_aggregator.add_throughput(
+        tool.name, setting_id, policy_file, result.rate(result.max_scale), result.rate(result.upper_scale),
+        result.max_scale, result.upper_scale, result.base_rate, result.sustain_probability_lower_bound, probes, result.reason()
+    )
+
+
+def sweep_tool_online(
+        result_aggregator: ResultAggregatorOnline, tool, setting_id: str, path_to_folder: str,
+        data_file: str, data_type: InputOutputTraceFormats, policy_file: str, policy_type: InputOutputPolicyFormats,
+        signature_file: str, cli_args: CLIArgs, coordinator: Coordinator,
+        online_experiment_contract: OnlineExperimentContractGeneral
+):
+    tool_contract = tool.params.get("OnlineExperimentContractTool")
+    if scripted_source(coordinator):
+        result_aggregator.add_tool_error(
+            tool.name, setting_id, "Pareto sweep needs a trace file, script and recording sources are not supported"
+        )
+        return
+    if not supports_rate_scaling(data_type):
+        result_aggregator.add_tool_error(tool.name, setting_id, f"Pareto sweep cannot rescale {data_type} traces")
+        return
+    if tool_contract is None:
+        result_aggregator.add_tool_error(tool.name, setting_id, f"Monitor {tool.name} has no online experiment contract")
+        return
+    contract = real_time_contract(online_experiment_contract)
+    base_rate = trace_rate(os.path.join(path_to_folder, data_file), data_type, contract.timestamp_units)
+    sweep = coordinator.pareto_sweep
+
+    print_headline(f"Pareto sweep {tool.name} on {setting_id}")
+    for scale in sweep.scales:
+        probe_file = probe_data_file(path_to_folder, data_file, data_type, scale)
+        try:
+            for batch_size in sweep.batch_sizes:
+                batched = copy.copy(tool_contract)
+                batched.input_aggregation_number = str(batch_size)
+                tool.params["OnlineExperimentContractTool"] = batched
+                for run in range(sweep.repeats):
+                    telemetry_path = telemetry_file(
+                        cli_args, coordinator, f"{setting_id}_{tool.name}_b{batch_size}_x{scale:g}_r{run}"
+                    )
+                    try:
+                        _, _, total_elapsed_s, total_count, output, code = run_monitor_online(
+                            mon=tool, path_to_folder=path_to_folder, data_file=probe_file,
+                            signature_file=signature_file, policy_file=policy_file, cli_args=cli_args,
+                            trace_source_format=data_type, policy_source_format=policy_type,
+                            path_manager=coordinator.get_path_manager(), online_experiment_contract=contract,
+                            telemetry_path=telemetry_path
+                        )
+                    except Exception as e:
+                        result_aggregator.add_tool_error(tool.name, f"{setting_id}_b{batch_size}_x{scale:g}", str(e))
+                        continue
+                    status = OnlineStatus.OK if code == 0 else (OnlineStatus.ATO if code == 200 else OnlineStatus.MTO)
+                    summary = output if isinstance(output, OnlineRunSummary) else None
+                    # achieved rate, lower than the offered one once the monitor falls behind
+                    throughput = None
+                    if summary is not None and summary.wall_clock_s and total_count is not None:
+                        throughput = total_count / summary.wall_clock_s
+                    result_aggregator.add_sweep(
+                        status, tool.name, setting_id, batch_size, scale,
+                        None if base_rate is None else scale * base_rate, throughput, total_elapsed_s, total_count,
+                        summary.latency.encode() if summary is not None else None
+                    )
+        finally:
+            tool.params["OnlineExperimentContractTool"] = tool_contract
+            if os.path.exists(os.path.join(path_to_folder, probe_file)):
+                os.remove(os.path.join(path_to_folder, probe_file))
+    print_footline()
+
+
+def resolve_differential(
+        result_aggregator: ResultAggregatorOffline, differential: DifferentialVerifier, path_to_folder: str,
+        data_file: str, data_type: InputOutputTraceFormats, policy_file: str, policy_type: InputOutputPolicyFormats,
+        signature_file: str, result_file: str, coordinator: Coordinator
+):
+    oracle = coordinator.get_oracle()
+
+    def oracle_check(structure):
+        coordinator.ensure_oracle_result(
+            path_to_folder, data_file, data_type, policy_file, policy_type, signature_file, result_file
+        )
+        sampling = coordinator.verification_sampling
+        sampled = sampled_verify(oracle, sampling, path_to_folder, data_file, result_file, structure) if sampling else None
+        if sampled is not None:
+            return sampled
+        return oracle.verify(path_to_folder, data_file, structure, signature_file, f"scratch/{policy_file}", result_file)
+
+    # without a result file to compare against, disagreements stay unresolved instead of failing the oracle check
+    can_settle = oracle is not None and result_file is not None
+    for (run, verified, msg, status) in differential.resolve(oracle_check if can_settle else None):
+        (prep, compiled, runtime, prop) = run.timings
+        (wall_time, max_mem, cpu) = run.stats
+        if verified:
+            result_aggregator.add_valid(
+                run.tool_name, run.setting_id, prep, compiled, runtime, prop, wall_time, max_mem, cpu,
+                run.output_hash, status.value
+            )
+        else:
+            print(f"Differential verification failed for monitor {run.tool_name}: {msg}")
+            result_aggregator.add_result_error(
+                run.tool_name, run.setting_id, prep, compiled, runtime, prop, wall_time, max_mem, cpu, msg,
+                run.output_hash, status.value
+            )
 
 
 def run_tools_offline(
         result_aggregator: ResultAggregatorOffline, tool, setting_id: str, path_to_folder: str,
         data_file: str, data_type: InputOutputTraceFormats, policy_file: str, policy_type: InputOutputPolicyFormats,
-        signature_file: str, result_file: str, cli_args: CLIArgs, coordinator: Coordinator, sfh=None
+        signature_file: str, result_file: str, cli_args: CLIArgs, coordinator: Coordinator, sfh=None,
+        verification_cache: Optional[VerificationCache] = None, differential: Optional[DifferentialVerifier] = None
 ) -> RunToolResult:
     debug_path = coordinator.get_path(PATH_TO_DEBUG)
     timeout_value = coordinator.time_out()
     try:
-        prep, compiled, runtime, prop = run_monitor_offline(
+        if differential is None:
+            coordinator.ensure_oracle_result(
+                path_to_folder, data_file, data_type, policy_file, policy_type, signature_file, result_file
+            )
+        prep, compiled, runtime, prop, outcome = run_monitor_offline(
             mon=tool, path_to_folder=path_to_folder, data_file=data_file, signature_file=signature_file,
             policy_file=policy_file, cli_args=cli_args, trace_source_format=data_type, policy_source_format=policy_type,
             result_file=result_file, timeout_value=timeout_value,
-            oracle=coordinator.get_oracle(), path_manager=coordinator.get_path_manager()
+            oracle=coordinator.get_oracle(), path_manager=coordinator.get_path_manager(),
+            verification_cache=verification_cache, differential=differential,
+            sampling=coordinator.verification_sampling
         )
 
         if cli_args.debug and sfh is not None:
@@ -252,8 +536,16 @@ def run_tools_offline(
             else:
                 wall_time, max_mem, cpu = None, None, None
 
+        if differential is not None:
+            differential.defer(DeferredRun(
+                tool.name, setting_id, outcome.output_hash, (prep, compiled, runtime, prop), (wall_time, max_mem, cpu),
+                outcome.status if outcome.status == VerificationStatus.NONDETERMINISTIC else None
+            ))
+            return RunToolResult.OK
+
         result_aggregator.add_valid(
-            tool.name, setting_id, prep, compiled, runtime, prop, wall_time, max_mem, cpu
+            tool.name, setting_id, prep, compiled, runtime, prop, wall_time, max_mem, cpu,
+            outcome.output_hash, outcome.status.value
         )
         return RunToolResult.OK
     except TimedOut as e:
@@ -281,9 +573,12 @@ def run_tools_offline(
             else:
                 wall_time, max_mem, cpu = None, None, None
         (prep, compiled, runtime, prop) = e.args[0]
+        outcome = e.args[2] if len(e.args) > 2 else None
         result_aggregator.add_result_error(
             tool.name, setting_id, prep, compiled, runtime, prop,
-            wall_time, max_mem, cpu, str(e.args[1])
+            wall_time, max_mem, cpu, str(e.args[1]),
+            outcome.output_hash if outcome is not None else None,
+            outcome.status.value if outcome is not None else None
         )
         return RunToolResult.VALIDATION_ERROR
     except Exception as e:
@@ -63,6 +63,10 @@ class CaseStudyCoordinator(Coordinator):
             return constraint
         return None
 
+    def oracle_time_out(self) -> Optional[int]:
+        constraint = self.constraints.generation_constraint()
+        return None if constraint is None else constraint.upper_bound
+
     def _init_instr(self):
         with open(self.path_manager.get_path(PATH_TO_INSTRUCTIONS), "r") as f:
             raw_instructions = f.readlines()
@@ -104,24 +108,26 @@ class CaseStudyCoordinator(Coordinator):
         self.generator.run_generator(tmp_data_setup)
         print(f"{BENCHMARK_BUILDING_OFFSET} Finished: Unpacking Data\n")
 
-        if self.oracle is None and self.constraints.generation_constraint() is None:
-            return
-
         named_path_to_data = f"{path_to_named_experiment}/data"
         self.path_manager.add_path(PATH_TO_NAMED_DATA, named_path_to_data)
-        sfh = ScratchFolderHandler(named_path_to_data)
-
         result_folder = f"{named_path_to_data}/result"
         os.makedirs(result_folder, exist_ok=True)
 
+        # also names the result file of every setting, a deferred oracle writes it on first use
+        if not self.fresh_build:
+            self.header, self.instructions = self._init_instr()
+
+        oracle = None if self.defer_oracle else self.oracle
+        if oracle is None and self.constraints.generation_constraint() is None:
+            return
+
+        sfh = ScratchFolderHandler(named_path_to_data)
+
         generation_constraint = self.constraints.generation_constraint()
         run_time_out = generation_constraint.upper_bound
         if run_time_out is None:
             print("Warning: No upper bound for construction time provided, oracle verification or time guard may run indefinitely!")
 
-        if not self.fresh_build:
-            self.header, self.instructions = self._init_instr()
-
         print(f"{BENCHMARK_BUILDING_OFFSET} Begin: Verifying with Oracle")
         for (i, setting) in enumerate(self.instructions):
             print(f"{BENCHMARK_BUILDING_OFFSET} Verifying setting {i + 1}/{len(self.instructions)}")
@@ -129,7 +135,7 @@ class CaseStudyCoordinator(Coordinator):
             (policy_file, policy_type) = setting[POLICY_KEY]
             sig = setting.get(SIGNATURE_KEY, None)
 
-            if self.oracle is not None:
+            if oracle is not None:
                 try:
                     self.oracle.pre_process_data(named_path_to_data, data_type, policy_type, data_file, sig, policy_file, self.path_manager)
                     out, code = self.oracle.compute_result(time_on=None, time_out=run_time_out)
@@ -1,3 +1,4 @@
+import os
 from abc import abstractmethod, ABC
 from enum import Enum
 from typing import List, Tuple, Optional, Dict
@@ -5,9 +6,12 @@ from typing import List, Tuple, Optional, Dict
 from Infrastructure.AutoConversion.InputOutputPolicyFormats import InputOutputPolicyFormats
 from Infrastructure.AutoConversion.InputOutputTraceFormats import InputOutputTraceFormats
 from Infrastructure.DataTypes.Contracts.OnlineExperimentContract import OnlineExperimentContractGeneral
+from Infrastructure.DataTypes.Contracts.SubContracts.SamplingContract import VerificationSampling
+from Infrastructure.DataTypes.Contracts.SubContracts.ThroughputContract import ThroughputSearch, ParetoSweep
 from Infrastructure.DataTypes.PathManager.PathManager import PathManager
 from Infrastructure.DataTypes.Types.custome_type import OnlineOffline
 from Infrastructure.Oracles.AbstractOracleTemplate import AbstractOracleTemplate
+from Infrastructure.Oracles.OracleExceptions import RunOracleException
 
 
 class SeedType(Enum):
@@ -25,6 +29,11 @@ class Coordinator(ABC):
         self.oracle = oracle
         self.online_settings = online_settings
         self.runtime_settings = runtime_settings
+        # with deferred oracles, results are computed on first use instead of while building
+        self.defer_oracle = False
+        self.verification_sampling: Optional[VerificationSampling] = None
+        self.throughput_search = ThroughputSearch()
+        self.pareto_sweep = ParetoSweep()
 
     @abstractmethod
     def build(self):
@@ -46,6 +55,34 @@ class Coordinator(ABC):
     def iterate_settings(self) -> List[Tuple[int, str, str, InputOutputTraceFormats, str, InputOutputPolicyFormats, Optional[str], Optional[str]]]:
         pass
 
+    def oracle_time_out(self) -> Optional[int]:
+        return None
+
+    def online_data_files(self) -> Dict[str, str]:
+        # additional files of the data folder the online data source reads, by their name under data/
+        return dict()
+
+    def ensure_oracle_result(
+            self, path_to_folder: str, data_file: str, data_type: InputOutputTraceFormats, policy_file: str,
+            policy_type: InputOutputPolicyFormats, signature_file: Optional[str], result_file: Optional[str]
+    ) -> bool:
+        if self.oracle is None or result_file is None:
+            return False
+        if os.path.exists(result_file):
+            return True
+
+        print(f"Computing oracle result {result_file}")
+        self.oracle.pre_process_data(
+            path_to_folder=path_to_folder, data_file=data_file, policy_file=policy_file, signature_file=signature_file,
+            trace_source_format=data_type, policy_source_format=policy_type, path_manager=self.path_manager
+        )
+        out, code = self.oracle.compute_result(time_on=None, time_out=self.oracle_time_out())
+        if code != 0:
+            raise RunOracleException(out)
+        os.makedirs(os.path.dirname(result_file), exist_ok=True)
+        self.oracle.post_process_data(out, result_file)
+        return True
+
     def add_path(self, path_id: str, path: str):
         self.path_manager.add_path(path_id, path)
 
@@ -6,6 +6,8 @@ import os
 from Infrastructure.AutoConversion.InputOutputPolicyFormats import InputOutputPolicyFormats
 from Infrastructure.AutoConversion.InputOutputTraceFormats import InputOutputTraceFormats
 from Infrastructure.BenchmarkBuilder.Coordinator.Coordinator import Coordinator
+from Infrastructure.BenchmarkBuilder.StreamRecording import REPLAY_SCRIPT, RECORDING_FILE, replay_script, \
+    validate_recording
 from Infrastructure.DataTypes.Contracts.OnlineExperimentContract import OnlineExperimentContractGeneral
 from Infrastructure.DataTypes.Contracts.SubContracts.ScriptSetupContract import ScriptSetupContract
 from Infrastructure.DataTypes.PathManager.PathManager import PathManager
@@ -20,10 +22,15 @@ class ScriptCoordinator(Coordinator):
         self.experiment = online_experiment_settings
         self.contract = script_contract
         self.script_name = self.contract.script_name
+        self.recording = self.contract.recording
+        if self.recording is not None:
+            # the replay takes the place of the live script, the driver runs it like any other script
+            self.script_name = REPLAY_SCRIPT
 
         # Archive/CaseStudies/ExperimentName
         self.path_to_script_folder = f"{self.path_manager.get_path(PATH_TO_ARCHIVE)}/Docker/CaseStudies/{self.contract.name}"
-        self.script_org_path = f"{self.path_to_script_folder}/{self.script_name}"
+        self.script_org_path = f"{self.path_to_script_folder}/{self.contract.script_name}"
+        self.replay_org_path = f"{self.path_manager.get_path(PATH_TO_ARCHIVE)}/Docker/Utilities/StreamReplay/{REPLAY_SCRIPT}"
         self.signature_org_path = f"{self.path_to_script_folder}/{Signature_File()}"
         self.policy_org_path = f"{self.path_to_script_folder}/{Policy_File()}"
 
@@ -32,6 +39,7 @@ class ScriptCoordinator(Coordinator):
         self.script_dst_path = f"{self.path_to_data_folder}/{self.script_name}"
         self.signature_dst_path = f"{self.path_to_data_folder}/{Signature_File()}"
         self.policy_dst_path = f"{self.path_to_data_folder}/{Policy_File()}"
+        self.recording_dst_path = f"{self.path_to_data_folder}/{RECORDING_FILE}"
 
         self.policy = Policy_File() if os.path.exists(self.policy_org_path) else None
         self.signature = Signature_File() if os.path.exists(self.signature_org_path) else None
@@ -39,13 +47,26 @@ class ScriptCoordinator(Coordinator):
     def build(self):
         os.makedirs(self.path_to_data_folder, exist_ok=True)
 
-        shutil.copy(self.script_org_path, self.script_dst_path)
+        if self.recording is not None:
+            validate_recording(self.recording)
+            with open(self.replay_org_path, "r") as f:
+                template = f.read()
+            with open(self.script_dst_path, "w") as f:
+                f.write(replay_script(template, self.contract.replay_scale))
+            shutil.copy(self.recording, self.recording_dst_path)
+        else:
+            shutil.copy(self.script_org_path, self.script_dst_path)
         if os.path.exists(self.signature_org_path):
             shutil.copy(self.signature_org_path, self.signature_dst_path)
         if os.path.exists(self.policy_org_path):
             shutil.copy(self.policy_org_path, self.policy_dst_path)
 
     def finger_print(self) -> Dict[str, str]:
+        if self.recording is not None:
+            with open(self.recording, "rb") as f:
+                first_hash = hashlib.sha256(f.read() + str(self.contract.replay_scale).encode("utf-8")).hexdigest()
+            return {FINGERPRINT_DATA: hashlib.sha256(first_hash.encode("utf-8")).hexdigest()}
+
         fingerprint_input_file = os.path.join(self.path_to_script_folder, self.script_name)
 
         if not os.path.exists(fingerprint_input_file):
@@ -63,5 +84,8 @@ class ScriptCoordinator(Coordinator):
     def time_out(self) -> Optional[int]:
         return self.online_settings.accumulated_latency
 
+    def online_data_files(self) -> Dict[str, str]:
+        return {RECORDING_FILE: RECORDING_FILE} if self.recording is not None else dict()
+
     def iterate_settings(self) -> List[Tuple[int, str, str, InputOutputTraceFormats, str, InputOutputPolicyFormats, Optional[str], Optional[str]]]:
         return [((0, None), self.path_to_data_folder, self.script_name, None, None, self.signature, None, None)]
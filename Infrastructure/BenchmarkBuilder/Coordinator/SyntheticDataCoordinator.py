@@ -66,6 +66,10 @@ class SyntheticDataCoordinator(Coordinator):
             return constraint
         return None
 
+    def oracle_time_out(self) -> Optional[int]:
+        constraint = self.constraints.generation_constraint()
+        return None if constraint is None else constraint.upper_bound
+
     def build(self):
         self.fresh_build = True
         for num_ops in self.experiment.num_operators:
@@ -104,12 +108,17 @@ class SyntheticDataCoordinator(Coordinator):
                                 self.policy_setup[SEEDS_KEY] = policy_seed
 
                         constraint = constraint if constraint is None or (constraint.lower_bound is not None or constraint.upper_bound is not None) else None
+                        # an oracle guarding the generation time cannot be deferred
+                        guarded_by_oracle = constraint is not None and constraint.guard_type == TimeGuardingTool.Oracle
+                        oracle = None if self.defer_oracle and not guarded_by_oracle else self.oracle
                         data_file, policy_file, sig_file, result_file = guarded_synthetic_experiment(
                             num_path=num_path, num_ops=num_ops, num_fv=num_fv, policy_setup=self.policy_setup,
                             policy_source=self.policy_source, data_setup=self.data_setup, data_source=self.data_source,
-                            data_set_size=data_set_size, oracle=self.oracle,
+                            data_set_size=data_set_size, oracle=oracle,
                             constraints=constraint, path_manager=self.path_manager
                         )
+                        if oracle is None and self.oracle is not None:
+                            result_file = f"{num_path}/result/result_{data_set_size}.res"
                         self.instructions.append(((f"{num_ops}_{num_fv}_{num_set}", data_set_size), num_path, data_file, trace_format, policy_file, policy_format, sig_file, result_file))
 
     def iterate_settings(self) -> List[Tuple[int, str, str, InputOutputTraceFormats, str, InputOutputPolicyFormats, Optional[str], Optional[str]]]:
@@ -0,0 +1,174 @@
+import bisect
+import math
+from itertools import cycle
+from typing import Dict, List, Optional, Tuple
+
+from Infrastructure.AutoConversion.InputOutputTraceFormats import InputOutputTraceFormats
+from Infrastructure.BenchmarkBuilder.ThroughputSearch import event_timestamp
+from Infrastructure.Builders.OnlineDriverProtocol import DriverBlock
+from Infrastructure.DataTypes.Contracts.SubContracts.RateProfile import RateProfile, RatePhase, PhaseKind
+from Infrastructure.DataTypes.Types.LatencyHistogram import LatencyHistogram
+
+REPLAY_PHASE = "replay"
+
+
+def _consumed(phase: RatePhase, u: float) -> float:
+    # trace time replayed in the first u units of the phase, the integral of its rate
+    if phase.kind == PhaseKind.STEP:
+        return phase.scale * u
+    if phase.kind == PhaseKind.RAMP:
+        return phase.scale * u + (phase.to_scale - phase.scale) * u * u / (2 * phase.duration)
+    burst = phase.duty * phase.period
+    periods, rest = divmod(u, phase.period)
+    per_period = phase.burst_scale * burst + phase.scale * (phase.period - burst)
+    return periods * per_period + phase.burst_scale * min(rest, burst) + phase.scale * max(0.0, rest - burst)
+
+
+def _replayed(phase: RatePhase, x: float) -> float:
+    # inverse of _consumed
+    if phase.kind == PhaseKind.STEP:
+        return x / phase.scale
+    if phase.kind == PhaseKind.RAMP:
+        a, b, d = phase.scale, phase.to_scale, phase.duration
+        if a == b:
+            return x / a
+        return d * (math.sqrt(max(0.0, a * a + 2 * (b - a) * x / d)) - a) / (b - a)
+    burst = phase.duty * phase.period
+    per_period = phase.burst_scale * burst + phase.scale * (phase.period - burst)
+    periods, rest = divmod(x, per_period)
+    if rest <= phase.burst_scale * burst:
+        return periods * phase.period + rest / phase.burst_scale
+    return periods * phase.period + burst + (rest - phase.burst_scale * burst) / phase.scale
+
+
+def _final_scale(phase: RatePhase) -> float:
+    return phase.to_scale if phase.kind == PhaseKind.RAMP else phase.scale
+
+
+class ProfileClock:
+    # Maps offsets on the trace's time axis to offsets of the replay. Phase durations are given on the replay
+    # axis, so phase i covers [starts[i], starts[i + 1]) of the replay.
+    def __init__(self, profile: RateProfile):
+        self.phases = profile.phases
+        self.repeat = profile.repeat
+        self.starts = [0.0]
+        self.trace_starts = [0.0]
+        for phase in self.phases:
+            self.starts.append(self.starts[-1] + phase.duration)
+            self.trace_starts.append(self.trace_starts[-1] + _consumed(phase, phase.duration))
+
+    def replay_offset(self, trace_offset: float) -> float:
+        cycles = 0
+        if self.repeat:
+            cycles, trace_offset = divmod(trace_offset, self.trace_starts[-1])
+        elif trace_offset >= self.trace_starts[-1]:
+            overshoot = trace_offset - self.trace_starts[-1]
+            return self.starts[-1] + overshoot / _final_scale(self.phases[-1])
+        index = bisect.bisect_right(self.trace_starts, trace_offset) - 1
+        offset = self.starts[index] + _replayed(self.phases[index], trace_offset - self.trace_starts[index])
+        return cycles * self.starts[-1] + offset
+
+    def phase_at(self, replay_offset: float) -> Tuple[int, int]:
+        # (cycle, phase index); without repeat, everything after the profile belongs to its last phase
+        cycles = 0
+        if self.repeat:
+            cycles, replay_offset = divmod(replay_offset, self.starts[-1])
+        index = bisect.bisect_right(self.starts, replay_offset) - 1
+        return int(cycles), min(index, len(self.phases) - 1)
+
+    def phase_end(self, cycle_index: int, index: int) -> Optional[float]:
+        if not self.repeat and index == len(self.phases) - 1:
+            return None
+        return cycle_index * self.starts[-1] + self.starts[index + 1]
+
+
+def _replay_gaps(path: str) -> List[float]:
+    with open(path, "r") as f:
+        gaps = [float(line.split(",")[0]) for line in f if line.strip() and not line.startswith("#")]
+    if not gaps or any(g < 0 for g in gaps):
+        raise ValueError(f"Replay file {path} needs non-negative inter-arrival times, one per line")
+    return gaps
+
+
+def apply_rate_profile(source: str, target: str, data_type: InputOutputTraceFormats, profile: RateProfile) -> Optional[int]:
+    # Rewrites the timestamps of a trace so that a real-time replay follows the profile; returns the first
+    # timestamp, which stays put. With a replay file, consecutive time points are spaced by the recorded
+    # inter-arrival times instead (cycled if the trace is longer).
+    clock = None if profile.replay_file is not None else ProfileClock(profile)
+    gaps = cycle(_replay_gaps(profile.replay_file)) if profile.replay_file is not None else None
+    first, previous, replay_offset = None, None, 0.0
+    with open(source, "r") as src, open(target, "w") as dst:
+        for line in src:
+            found = event_timestamp(line, data_type)
+            if found is None:
+                dst.write(line)
+                continue
+            (start, end, ts) = found
+            if first is None:
+                first = ts
+            if gaps is not None:
+                if previous is not None and ts != previous:
+                    replay_offset += next(gaps)
+                previous = ts
+            else:
+                replay_offset = clock.replay_offset(ts - first)
+            dst.write(line[:start] + str(first + math.floor(replay_offset)) + line[end:])
+    return first
+
+
+class PhaseTracker:
+    # on_block consumer of run_online_image: latency per phase, and per phase the time after its end until the
+    # latency is back within recovery_factor of the first phase's median
+    def __init__(self, profile: RateProfile, first_ts: int, units_per_second: float):
+        self.clock = None if profile.replay_file is not None else ProfileClock(profile)
+        self.recovery_factor = profile.recovery_factor
+        self.first_ts = first_ts
+        self.units_per_second = units_per_second
+        count = 1 if self.clock is None else len(self.clock.phases)
+        self.histograms = [LatencyHistogram() for _ in range(count)]
+        self.recovery: List[Optional[float]] = [None] * count
+        self.pending: Dict[Tuple[int, int], float] = dict()  # ended occurrences waiting to recover
+        self.current: Optional[Tuple[int, int]] = None
+        self.baseline: Optional[int] = None
+
+    def __call__(self, block: DriverBlock):
+        if block.ts is None or block.elapsed_ns is None:
+            return
+        offset = block.ts - self.first_ts
+        occurrence = (0, 0) if self.clock is None else self.clock.phase_at(offset)
+        if self.current is not None and occurrence != self.current:
+            if self.baseline is None:
+                self.baseline = self.histograms[0].percentile(50)
+            end = self.clock.phase_end(*self.current)
+            if end is not None:
+                self.pending[self.current] = end
+        self.current = occurrence
+        self.histograms[occurrence[1]].record(block.elapsed_ns)
+
+        if self.baseline is None:
+            return
+        if block.elapsed_ns <= self.recovery_factor * max(self.baseline, 1):
+            for (cycle_index, index), end in list(self.pending.items()):
+                recovered = max(0.0, offset - end) / self.units_per_second
+                self.recovery[index] = recovered if self.recovery[index] is None else max(self.recovery[index], recovered)
+                del self.pending[(cycle_index, index)]
+
+    def phases(self) -> List[Dict]:
+        rows = []
+        for index, histogram in enumerate(self.histograms):
+            if self.clock is None:
+                kind, start, end = REPLAY_PHASE, 0.0, None
+            else:
+                kind = self.clock.phases[index].kind.to_string()
+                start = self.clock.starts[index] / self.units_per_second
+                end = self.clock.phase_end(0, index)
+                end = None if end is None else end / self.units_per_second
+            # occurrences that never recovered before the run ended
+            unrecovered = any(i == index for (_, i) in self.pending.keys())
+            rows.append({
+                "phase": index, "kind": kind, "start_s": start, "end_s": end, "blocks": histogram.total,
+                "p50": histogram.percentile(50), "p99": histogram.percentile(99), "max": histogram.max,
+                "recovery_s": None if unrecovered else self.recovery[index],
+                "latency_histogram": histogram.encode()
+            })
+        return rows
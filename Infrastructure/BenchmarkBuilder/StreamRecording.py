@@ -0,0 +1,111 @@
+import argparse
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from typing import Iterator, List, Optional, Tuple
+
+RECORDING_HEADER = "# stream recording v1"
+REPLAY_SCRIPT = "StreamReplay.py"
+RECORDING_FILE = "recording"
+
+
+def _read_lines(stream, lines: queue.Queue):
+    # stamps each line on arrival, None marks the end of the source
+    for line in stream:
+        lines.put((time.perf_counter_ns(), line))
+    lines.put(None)
+
+
+def capture_stream(
+        command: List[str], target: str, duration_s: Optional[float] = None, max_records: Optional[int] = None
+) -> int:
+    # Runs a live source (e.g. WikiMediaCSV.py) and records every stdout line with its arrival offset in ns
+    # since the first line. Stops after duration_s, max_records or the end of the source. Lines are read on a
+    # separate thread, so the deadline also holds while the source is silent.
+    os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+    records = 0
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True, bufsize=1)
+    deadline = None if duration_s is None else time.monotonic() + duration_s
+    lines: queue.Queue = queue.Queue()
+    threading.Thread(target=_read_lines, args=(process.stdout, lines), daemon=True).start()
+    first = None
+    try:
+        with open(target, "w") as f:
+            f.write(f"{RECORDING_HEADER} source={os.path.basename(command[-1])}\n")
+            while True:
+                try:
+                    if deadline is None:
+                        item = lines.get()
+                    else:
+                        item = lines.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    break
+                (now, line) = item
+                record = line.rstrip("\n")
+                if not record:
+                    continue
+                first = now if first is None else first
+                f.write(f"{now - first}\t{record}\n")
+                records += 1
+                if max_records is not None and records >= max_records:
+                    break
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return records
+
+
+def read_recording(path: str) -> Iterator[Tuple[int, str]]:
+    with open(path, "r") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            offset, _, record = line.rstrip("\n").partition("\t")
+            yield int(offset), record
+
+
+def validate_recording(path: str):
+    previous = 0
+    for offset, _ in read_recording(path):
+        if offset < previous:
+            raise ValueError(f"Recording {path} is not ordered by arrival time")
+        previous = offset
+
+
+def replay_script(template: str, scale: float) -> str:
+    if scale <= 0:
+        raise ValueError(f"Replay scale must be positive, got {scale}")
+    return template.replace("SCALE = 1.0\n", f"SCALE = {float(scale)!r}\n", 1)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="StreamRecording",
+        description="Record a live stream script once, for deterministic replays in online experiments"
+    )
+    parser.add_argument("script", help="Live source script, e.g. Archive/Docker/CaseStudies/WikiMedia/WikiMediaCSV.py")
+    parser.add_argument("target", help="Recording file to write")
+    parser.add_argument("--duration", type=float, default=None, help="Stop after this many seconds")
+    parser.add_argument("--records", type=int, default=None, help="Stop after this many records")
+    args = parser.parse_args(argv)
+    if args.duration is None and args.records is None:
+        parser.error("a live stream does not end, set --duration or --records")
+
+    # unbuffered, otherwise the arrival times are those of the pipe buffer flushes
+    records = capture_stream([sys.executable, "-u", args.script], args.target, args.duration, args.records)
+    print(f"Recorded {records} records to {args.target}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,205 @@
+import copy
+import math
+import os
+import statistics
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+from Infrastructure.AutoConversion.InputOutputTraceFormats import InputOutputTraceFormats
+from Infrastructure.Builders.OnlineDriverProtocol import OnlineRunSummary
+from Infrastructure.DataTypes.Contracts.OnlineExperimentContract import OnlineExperimentContractGeneral
+from Infrastructure.DataTypes.Contracts.SubContracts.ThroughputContract import ThroughputSearch
+from Infrastructure.DataTypes.Types.custome_type import InputSpeed, TimeUnits
+from Infrastructure.DataTypes.Verification.SampledVerification import error_rate_upper_bound
+
+CSV_TRACES = {InputOutputTraceFormats.CSV, InputOutputTraceFormats.OOO_CSV, InputOutputTraceFormats.CSV_LINEAR}
+LOG_TRACES = {InputOutputTraceFormats.MONPOLY, InputOutputTraceFormats.MONPOLY_LINEAR}
+UNITS_PER_SECOND = {TimeUnits.SECONDS: 1, TimeUnits.MILLISECONDS: 1000, TimeUnits.MICROSECONDS: 1000000}
+MIN_TREND_PAIRS = 8
+
+
+@dataclass
+class Probe:
+    scale: float
+    sustained: bool
+    runs: int
+    reason: str
+
+
+@dataclass
+class ThroughputResult:
+    max_scale: Optional[float]  # highest sustained multiple of the trace rate
+    upper_scale: Optional[float]  # lowest failing multiple, None if max_scale was never exceeded
+    base_rate: Optional[float]  # events per second of the unscaled trace
+    sustain_probability_lower_bound: float  # lower confidence bound on P(a run at max_scale is sustained)
+    probes: List[Probe]
+
+    def rate(self, scale: Optional[float]) -> Optional[float]:
+        if scale is None or self.base_rate is None:
+            return None
+        return scale * self.base_rate
+
+    def reason(self) -> str:
+        failing = [p for p in self.probes if not p.sustained]
+        return failing[-1].reason if failing else "not saturated"
+
+
+def event_timestamp(line: str, data_type: InputOutputTraceFormats) -> Optional[Tuple[int, int, int]]:
+    # (start, end, value) of the timestamp field of an event line
+    if data_type in CSV_TRACES:
+        start = line.find("ts=")
+        if start < 0:
+            return None
+        start += 3
+        end = start
+        while end < len(line) and line[end].isdigit():
+            end += 1
+    else:
+        if not line.startswith("@"):
+            return None
+        start = end = 1
+        while end < len(line) and line[end].isdigit():
+            end += 1
+    if end == start:
+        return None
+    return start, end, int(line[start:end])
+
+
+def _events(line: str, data_type: InputOutputTraceFormats) -> int:
+    return 1 if data_type in CSV_TRACES else line.count(")")
+
+
+def supports_rate_scaling(data_type: InputOutputTraceFormats) -> bool:
+    return data_type in CSV_TRACES or data_type in LOG_TRACES
+
+
+def trace_rate(path: str, data_type: InputOutputTraceFormats, timestamp_units: TimeUnits) -> Optional[float]:
+    # events per second when replayed in real time, None for a trace without a time span
+    events, first, last = 0, None, None
+    with open(path, "r") as f:
+        for line in f:
+            found = event_timestamp(line, data_type)
+            if found is None:
+                continue
+            events += _events(line, data_type)
+            first = found[2] if first is None else first
+            last = found[2]
+    if first is None or last == first:
+        return None
+    return events * UNITS_PER_SECOND[timestamp_units] / (last - first)
+
+
+def scale_trace(source: str, target: str, data_type: InputOutputTraceFormats, scale: float):
+    # Compresses the time axis by scale, the first timestamp stays put. Timestamps stay integers, so at high
+    # scales neighbouring time points may share a timestamp, which keeps them ordered.
+    first = None
+    with open(source, "r") as src, open(target, "w") as dst:
+        for line in src:
+            found = event_timestamp(line, data_type)
+            if found is None:
+                dst.write(line)
+                continue
+            (start, end, ts) = found
+            first = ts if first is None else first
+            scaled = first + math.floor((ts - first) / scale)
+            dst.write(line[:start] + str(scaled) + line[end:])
+
+
+def backlog_grows(summary: OnlineRunSummary, growth: float) -> bool:
+    # A sustainable rate keeps the latency level; a backlog shows as latencies at the end of the run that are
+    # a multiple of the ones at the start.
+    latencies = [elapsed for (_, elapsed) in summary.output_pairs()]
+    if len(latencies) < MIN_TREND_PAIRS:
+        return False
+    quarter = len(latencies) // 4
+    early = statistics.median(latencies[:quarter])
+    late = statistics.median(latencies[-quarter:])
+    return late > growth * max(early, 1)
+
+
+def judge_run(code: int, summary, growth: float) -> Tuple[bool, str]:
+    if code == 200:
+        return False, "accumulative latency exceeded"
+    if code == 250:
+        return False, "maximum latency exceeded"
+    if code != 0:
+        return False, f"exit code {code}"
+    if isinstance(summary, OnlineRunSummary):
+        if summary.unexpected_error is not None:
+            return False, summary.unexpected_error
+        if backlog_grows(summary, growth):
+            return False, "latency grows over the run"
+    return True, "sustained"
+
+
+def real_time_contract(contract: OnlineExperimentContractGeneral) -> OnlineExperimentContractGeneral:
+    # the rate is only controlled by the timestamps when the driver paces the trace
+    if contract.mode == InputSpeed.REAL_TIME:
+        return contract
+    print("Throughput search replays the trace in real-time mode")
+    paced = copy.copy(contract)
+    paced.mode = InputSpeed.REAL_TIME
+    return paced
+
+
+def search_throughput(run_at: Callable[[float], Tuple[int, object]], search: ThroughputSearch,
+                      base_rate: Optional[float] = None) -> ThroughputResult:
+    # Ramps the scale geometrically from 1 until the first failure (or down until the first success), then
+    # bisects the bracket on a log scale. A probe only counts as sustained if all its repeats are.
+    probes: List[Probe] = []
+
+    def probe(scale: float) -> bool:
+        reason, runs = "sustained", 0
+        for _ in range(search.repeats):
+            runs += 1
+            code, summary = run_at(scale)
+            sustained, reason = judge_run(code, summary, search.backlog_growth)
+            if not sustained:
+                break
+        else:
+            sustained = True
+        probes.append(Probe(scale, sustained, runs, reason))
+        print(f"Probe x{scale:.4g}: {reason} ({runs} run(s))")
+        return sustained
+
+    low, high = None, None
+    scale = 1.0
+    if probe(scale):
+        low = scale
+        while high is None and scale < search.max_scale:
+            scale = min(scale * 2, search.max_scale)
+            if probe(scale):
+                low = scale
+            else:
+                high = scale
+    else:
+        high = scale
+        while low is None and scale > search.min_scale:
+            scale = max(scale / 2, search.min_scale)
+            if probe(scale):
+                low = scale
+            else:
+                high = scale
+
+    while low is not None and high is not None and high / low > 1 + search.tolerance:
+        mid = math.sqrt(low * high)
+        if probe(mid):
+            low = mid
+        else:
+            high = mid
+
+    # every repeat at max_scale succeeded, bound the probability that a further run would not
+    sustain_probability_lower_bound = 0.0
+    if low is not None:
+        runs = sum(p.runs for p in probes if p.scale == low and p.sustained)
+        sustain_probability_lower_bound = 1.0 - error_rate_upper_bound(0, runs, search.confidence)
+    return ThroughputResult(
+        max_scale=low, upper_scale=high, base_rate=base_rate,
+        sustain_probability_lower_bound=sustain_probability_lower_bound, probes=probes
+    )
+
+
+def probe_data_file(path_to_folder: str, data_file: str, data_type: InputOutputTraceFormats, scale: float) -> str:
+    probe_file = f"throughput_{scale:.6g}_{data_file}"
+    scale_trace(os.path.join(path_to_folder, data_file), os.path.join(path_to_folder, probe_file), data_type, scale)
+    return probe_file
@@ -1,16 +1,24 @@
+import os
+import threading
 import time
 import re
-from typing import Dict, AnyStr, Any, List
+from collections import deque
+from typing import Dict, AnyStr, Any, List, Callable, Optional
 
 import docker
 from docker.errors import APIError, BuildError
 
 from Infrastructure.DataTypes.Contracts.OnlineExperimentContract import OnlineExperimentContractGeneral, \
     OnlineExperimentContractTool
+from Infrastructure.Builders.ContainerTelemetry import ContainerSampler
+from Infrastructure.Builders.OnlineDriverProtocol import OnlineRunSummary, DriverStreamReader, DriverBlock
 from Infrastructure.Monitors.MonitorExceptions import TimedOut, ToolException
 from Infrastructure.constants import COMMAND_KEY, WORKDIR_KEY, VOLUMES_KEY, ENTRYPOINT_KEY
 from Infrastructure.printing import print_headline, print_footline
 
+# characters of a streamed log kept for error messages, the lines themselves only pass through on_line
+STREAMING_LOG_TAIL = 64 * 1024
+
 
 def to_prop_file(path, name, content: dict):
     with open(path + f"{name}", mode='w') as f:
@@ -31,17 +39,25 @@ def image_exists(name):
         return False
 
 
+def image_id(name):
+    try:
+        return docker.from_env().images.get(name).id
+    except (APIError, docker.errors.ImageNotFound) as e:
+        print(f"Error getting docker image id for {name}: {e}")
+        return None
+
+
 class ImageBuildException(Exception):
     pass
 
 
-def image_building(image_name, build_dir, args=None):
+def image_building(image_name, build_dir, args=None, nocache=True):
     client = docker.from_env()
     try:
         print(f"\nBuilding image '{image_name}' from {build_dir} ...")
         build_output = client.api.build(
             path=build_dir, tag=image_name, decode=True,
-            buildargs=args, nocache=True, rm=True, forcerm=True
+            buildargs=args, nocache=nocache, rm=True, forcerm=True
         )
 
         error_in_build = False
@@ -163,12 +179,96 @@ def run_offline_image(image_name, generic_contract: Dict[AnyStr, Any], verbose=F
     return stdout, return_code
 
 
+def run_offline_image_streaming(image_name, generic_contract: Dict[AnyStr, Any], on_line: Callable[[str], bool],
+                                verbose=False, time_out=None, is_tool_image=False, stop_on_abort=False):
+    # on_line returns False to abort; the container is only killed when stop_on_abort is set. Returns the last
+    # STREAMING_LOG_TAIL characters of the log, not the whole log.
+    client = docker.from_env()
+
+    command = generic_contract.get(COMMAND_KEY)
+    command = list(filter(None, command)) if command is not None else None
+    if verbose and is_tool_image:
+        print(" ".join(command))
+
+    container = None
+    timed_out = threading.Event()
+    timer = None
+    try:
+        container = client.containers.run(
+            image=image_name, command=command,
+            volumes=generic_contract.get(VOLUMES_KEY), working_dir=generic_contract.get(WORKDIR_KEY),
+            entrypoint=generic_contract.get(ENTRYPOINT_KEY),
+            detach=True, remove=False,
+            stdout=True, stderr=True,
+        )
+
+        if time_out is not None:
+            def _on_time_out():
+                timed_out.set()
+                try:
+                    container.kill()
+                except docker.errors.APIError:
+                    pass  # Container may have already exited
+            timer = threading.Timer(time_out, _on_time_out)
+            timer.daemon = True
+            timer.start()
+
+        tail = deque()
+        tail_size = 0
+        pending = ""
+        aborted = False
+        for chunk in container.logs(stream=True, follow=True, stdout=True, stderr=True):
+            text = chunk.decode("utf-8", errors="ignore") if isinstance(chunk, (bytes, bytearray)) else str(chunk)
+            tail.append(text)
+            tail_size += len(text)
+            while tail_size - len(tail[0]) >= STREAMING_LOG_TAIL:
+                tail_size -= len(tail.popleft())
+            if aborted:
+                continue
+
+            pending += text
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                if not on_line(line):
+                    aborted = True
+                    break
+
+            if aborted and stop_on_abort:
+                try:
+                    container.kill()
+                except docker.errors.APIError:
+                    pass
+                break
+
+        if not aborted and pending:
+            aborted = not on_line(pending)
+
+        if timed_out.is_set():
+            raise TimedOut()
+
+        result = container.wait()
+        exit_code = result.get("StatusCode", 1) if isinstance(result, dict) else 1
+        return "".join(tail)[-STREAMING_LOG_TAIL:], exit_code, aborted
+    except docker.errors.APIError as e:
+        return f"Docker API error: {e}", 125, False
+    finally:
+        if timer is not None:
+            timer.cancel()
+        if container is not None:
+            try:
+                container.remove(force=True)
+            except docker.errors.APIError:
+                pass
+
+
 def run_online_image(
         image_name: str,
         tool_command: List[str],
         online_experiment_contract: OnlineExperimentContractGeneral,
         tool_online_experiment_contract: OnlineExperimentContractTool,
-        verbose=False
+        verbose=False, raw_records_path: Optional[str] = None,
+        on_block: Optional[Callable[[DriverBlock], None]] = None,
+        volumes: Optional[Dict[str, Dict[str, str]]] = None, telemetry_path: Optional[str] = None
 ):
     client = docker.from_env()
     workdir = "/app"
@@ -194,104 +294,48 @@ def run_online_image(
         print(" ".join(command_driver))
 
     container = None
+    raw_records = None
+    sampler = None
     try:
         container = client.containers.run(
             image=image_name,
             command=command_driver,
-            working_dir=workdir,
+            working_dir=workdir, volumes=volumes,
             stdout=True, stderr=True,
             detach=True, remove=False,
         )
-
-        footer_acc_elapsed_s = None
-        footer_wall_clock_s = None
-        footer_total_count = None
-
-        parsed_blocks = []
-        current_block = {"output": None, "processed": None, "elapsed_ns": None}
-
-        current_output = False
-        check_for_final_error = False
-
-        final_error = None
-        unexpected_error = None
-
+        if telemetry_path is not None:
+            sampler = ContainerSampler(container)
+            sampler.start()
+
+        if raw_records_path is not None:
+            os.makedirs(os.path.dirname(raw_records_path), exist_ok=True)
+            raw_records = open(raw_records_path, "w")
+        summary = OnlineRunSummary(ns_per_unit=online_experiment_contract.schedule_ns_per_unit())
+        reader = DriverStreamReader(summary, raw_records=raw_records, on_block=on_block)
         for chunk in container.logs(stream=True, follow=True, stdout=True, stderr=True):
             text = chunk.decode("utf-8", errors="ignore") if isinstance(chunk, (bytes, bytearray)) else str(chunk)
-            if text.startswith("[Error"):
-                unexpected_error = text.strip()
-                break
-
-            if text == "\n":
-                parsed_blocks.append(current_block)
-                current_block = {"output": None, "processed": None, "elapsed_ns": None}
-                continue
-
-            if text.startswith("[Accumulative Elapsed]"):
-                payload = text.split("]")[1]
-                payload = payload.strip()
-                if payload.endswith("s"):
-                    payload = payload[:-1].strip()
-                footer_acc_elapsed_s = float(payload)
-
-            if text.startswith("[Wall Clock]"):
-                payload = text.split("]")[1]
-                payload = payload.strip()
-                if payload.endswith("s"):
-                    payload = payload[:-1].strip()
-                footer_wall_clock_s = float(payload)
-
-            if text.startswith("[Total Count]"):
-                payload = text.split("]")[1]
-                payload = payload.strip()
-                footer_total_count = int(payload)
-                check_for_final_error = True
-
-            if check_for_final_error and text.startswith("[Error"):
-                final_error = text.strip()
+            if not reader.feed(text):
                 break
-
-            if text.startswith("[Input"):
-                continue
-
-            if text.startswith("[Output"):
-                current_block["output"] = []
-                current_output = True
-                continue
-
-            if not text.startswith("[Processed") and current_output:
-                payload = text.strip()
-                current_block["output"].append(payload)
-            else:
-                current_output = False
-
-            if text.startswith("[Processed"):
-                payload = text.split("]")[1]
-                payload = payload.strip()
-                current_block["processed"] = int(payload)
-
-            if text.startswith("[Elapsed"):
-                payload = text.split("]")[1]
-                payload = payload.strip()
-                if payload.endswith("ns"):
-                    payload = payload[:-2].strip()
-                current_block["elapsed_ns"] = int(payload)
+            if sampler is not None and summary.wall_clock_s is not None:
+                sampler.mark_replay_end(summary.wall_clock_s)
+        reader.finish()
 
         # Wall-clock span of the replay (includes pacing sleeps). In real-time
         # mode this tracks the trace's timestamp span; `total_elapsed` /
         # "Runtime" is compute-only and intentionally excludes the sleeps.
-        if footer_wall_clock_s is not None:
-            print(f"Wall Clock:  {footer_wall_clock_s} s (real-time replay span)")
+        if summary.wall_clock_s is not None:
+            print(f"Wall Clock:  {summary.wall_clock_s} s (real-time replay span)")
 
         result = container.wait()
         exit_code = result.get("StatusCode", 1) if isinstance(result, dict) else 1
-        if unexpected_error:
+        if summary.unexpected_error:
             if exit_code == 200:
-                return parsed_blocks, footer_acc_elapsed_s, footer_total_count, final_error, exit_code
+                return summary, summary.accumulative_elapsed_s, summary.total_count, summary.final_error, exit_code
             if exit_code == 250:
-                return parsed_blocks, footer_acc_elapsed_s, footer_total_count, final_error, exit_code
-            raise ToolException(f"Unexpected failure with exit code ({exit_code}) {unexpected_error}")
-        return parsed_blocks, footer_acc_elapsed_s, footer_total_count, final_error, exit_code
+                return summary, summary.accumulative_elapsed_s, summary.total_count, summary.final_error, exit_code
+            raise ToolException(f"Unexpected failure with exit code ({exit_code}) {summary.unexpected_error}")
+        return summary, summary.accumulative_elapsed_s, summary.total_count, summary.final_error, exit_code
     except docker.errors.ContainerError as e:
         stderr_text = e.stderr.decode("utf-8", errors="ignore") if isinstance(e.stderr, (bytes, bytearray)) else str(
             e.stderr)
@@ -301,6 +345,12 @@ def run_online_image(
     except docker.errors.ImageNotFound:
         return "Error: Image not found", 127, [], None, None
     finally:
+        if raw_records is not None:
+            raw_records.close()
+        if sampler is not None:
+            sampler.stop()
+            os.makedirs(os.path.dirname(telemetry_path), exist_ok=True)
+            sampler.write_csv(telemetry_path)
         if container is not None:
             try:
                 container.remove(force=True)
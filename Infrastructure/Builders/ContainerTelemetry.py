@@ -0,0 +1,104 @@
+import csv
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import docker
+
+# Docker refreshes container stats about once per second, shorter intervals only repeat samples
+TELEMETRY_INTERVAL_S = 1.0
+TELEMETRY_COLUMNS = [
+    "offset_s", "cpu_percent", "rss_bytes", "throttled_periods", "throttled_s", "io_read_bytes", "io_write_bytes"
+]
+
+
+def _cpu_percent(stats: Dict) -> Optional[float]:
+    cpu, pre = stats.get("cpu_stats", {}), stats.get("precpu_stats", {})
+    cpu_delta = cpu.get("cpu_usage", {}).get("total_usage", 0) - pre.get("cpu_usage", {}).get("total_usage", 0)
+    system_delta = cpu.get("system_cpu_usage", 0) - pre.get("system_cpu_usage", 0)
+    if system_delta <= 0 or "system_cpu_usage" not in pre:
+        return None
+    cpus = cpu.get("online_cpus") or len(cpu.get("cpu_usage", {}).get("percpu_usage") or []) or 1
+    return 100.0 * cpu_delta / system_delta * cpus
+
+
+def _rss_bytes(stats: Dict) -> Optional[int]:
+    memory = stats.get("memory_stats", {})
+    detail = memory.get("stats", {})
+    # cgroup v1 reports rss, v2 anonymous memory; otherwise the usage without the page cache
+    for key in ("rss", "anon"):
+        if key in detail:
+            return detail[key]
+    if "usage" not in memory:
+        return None
+    return memory["usage"] - detail.get("inactive_file", detail.get("total_inactive_file", 0))
+
+
+def _io_bytes(stats: Dict) -> Tuple[int, int]:
+    read, write = 0, 0
+    for entry in stats.get("blkio_stats", {}).get("io_service_bytes_recursive") or []:
+        op = str(entry.get("op", "")).lower()
+        if op == "read":
+            read += entry.get("value", 0)
+        elif op == "write":
+            write += entry.get("value", 0)
+    return read, write
+
+
+def telemetry_sample(stats: Dict) -> Dict:
+    # one row of TELEMETRY_COLUMNS from a decoded docker stats record, without its offset
+    throttling = stats.get("cpu_stats", {}).get("throttling_data", {})
+    read, write = _io_bytes(stats)
+    return {
+        "cpu_percent": _cpu_percent(stats), "rss_bytes": _rss_bytes(stats),
+        "throttled_periods": throttling.get("throttled_periods", 0),
+        "throttled_s": throttling.get("throttled_time", 0) / 1e9,
+        "io_read_bytes": read, "io_write_bytes": write
+    }
+
+
+class ContainerSampler(threading.Thread):
+    # Samples a running container's stats in the background. Sample times are taken on the host's monotonic
+    # clock and moved onto the driver's clock once the [Wall Clock] footer arrives: the replay started
+    # wall_clock_s before that. Without a footer, offsets count from the container start.
+    def __init__(self, container, interval_s: float = TELEMETRY_INTERVAL_S):
+        super().__init__(daemon=True)
+        self.container = container
+        self.interval_s = interval_s
+        self.started = time.monotonic()
+        self.replay_start: Optional[float] = None
+        self.samples: List[Tuple[float, Dict]] = []
+        self.stopped = threading.Event()
+
+    def run(self):
+        last = None
+        try:
+            for stats in self.container.stats(stream=True, decode=True):
+                if self.stopped.is_set():
+                    break
+                now = time.monotonic()
+                # docker's own cadence jitters, a sample that is slightly early still counts
+                if last is not None and now - last < 0.9 * self.interval_s:
+                    continue
+                last = now
+                self.samples.append((now, telemetry_sample(stats)))
+        except (docker.errors.APIError, OSError, ValueError):
+            pass  # the container is gone, or its stats stream closed with it
+
+    def mark_replay_end(self, wall_clock_s: float):
+        if self.replay_start is None:
+            self.replay_start = time.monotonic() - wall_clock_s
+
+    def stop(self, timeout: float = 2.0):
+        self.stopped.set()
+        self.join(timeout)
+
+    def rows(self) -> List[Dict]:
+        origin = self.replay_start if self.replay_start is not None else self.started
+        return [{"offset_s": t - origin, **sample} for (t, sample) in list(self.samples)]
+
+    def write_csv(self, path: str):
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=TELEMETRY_COLUMNS)
+            writer.writeheader()
+            writer.writerows(self.rows())
@@ -0,0 +1,270 @@
+import json
+import math
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, TextIO
+
+from Infrastructure.DataTypes.Types.LatencyHistogram import LatencyHistogram
+from Infrastructure.DataTypes.Types.SteadyState import SteadyStateDetector
+from Infrastructure.DataTypes.Verification.OutputDigest import VerificationStatus
+
+SERIES_CAPACITY = 4096
+
+
+@dataclass
+class DriverBlock:
+    # one step of the driver: the [Output lines, [Processed count and [Elapsed latency
+    processed: Optional[int] = None
+    elapsed_ns: Optional[int] = None
+    output: Optional[List[str]] = None
+    ts: Optional[int] = None  # timestamp of the last [Input of the step
+    wall_offset_ns: Optional[int] = None  # send instant after the pacing sleep, relative to the replay start
+
+    def as_record(self) -> Dict:
+        return {
+            "type": "block", "processed": self.processed, "elapsed_ns": self.elapsed_ns, "output": self.output,
+            "ts": self.ts, "wall_offset_ns": self.wall_offset_ns
+        }
+
+
+class RunningStats:
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def as_dict(self) -> Dict:
+        return {"count": self.count, "mean": self.mean, "std": self.std(), "min": self.min, "max": self.max}
+
+
+class DecimatedSeries:
+    # At most capacity (processed, elapsed_ns) pairs spread over the whole run. When full, every second pair is
+    # dropped and only every stride-th following block is kept.
+    def __init__(self, capacity: int = SERIES_CAPACITY):
+        self.capacity = capacity
+        self.stride = 1
+        self.seen = 0
+        self.pairs: List[List[int]] = []
+
+    def add(self, processed: int, elapsed_ns: int):
+        if self.seen % self.stride == 0:
+            self.pairs.append([processed, elapsed_ns])
+            if len(self.pairs) >= self.capacity:
+                self.pairs = self.pairs[::2]
+                self.stride *= 2
+        self.seen += 1
+
+
+class OmissionCorrection:
+    # Coordinated omission: while the monitor stalls, the driver does not send, so [Elapsed] never covers the
+    # wait of the inputs that were due. Measured against the intended send time of the schedule, a step's
+    # latency is its send delay plus [Elapsed]. The actual send is the [Wall Offset] if the driver reports it,
+    # otherwise the later of the intended time and the end of the previous step.
+    def __init__(self, ns_per_unit: float):
+        self.ns_per_unit = ns_per_unit
+        self.first_ts: Optional[int] = None
+        self.free_ns = 0
+
+    def latency(self, block: DriverBlock) -> Optional[int]:
+        if block.ts is None or block.elapsed_ns is None:
+            return None
+        if self.first_ts is None:
+            self.first_ts = block.ts
+        intended = int((block.ts - self.first_ts) * self.ns_per_unit)
+        sent = block.wall_offset_ns if block.wall_offset_ns is not None else max(intended, self.free_ns)
+        self.free_ns = sent + block.elapsed_ns
+        return max(0, sent - intended) + block.elapsed_ns
+
+
+class OnlineRunSummary:
+    # fixed-size aggregate of a driver run, independent of the number of blocks; the corrected series and
+    # histogram are only kept for paced (real-time) runs, which have a schedule
+    def __init__(self, series_capacity: int = SERIES_CAPACITY, ns_per_unit: Optional[float] = None):
+        self.blocks = 0
+        self.output_lines = 0
+        self.elapsed_ns = RunningStats()
+        self.processed = RunningStats()
+        self.series = DecimatedSeries(series_capacity)
+        self.wall_series = DecimatedSeries(series_capacity)  # (processed, [Wall Offset]) of the same steps
+        self.latency = LatencyHistogram()
+        self.correction = OmissionCorrection(ns_per_unit) if ns_per_unit is not None else None
+        self.corrected_series = DecimatedSeries(series_capacity)
+        self.corrected_latency = LatencyHistogram()
+        self.steady_state = SteadyStateDetector()
+        self.accumulative_elapsed_s: Optional[float] = None
+        self.wall_clock_s: Optional[float] = None
+        self.total_count: Optional[int] = None
+        self.unexpected_error: Optional[str] = None
+        self.final_error: Optional[str] = None
+        self.verified: Optional[bool] = None  # None unless the output was streamed through a verifier
+        self.verification: Optional[str] = None  # verifier message or why the run was not verified
+        self.verification_status: Optional[VerificationStatus] = None
+
+    def add_block(self, block: DriverBlock):
+        self.blocks += 1
+        self.output_lines += len(block.output) if block.output is not None else 0
+        if block.processed is not None:
+            self.processed.add(block.processed)
+        if block.elapsed_ns is not None:
+            self.elapsed_ns.add(block.elapsed_ns)
+            self.latency.record(block.elapsed_ns)
+            self.steady_state.record(block.elapsed_ns, block.processed, block.wall_offset_ns)
+        if block.processed is not None and block.elapsed_ns is not None:
+            self.series.add(block.processed, block.elapsed_ns)
+            if block.wall_offset_ns is not None:
+                self.wall_series.add(block.processed, block.wall_offset_ns)
+        corrected = self.correction.latency(block) if self.correction is not None else None
+        if corrected is not None:
+            self.corrected_latency.record(corrected)
+            if block.processed is not None:
+                self.corrected_series.add(block.processed, corrected)
+
+    def output_pairs(self) -> List[List[int]]:
+        return self.series.pairs
+
+    def corrected_output_pairs(self) -> List[List[int]]:
+        return self.corrected_series.pairs
+
+    def wall_output_pairs(self) -> List[List[int]]:
+        # index-aligned with output_pairs only if every step reported its [Wall Offset]
+        return self.wall_series.pairs if self.wall_series.seen == self.series.seen else []
+
+    def as_dict(self) -> Dict:
+        steady = self.steady_state.result()
+        return {
+            "blocks": self.blocks, "output_lines": self.output_lines,
+            "elapsed_ns": self.elapsed_ns.as_dict(), "processed": self.processed.as_dict(),
+            "series_stride": self.series.stride, "latency_histogram": self.latency.encode(),
+            "corrected_latency_histogram": self.corrected_latency.encode() if self.correction is not None else None,
+            "warmup_s": steady.warmup_s if steady is not None else None,
+            "warmup_blocks": steady.warmup_blocks if steady is not None else None,
+            "steady_latency_histogram": steady.histogram.encode() if steady is not None else None,
+            "accumulative_elapsed_s": self.accumulative_elapsed_s,
+            "wall_clock_s": self.wall_clock_s, "total_count": self.total_count
+        }
+
+
+def _input_ts(line: str) -> Optional[int]:
+    # csv inputs carry ts=<n>, log inputs start with @<n>
+    payload = line.split("]", 1)[1] if "]" in line else line
+    start = payload.find("ts=")
+    start = start + 3 if start >= 0 else payload.find("@") + 1
+    if start <= 0:
+        return None
+    end = start
+    while end < len(payload) and payload[end].isdigit():
+        end += 1
+    return int(payload[start:end]) if end > start else None
+
+
+def _payload(line: str, unit: str = "") -> str:
+    payload = line.split("]")[1].strip()
+    if unit and payload.endswith(unit):
+        payload = payload[:-len(unit)].strip()
+    return payload
+
+
+class DriverStreamReader:
+    # Turns the line protocol of the OnlineExperimentDriver into block records while the log is streamed. Only
+    # the open block is held in memory; closed blocks go to the summary, the optional raw record file (JSON
+    # lines) and the optional on_block callback.
+    def __init__(
+            self, summary: OnlineRunSummary, raw_records: Optional[TextIO] = None,
+            on_block: Optional[Callable[[DriverBlock], None]] = None
+    ):
+        self.summary = summary
+        self.raw_records = raw_records
+        self.on_block = on_block
+        self.block = DriverBlock()
+        self.in_output = False
+        self.footer_seen = False
+        self.pending = ""
+
+    def feed(self, chunk: str) -> bool:
+        # False once an [Error line ended the stream
+        lines = (self.pending + chunk).split("\n")
+        self.pending = lines.pop()
+        for line in lines:
+            if not self._line(line):
+                return False
+        return True
+
+    def finish(self):
+        if self.pending:
+            self._line(self.pending)
+            self.pending = ""
+        if self.raw_records is not None:
+            self.raw_records.write(json.dumps({"type": "summary", **self.summary.as_dict()}) + "\n")
+
+    def _close_block(self):
+        block, self.block = self.block, DriverBlock()
+        self.summary.add_block(block)
+        if self.raw_records is not None:
+            self.raw_records.write(json.dumps(block.as_record()) + "\n")
+        if self.on_block is not None:
+            self.on_block(block)
+
+    def _line(self, line: str) -> bool:
+        if line[:1] != "[":
+            # payload lines are the bulk of the stream, they are only inspected inside an [Output block
+            if not line:
+                self._close_block()
+                self.in_output = False
+            elif self.in_output:
+                self.block.output.append(line.strip())
+            return True
+
+        if line.startswith("[Error"):
+            self.summary.unexpected_error = line.strip()
+            if self.footer_seen:
+                self.summary.final_error = line.strip()
+            if self.raw_records is not None:
+                self.raw_records.write(json.dumps({"type": "error", "message": line.strip()}) + "\n")
+            return False
+        if line.startswith("[Input"):
+            ts = _input_ts(line)
+            if ts is not None:
+                self.block.ts = ts
+            return True
+        if line.startswith("[Output"):
+            self.block.output = []
+            self.in_output = True
+            return True
+        if line.startswith("[Processed"):
+            self.in_output = False
+            self.block.processed = int(_payload(line))
+            return True
+        if self.in_output:
+            self.block.output.append(line.strip())
+
+        if line.startswith("[Elapsed"):
+            self.block.elapsed_ns = int(_payload(line, "ns"))
+        elif line.startswith("[Wall Offset]"):
+            self.block.wall_offset_ns = int(_payload(line, "ns"))
+        elif line.startswith("[Accumulative Elapsed]"):
+            self.summary.accumulative_elapsed_s = float(_payload(line, "s"))
+        elif line.startswith("[Wall Clock]"):
+            self.summary.wall_clock_s = float(_payload(line, "s"))
+        elif line.startswith("[Total Count]"):
+            self.summary.total_count = int(_payload(line))
+            self.footer_seen = True
+        return True
+
+
+def read_raw_records(path: str) -> Iterator[Dict]:
+    with open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
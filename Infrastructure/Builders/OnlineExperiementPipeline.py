@@ -2,82 +2,93 @@ import os
 import io
 import shutil
 import tarfile
+import tempfile
+from hashlib import sha256
 from typing import Optional, Dict
 
 import docker
 from docker.errors import APIError
 
-from Infrastructure.Builders.BuilderUtilities import image_building, ImageBuildException, image_exists
+from Infrastructure.Builders.BuilderUtilities import image_building, ImageBuildException, image_exists, image_id
 from Infrastructure.Builders.ToolBuilder.AbstractToolImageManager import AbstractToolImageManager
-from Infrastructure.constants import Policy_File, Signature_File, ADDITIONAL_FOLDER
+from Infrastructure.constants import Policy_File, Signature_File, ADDITIONAL_FOLDER, IMAGE_POSTFIX
+
+ONLINE_WORKDIR = "/app"
+STREAM_BUFFER_BYTES = 1 << 20
+CACHE_ENTRY_FILE = ".extracted"
 
 
 def build_pipeline(
         tool_image_manager: AbstractToolImageManager,
-        path_to_build, path_to_archive, data_source: str, path_to_folder: str,
-        policy_file: str, signature_file: Optional[str], target_image_name: str,
+        path_to_build, path_to_archive, target_image_prefix: str,
         compilation_details: Optional[Dict[str, str]] = None, verbose: bool = False
-):
+) -> str:
+    # The image only holds the driver and the tool binary, trace and policy are mounted by run_online_image. It
+    # is keyed by both image ids and the Dockerfile, so repeats and settings with the same binaries reuse it.
+    driver_docker = f"{path_to_archive}/Docker/Utilities/OnlineExperimentDriver"
+    driver_tool_name = "online_experiment_driver"
+    if not build_image_wrapper(driver_docker, driver_tool_name, verbose=verbose):
+        raise ImageBuildException(f"Failed to build driver image: {driver_tool_name}")
+
     path = f"{path_to_build}/OnlineExperimentDriver"
+    tool_name = tool_image_manager.get_image_name()
+    if compilation_details is not None:
+        if not build_image_wrapper(tool_name, path, args=compilation_details, verbose=verbose):
+            raise ImageBuildException(f"Failed to build driver image: {tool_name}")
+
+    dockerfile = f"{path_to_archive}/Docker/Utilities/OnlineExperimentTemplate/Dockerfile"
+    with open(dockerfile, "rb") as f:
+        dockerfile_hash = sha256(f.read()).hexdigest()
+    key = online_image_key(image_id(tool_name), image_id(driver_tool_name), dockerfile_hash, compilation_details)
+    target_image_name = f"{target_image_prefix}_{key}{IMAGE_POSTFIX}" if key is not None else f"{target_image_prefix}{IMAGE_POSTFIX}"
+    if key is not None and image_exists(target_image_name):
+        if verbose:
+            print(f"Image {target_image_name} already exists. Skipping build.")
+        return target_image_name
+
     if os.path.exists(path):
         shutil.rmtree(path)
     os.makedirs(path, exist_ok=True)
-
-    driver_docker = f"{path_to_archive}/Docker/Utilities/OnlineExperimentDriver"
-    driver_tool_name = "online_experiment_driver"
     build_stage(
-        temporary_build_folder=path, tool_image_manager=tool_image_manager,
-        driver_docker=driver_docker, driver_tool_name=driver_tool_name, path_to_folder=path_to_folder,
-        data_source=data_source, policy_file=policy_file, signature_file=signature_file,
-        compilation_details=compilation_details, verbose=verbose
+        temporary_build_folder=path, tool_name=tool_name, driver_tool_name=driver_tool_name,
+        cache_root=f"{path_to_build}/BinaryCache", verbose=verbose
     )
 
-    # build the final image with the copied dockerfile and the copied data
-    shutil.copy(f"{path_to_archive}/Docker/Utilities/OnlineExperimentTemplate/Dockerfile", path)
+    # build the final image with the copied dockerfile and the extracted binaries
+    shutil.copy(dockerfile, path)
     image_building(image_name=target_image_name, build_dir=path)
+    return target_image_name
 
 
-def build_stage(
-        tool_image_manager: AbstractToolImageManager, temporary_build_folder: str,
-        driver_docker: str, driver_tool_name: str, path_to_folder: str,
-        data_source: str, policy_file: str, signature_file: Optional[str],
-        compilation_details: Optional[Dict[str, str]] = None, verbose: bool = False
-):
-    if compilation_details is None:
-        extract_binary(tool_image_manager.get_image_name(), temporary_build_folder, "tool", verbose=verbose)
-    else:
-        tool_name = tool_image_manager.get_image_name()
-        if not build_image_wrapper(tool_name, temporary_build_folder, args=compilation_details, verbose=verbose):
-            raise ImageBuildException(f"Failed to build driver image: {tool_name}")
-        extract_binary(tool_name, temporary_build_folder, "tool", verbose=verbose)
-
-    # build, extract and move driver binary to build folder
-    if not build_image_wrapper(driver_docker, driver_tool_name, verbose=verbose):
-        raise ImageBuildException(f"Failed to build driver image: {driver_tool_name}")
-    extract_binary(driver_tool_name, temporary_build_folder, "driver", verbose=verbose)
-
-    # pass the file or data script to the build folder
-    move_data_source(temporary_build_folder, path_to_folder, data_source)
-    file_dict = {Policy_File(): policy_file, Signature_File(): signature_file}
-    move_additional_data(temporary_build_folder, path_to_folder, ADDITIONAL_FOLDER, file_dict)
-
+def online_image_key(tool_image_id: Optional[str], driver_image_id: Optional[str], dockerfile_hash: str,
+                     compilation_details: Optional[Dict[str, str]] = None) -> Optional[str]:
+    # None if an image id is unknown, the image is then rebuilt every time
+    if tool_image_id is None or driver_image_id is None:
+        return None
+    details = sorted((compilation_details or dict()).items())
+    return sha256(f"{tool_image_id}|{driver_image_id}|{dockerfile_hash}|{details}".encode("utf-8")).hexdigest()[:16]
 
-def move_data_source(temporary_build_folder: str, path_to_folder: str, data_source: str):
-    dest_dir = os.path.join(temporary_build_folder, "data")
-    os.makedirs(dest_dir, exist_ok=True)
 
-    dest_path = os.path.join(dest_dir, "data")
-    shutil.copy(f"{path_to_folder}/{data_source}", dest_path)
+def build_stage(temporary_build_folder: str, tool_name: str, driver_tool_name: str, cache_root: Optional[str] = None,
+                verbose: bool = False):
+    extract_binary(tool_name, temporary_build_folder, "tool", verbose=verbose, cache_root=cache_root)
+    extract_binary(driver_tool_name, temporary_build_folder, "driver", verbose=verbose, cache_root=cache_root)
 
 
-def move_additional_data(temporary_build_folder: str, path_to_folder: str, folder_name: str, additional_data: dict[str, str]):
-    dest_dir = os.path.join(temporary_build_folder, folder_name)
-    os.makedirs(dest_dir, exist_ok=True)
-    for data_name, data_path in additional_data.items():
+def online_volumes(path_to_folder: str, data_source: str, policy_file: str,
+                   signature_file: Optional[str], data_files: Optional[Dict[str, str]] = None) -> Dict[str, Dict[str, str]]:
+    # files of the setting as read-only bind mounts at the paths the driver and tool commands expect
+    volumes = {os.path.abspath(f"{path_to_folder}/{data_source}"): {"bind": f"{ONLINE_WORKDIR}/data/data", "mode": "ro"}}
+    for (name, data_path) in (data_files or dict()).items():
+        volumes[os.path.abspath(f"{path_to_folder}/{data_path}")] = {"bind": f"{ONLINE_WORKDIR}/data/{name}", "mode": "ro"}
+    file_dict = {Policy_File(): policy_file, Signature_File(): signature_file}
+    for data_name, data_path in file_dict.items():
         if not data_path:
             continue
-        dest_path = os.path.join(dest_dir, data_name)
-        shutil.copy(f"{path_to_folder}/{data_path}", dest_path)
+        volumes[os.path.abspath(f"{path_to_folder}/{data_path}")] = {
+            "bind": f"{ONLINE_WORKDIR}/{ADDITIONAL_FOLDER}/{data_name}", "mode": "ro"
+        }
+    return volumes
 
 
 def build_image_wrapper(dockerfile_path: str, image_name: str, args: Optional[Dict[str, str]] = None, verbose: bool = False) -> bool:
@@ -90,7 +101,74 @@ def build_image_wrapper(dockerfile_path: str, image_name: str, args: Optional[Di
     return True
 
 
-def extract_binary(image_name: str, tmp_binary_location: str, binary_name: str, verbose: bool = False) -> tuple[str, str]:
+class _ChunkStream(io.RawIOBase):
+    # file-like view on the chunks of get_archive, so tarfile reads the archive while it is downloaded
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.current = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self.current:
+            try:
+                self.current = memoryview(next(self.chunks))
+            except StopIteration:
+                return 0
+        size = min(len(buffer), len(self.current))
+        buffer[:size] = self.current[:size]
+        self.current = self.current[size:]
+        return size
+
+
+def _open_archive_stream(chunks) -> tarfile.TarFile:
+    return tarfile.open(fileobj=io.BufferedReader(_ChunkStream(chunks), buffer_size=STREAM_BUFFER_BYTES), mode="r|*")
+
+
+def extract_binary(image_name: str, tmp_binary_location: str, binary_name: str, verbose: bool = False,
+                   cache_root: Optional[str] = None) -> tuple[str, str]:
+    # With a cache root, the binaries of an image are extracted once per image id and copied from the cache
+    # afterwards. Entries are published by renaming a finished extraction, so a failed one is never reused.
+    os.makedirs(tmp_binary_location, exist_ok=True)
+    if not os.access(tmp_binary_location, os.W_OK):
+        raise PermissionError(f"Destination directory {tmp_binary_location} is not writable")
+    key = image_id(image_name) if cache_root is not None else None
+    if key is None:
+        return _extract_binary(image_name, tmp_binary_location, binary_name, verbose=verbose)
+
+    entry = os.path.join(cache_root, f"{key.replace(':', '_')}_{binary_name}")
+    if not os.path.exists(entry):
+        os.makedirs(cache_root, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".partial_", dir=cache_root)
+        try:
+            extracted_path, _ = _extract_binary(image_name, staging, binary_name, verbose=verbose)
+            with open(os.path.join(staging, CACHE_ENTRY_FILE), "w") as f:
+                f.write(os.path.relpath(extracted_path, staging))
+            os.replace(staging, entry)
+        except OSError:
+            # another build published the same entry first
+            if not os.path.exists(entry):
+                raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+    elif verbose:
+        print(f"Binary of {image_name} taken from cache {entry}")
+
+    with open(os.path.join(entry, CACHE_ENTRY_FILE), "r") as f:
+        relative_path = f.read().strip()
+    for name in os.listdir(entry):
+        if name == CACHE_ENTRY_FILE:
+            continue
+        source, target = os.path.join(entry, name), os.path.join(tmp_binary_location, name)
+        if os.path.isdir(source):
+            shutil.copytree(source, target, symlinks=True, dirs_exist_ok=True)
+        else:
+            shutil.copy2(source, target)
+    return os.path.normpath(os.path.join(tmp_binary_location, relative_path)), binary_name
+
+
+def _extract_binary(image_name: str, tmp_binary_location: str, binary_name: str, verbose: bool = False) -> tuple[str, str]:
     client = docker.from_env()
     extracted_binary_path = None
     requested_name = binary_name
@@ -98,14 +176,9 @@ def extract_binary(image_name: str, tmp_binary_location: str, binary_name: str,
     try:
         container = client.containers.create(image_name, detach=True)
         try:
-            os.makedirs(tmp_binary_location, exist_ok=True)
-            if not os.access(tmp_binary_location, os.W_OK):
-                raise PermissionError(f"Destination directory {tmp_binary_location} is not writable")
-
             try:
-                archive_bytes, _ = container.get_archive("/usr/local/bin")
-                tar_stream = io.BytesIO(b"".join(archive_bytes))
-                with tarfile.open(fileobj=tar_stream, mode='r:*') as tar:
+                archive_chunks, _ = container.get_archive("/usr/local/bin")
+                with _open_archive_stream(archive_chunks) as tar:
                     tar.extractall(path=tmp_binary_location)
                 if verbose:
                     print(f"Binary extracted successfully from /usr/local/bin to {tmp_binary_location}")
@@ -117,10 +190,9 @@ def extract_binary(image_name: str, tmp_binary_location: str, binary_name: str,
                     shutil.rmtree(f"{tmp_binary_location}/bin")
 
             except APIError:
-                archive_bytes, _ = container.get_archive("/")
-                tar_stream = io.BytesIO(b"".join(archive_bytes))
-                with tarfile.open(fileobj=tar_stream, mode='r:*') as tar:
-                    for member in tar.getmembers():
+                archive_chunks, _ = container.get_archive("/")
+                with _open_archive_stream(archive_chunks) as tar:
+                    for member in tar:
                         if member.name == '/' or member.name.startswith('/.') or '/' in member.name.lstrip('/'):
                             continue
                         if member.isfile():
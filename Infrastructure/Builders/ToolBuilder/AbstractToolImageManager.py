@@ -1,11 +1,17 @@
 from abc import ABC, abstractmethod
+from typing import Optional
 
+from Infrastructure.Builders.BuilderUtilities import image_id
 from Infrastructure.Frontend.CLI.cli_args import CLIArgs
 
 
 class AbstractToolImageManager(ABC):
     @abstractmethod
-    def run_offline(self, path_to_data, parameters, time_on=None, time_out=None, measure=True, name=None):
+    def run_offline(self, path_to_data, parameters, time_on=None, time_out=None, measure=True, name=None, output_file=None):
+        pass
+
+    @abstractmethod
+    def run_offline_streaming(self, path_to_data, parameters, on_line, time_out=None, measure=True, name=None, stop_on_abort=False):
         pass
 
     @abstractmethod
@@ -19,3 +25,12 @@ class AbstractToolImageManager(ABC):
     @abstractmethod
     def get_cli_args(self) -> CLIArgs:
         pass
+
+    @abstractmethod
+    def get_build_path(self) -> str:
+        pass
+
+    def get_image_id(self) -> Optional[str]:
+        if getattr(self, "_image_id", None) is None:
+            self._image_id = image_id(self.get_image_name())
+        return self._image_id
@@ -0,0 +1,122 @@
+import os
+import re
+import shutil
+import subprocess
+from typing import List
+from urllib.parse import unquote
+
+from Infrastructure.Builders.BuilderUtilities import image_building, image_exists, to_prop_file, ImageBuildException
+from Infrastructure.DataLoader.Resolver import ToolResolver
+from Infrastructure.DataTypes.FileRepresenters.PropertiesHandler import PropertiesHandler
+from Infrastructure.DataTypes.Types.custome_type import OnlineOffline
+from Infrastructure.constants import (IMAGE_POSTFIX, BUILD_ARG_GIT_BRANCH, BUILD_ARG_GIT_COMMIT, DOCKERFILE_VALUE,
+                                      PROP_FILES_VALUE, META_FILE_VALUE, VERSION_KEY)
+
+LOCAL_SOURCE = "mf_source.git"
+LOCAL_SOURCE_PATH = f"/tmp/{LOCAL_SOURCE}"
+LOCAL_BRANCH = "mf-local"
+
+_CLONE = re.compile(r"git\s+clone\b(?P<options>[^\n]*?)\s+([\"']?)(?P<url>https?://[^\s\"']+)\2")
+_BRANCH_OPTION = re.compile(r"\s+(?:--branch|-b)(?:=|\s+)(?:\"[^\"]*\"|'[^']*'|\S+)")
+
+
+def git_output(repo: str, *args: str) -> str:
+    result = subprocess.run(["git", "-C", repo, *args], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise ValueError(f"git {' '.join(args)} failed in {repo}: {result.stderr.strip()}")
+    return result.stdout.strip()
+
+
+def resolve_commit(repo: str, ref: str) -> str:
+    return git_output(repo, "rev-parse", "--verify", f"{ref}^{{commit}}")
+
+
+def commit_range(repo: str, good: str, bad: str) -> List[str]:
+    # good, the first-parent commits after it and bad, oldest first
+    good_commit, bad_commit = resolve_commit(repo, good), resolve_commit(repo, bad)
+    if subprocess.run(["git", "-C", repo, "merge-base", "--is-ancestor", good_commit, bad_commit]).returncode != 0:
+        raise ValueError(f"{good} is not an ancestor of {bad} in {repo}")
+    between = git_output(repo, "rev-list", "--first-parent", "--ancestry-path", "--reverse", f"{good_commit}..{bad_commit}")
+    return [good_commit] + between.split()
+
+
+def local_dockerfile(dockerfile: str, repo: str) -> str:
+    # Points the git clone of the tool repository at a copy of the local clone in the build context. The branch
+    # option is dropped, HEAD of the copy is the commit to build.
+    repo_name = unquote(repo).split("/")[-1].lower()
+    for match in _CLONE.finditer(dockerfile):
+        url = match.group("url").rstrip("/")
+        if url.split("/")[-1].lower().removesuffix(".git") != repo_name:
+            continue
+        options = _BRANCH_OPTION.sub("", match.group("options"))
+        clone = f'git -c "safe.directory=*" clone{options} {LOCAL_SOURCE_PATH}'
+        # without a target directory git would name the checkout after the copy instead of the repository
+        rest = dockerfile[match.end():].split("\n")[0].strip()
+        if not rest or rest.startswith(("&&", "\\", ";", "|")):
+            clone += f" {url.split('/')[-1].removesuffix('.git')}"
+        # the COPY goes before the instruction the clone belongs to, which may start lines above it
+        lines = dockerfile[:match.start()].split("\n")
+        start = len(lines) - 1
+        while start > 0 and lines[start - 1].rstrip().endswith("\\"):
+            start -= 1
+        head = "\n".join(lines[:start])
+        instruction = "\n".join(lines[start:])
+        copy = f"COPY {LOCAL_SOURCE} {LOCAL_SOURCE_PATH}\n"
+        return (f"{head}\n" if start else "") + copy + instruction + clone + dockerfile[match.end():]
+    raise ImageBuildException(f"The Dockerfile does not clone the {repo} repository")
+
+
+class LocalSourceImage:
+    # Builds the image of a tool at a commit of a local clone instead of the remote repository. The image has the
+    # name and build folder metadata the ToolManager gives a commit pinned tool, so it is built once per commit
+    # and an experiment with that commit in its YAML uses it without building.
+    def __init__(self, tool: str, source: str, path_to_project: str, runtime_setting: OnlineOffline):
+        self.tool = tool
+        self.source = os.path.abspath(source)
+        self.runtime_setting = runtime_setting
+        path_to_archive = f"{path_to_project}/Archive"
+        path_to_named_archive = f"{path_to_archive}/Docker/Tools/{tool}"
+        linked = ToolResolver(tool, path_to_archive, path_to_named_archive, f"{path_to_project}/Infrastructure") \
+            .symbolic_linked(runtime_setting)
+        self.image_tool = linked if linked else tool
+        self.archive = f"{path_to_archive}/Docker/Tools/{self.image_tool}"
+        self.parent_path = f"{path_to_project}/Infrastructure/build/Monitor/{tool}"
+        if not os.path.exists(f"{self.archive}/{runtime_setting.to_string()}{DOCKERFILE_VALUE}"):
+            raise ImageBuildException(f"No local Dockerfile for {self.image_tool} ({runtime_setting.to_string()})")
+
+    def image_name(self, commit: str) -> str:
+        return f"{self.image_tool.lower()}_{commit}_{self.runtime_setting.to_string()}{IMAGE_POSTFIX}"
+
+    def build(self, ref: str) -> str:
+        commit = resolve_commit(self.source, ref)
+        image_name = self.image_name(commit)
+        path = f"{self.parent_path}/{commit}"
+        if image_exists(image_name):
+            print(f"    Exists {self.tool} - {commit}")
+            os.makedirs(path, exist_ok=True)
+            to_prop_file(path, META_FILE_VALUE, {VERSION_KEY: commit})
+            return commit
+
+        context = f"{path}/local_source"
+        shutil.rmtree(context, ignore_errors=True)
+        shutil.copytree(f"{self.archive}/{self.runtime_setting.to_string()}", context)
+        try:
+            repo = PropertiesHandler.from_file(self.archive + PROP_FILES_VALUE).get_attr("repo")
+            with open(f"{context}{DOCKERFILE_VALUE}", "r") as f:
+                dockerfile = local_dockerfile(f.read(), repo)
+            with open(f"{context}{DOCKERFILE_VALUE}", "w") as f:
+                f.write(dockerfile)
+
+            snapshot = f"{context}/{LOCAL_SOURCE}"
+            subprocess.run(["git", "clone", "--quiet", "--bare", self.source, snapshot], check=True)
+            git_output(snapshot, "update-ref", f"refs/heads/{LOCAL_BRANCH}", commit)
+            git_output(snapshot, "symbolic-ref", "HEAD", f"refs/heads/{LOCAL_BRANCH}")
+
+            # cached layers keep the dependency installs before the source copy across commits
+            args = {BUILD_ARG_GIT_BRANCH: LOCAL_BRANCH, BUILD_ARG_GIT_COMMIT: commit}
+            if not image_building(image_name, context, args, nocache=False):
+                raise ImageBuildException(f"Failed to build {self.tool} @ {commit} from {self.source}")
+        finally:
+            shutil.rmtree(context, ignore_errors=True)
+        to_prop_file(path, META_FILE_VALUE, {VERSION_KEY: commit})
+        return commit
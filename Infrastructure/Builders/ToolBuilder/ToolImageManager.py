@@ -1,11 +1,12 @@
 import os.path
+import shlex
 from typing import Optional
 
 from Infrastructure.Frontend.CLI.cli_args import CLIArgs
 from Infrastructure.DataLoader import init_repo_fetcher
 from Infrastructure.DataLoader.Downloader import MonitoringFaceDownloader
 from Infrastructure.DataLoader.Resolver import Location
-from Infrastructure.Builders.BuilderUtilities import image_building, run_offline_image, to_prop_file, image_exists, ImageBuildException
+from Infrastructure.Builders.BuilderUtilities import image_building, run_offline_image, run_offline_image_streaming, to_prop_file, image_exists, ImageBuildException
 from Infrastructure.DataTypes.FileRepresenters.PropertiesHandler import PropertiesHandler
 from Infrastructure.DataTypes.Types.custome_type import BranchOrRelease, OnlineOffline
 from Infrastructure.Builders.ToolBuilder.AbstractToolImageManager import AbstractToolImageManager
@@ -19,6 +20,25 @@ def to_file(path, name, content):
         f.write(content)
 
 
+def offline_contract(path_to_data, inner_name, parameters, measure, output_file=None):
+    # with an output file, stdout is written to /data/scratch/<output_file> and only stderr reaches the logs
+    inner_contract_ = dict()
+    inner_contract_[VOLUMES_KEY] = {path_to_data: {'bind': '/data', 'mode': 'rw'}}
+    # the shell must see every argument as one word, an empty name runs the image entrypoint
+    tool_cmd = shlex.join([inner_name] + parameters if inner_name else parameters)
+    redirect = f" > {shlex.quote(f'/data/scratch/{output_file}')}" if output_file else ""
+    if measure:
+        inner_contract_[COMMAND_KEY] = ["/bin/sh", "-c",
+                                        f"mkdir -p /data/scratch && /usr/bin/time -v -o /tmp/stats.txt {tool_cmd}{redirect}; "
+                                        f"e=$?; cp /tmp/stats.txt /data/scratch/stats.txt 2>/dev/null; exit $e"]
+    elif output_file:
+        inner_contract_[COMMAND_KEY] = ["/bin/sh", "-c", f"mkdir -p /data/scratch && {tool_cmd}{redirect}"]
+    else:
+        inner_contract_[COMMAND_KEY] = [inner_name] + parameters
+    inner_contract_[WORKDIR_KEY] = "/data"
+    return inner_contract_
+
+
 def remote_content_handler(path_to_named_archive, path_to_infra, name, interaction: Optional[OnlineOffline] = None):
     content = MonitoringFaceDownloader(path_to_infra).get_content(name)
     if content is None:
@@ -92,6 +112,9 @@ class IndirectToolImageManager(AbstractToolImageManager):
     def get_cli_args(self) -> CLIArgs:
         return self.cli_args
 
+    def get_build_path(self) -> str:
+        return self.path
+
     def _build_image(self):
         if self.commit:
             to_prop_file(self.path, META_FILE_VALUE, {VERSION_KEY: self.commit})
@@ -99,23 +122,19 @@ class IndirectToolImageManager(AbstractToolImageManager):
             fl = PropertiesHandler.from_file(self.linked_named_archive + PROP_FILES_VALUE)
             version = init_repo_fetcher(fl, self.path_to_infra).get_hash(self.branch)
             to_prop_file(self.path, META_FILE_VALUE, {VERSION_KEY: version})
+        self._image_id = None
         return image_building(self.image_name, f"{self.linked_named_archive}/{self.runtime_setting.to_string()}", self.args)
 
-    def run_offline(self, path_to_data, parameters, time_on=None, time_out=None, measure=True, name=None):
-        inner_contract_ = dict()
-        inner_contract_[VOLUMES_KEY] = {path_to_data: {'bind': '/data', 'mode': 'rw'}}
-
+    def run_offline(self, path_to_data, parameters, time_on=None, time_out=None, measure=True, name=None, output_file=None):
         inner_name = name if name is not None else self.binary_name
-        if measure and self.cli_args.measure:
-            tool_cmd = " ".join([inner_name] + parameters)
-            inner_contract_[COMMAND_KEY] = ["/bin/sh", "-c",
-                                            f"mkdir -p /data/scratch && /usr/bin/time -v -o /tmp/stats.txt {tool_cmd}; "
-                                            f"e=$?; cp /tmp/stats.txt /data/scratch/stats.txt 2>/dev/null; exit $e"]
-        else:
-            inner_contract_[COMMAND_KEY] = [inner_name] + parameters
-        inner_contract_[WORKDIR_KEY] = "/data"
+        inner_contract_ = offline_contract(path_to_data, inner_name, parameters, measure and self.cli_args.measure, output_file)
         return run_offline_image(self.image_name, inner_contract_, verbose=self.cli_args.verbose, time_on=time_on, time_out=time_out, is_tool_image=True)
 
+    def run_offline_streaming(self, path_to_data, parameters, on_line, time_out=None, measure=True, name=None, stop_on_abort=False):
+        inner_name = name if name is not None else self.binary_name
+        inner_contract_ = offline_contract(path_to_data, inner_name, parameters, measure and self.cli_args.measure)
+        return run_offline_image_streaming(self.image_name, inner_contract_, on_line, verbose=self.cli_args.verbose, time_out=time_out, is_tool_image=True, stop_on_abort=stop_on_abort)
+
 
 class DirectToolImageManager(AbstractToolImageManager):
     def __init__(self, name, branch, release, commit, path_to_build, path_to_archive, path_to_infra, location, cli_args: CLIArgs, runtime_setting: OnlineOffline):
@@ -167,6 +186,9 @@ class DirectToolImageManager(AbstractToolImageManager):
     def get_cli_args(self) -> CLIArgs:
         return self.cli_args
 
+    def get_build_path(self) -> str:
+        return self.path
+
     def _build_image(self):
         os.makedirs(self.path, exist_ok=True)
         if self.commit:
@@ -175,18 +197,15 @@ class DirectToolImageManager(AbstractToolImageManager):
             fl = PropertiesHandler.from_file(self.named_archive + PROP_FILES_VALUE)
             version = init_repo_fetcher(fl, self.path_to_infra).get_hash(self.branch)
             to_prop_file(self.path, META_FILE_VALUE, {VERSION_KEY: version})
+        self._image_id = None
         return image_building(self.image_name, f"{self.named_archive}/{self.runtime_setting.to_string()}", self.args)
 
-    def run_offline(self, path_to_data, parameters, time_on=None, time_out=None, measure=True, name=None):
-        inner_contract_ = dict()
-        inner_contract_[VOLUMES_KEY] = {path_to_data: {'bind': '/data', 'mode': 'rw'}}
+    def run_offline(self, path_to_data, parameters, time_on=None, time_out=None, measure=True, name=None, output_file=None):
         inner_name = name if name is not None else self.name.lower()
-        if measure and self.cli_args.measure:
-            tool_cmd = " ".join([inner_name] + parameters)
-            inner_contract_[COMMAND_KEY] = ["/bin/sh", "-c",
-                                            f"mkdir -p /data/scratch && /usr/bin/time -v -o /tmp/stats.txt {tool_cmd}; "
-                                            f"e=$?; cp /tmp/stats.txt /data/scratch/stats.txt 2>/dev/null; exit $e"]
-        else:
-            inner_contract_[COMMAND_KEY] = [inner_name] + parameters
-        inner_contract_[WORKDIR_KEY] = "/data"
+        inner_contract_ = offline_contract(path_to_data, inner_name, parameters, measure and self.cli_args.measure, output_file)
         return run_offline_image(self.image_name, inner_contract_, verbose=self.cli_args.verbose, time_on=time_on, time_out=time_out, is_tool_image=True)
+
+    def run_offline_streaming(self, path_to_data, parameters, on_line, time_out=None, measure=True, name=None, stop_on_abort=False):
+        inner_name = name if name is not None else self.name.lower()
+        inner_contract_ = offline_contract(path_to_data, inner_name, parameters, measure and self.cli_args.measure)
+        return run_offline_image_streaming(self.image_name, inner_contract_, on_line, verbose=self.cli_args.verbose, time_out=time_out, is_tool_image=True, stop_on_abort=stop_on_abort)
@@ -1,4 +1,5 @@
 from typing import Optional, List
+from Infrastructure.DataTypes.Contracts.SubContracts.RateProfile import RateProfile
 from Infrastructure.DataTypes.Types.custome_type import DataSourceType, TimeUnits, FormatType, InputSpeed
 
 
@@ -6,7 +7,7 @@ class OnlineExperimentContractGeneral:
     def __init__(
         self, data_source_type: DataSourceType, mode: InputSpeed, maximum_latency: Optional[int],
         accumulated_latency: Optional[int], timestamp_units: TimeUnits,
-        batch_delimiter: Optional[str]
+        batch_delimiter: Optional[str], rate_profile: Optional[RateProfile] = None
 
     ):
         self.data_source_type = data_source_type
@@ -19,6 +20,9 @@ class OnlineExperimentContractGeneral:
         self.maximum_latency = maximum_latency
         self.accumulated_latency = accumulated_latency
 
+        # applied to the trace before the replay, the driver paces the rewritten timestamps
+        self.rate_profile = rate_profile
+
     def get_mode(self) -> List[str]:
         return ["--mode", self.mode.to_string()]
 
@@ -43,6 +47,12 @@ class OnlineExperimentContractGeneral:
             return []
         return ["--maximum-latency", str(self.maximum_latency)]
 
+    def schedule_ns_per_unit(self) -> Optional[float]:
+        # only a real-time replay has intended send times, derived from the timestamps
+        if self.mode != InputSpeed.REAL_TIME:
+            return None
+        return {TimeUnits.SECONDS: 1e9, TimeUnits.MILLISECONDS: 1e6, TimeUnits.MICROSECONDS: 1e3}[self.timestamp_units]
+
     def get_settings(self) -> List[str]:
         settings = []
         settings += self.get_mode()
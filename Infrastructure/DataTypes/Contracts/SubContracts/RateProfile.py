@@ -0,0 +1,32 @@
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import List, Optional
+
+
+class PhaseKind(Enum):
+    STEP = "step"
+    RAMP = "ramp"
+    BURST = "burst"
+
+    def to_string(self):
+        return self.value
+
+
+@dataclass
+class RatePhase:
+    # duration in timestamp units of the replay, rates as multiples of the trace's own rate
+    kind: PhaseKind
+    duration: float
+    scale: float = 1.0  # step: the rate, ramp: the start rate, burst: the rate between bursts
+    to_scale: Optional[float] = None  # ramp: the end rate
+    burst_scale: Optional[float] = None  # burst: the rate during a burst
+    period: Optional[float] = None  # burst: distance of two burst starts
+    duty: float = 0.5  # burst: fraction of the period spent bursting
+
+
+@dataclass
+class RateProfile:
+    phases: List[RatePhase] = field(default_factory=list)
+    repeat: bool = False  # cycle the phases, otherwise the last rate holds
+    replay_file: Optional[str] = None  # inter-arrival times of recorded time points, replaces the phases
+    recovery_factor: float = 1.5  # latency within this factor of the first phase's median counts as recovered
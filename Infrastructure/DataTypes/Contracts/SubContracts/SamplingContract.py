@@ -0,0 +1,9 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class VerificationSampling:
+    sample_size: int
+    seed: int = 0
+    confidence: float = 0.95
+    strata: int = 10
@@ -1,11 +1,16 @@
+from typing import Optional
+
 from Infrastructure.DataTypes.Contracts.AbstractContract import AbstractContract
 
 
 class ScriptSetupContract(AbstractContract):
-    def __init__(self, name: str, script_name: str, fixed: bool):
+    def __init__(self, name: str, script_name: str, fixed: bool, recording: Optional[str] = None, replay_scale: float = 1.0):
         self.name = name
         self.fixed = fixed
         self.script_name = script_name
+        # a capture of the script's stream, replayed with its arrival times instead of running the script
+        self.recording = recording
+        self.replay_scale = replay_scale
 
     def default_contract(self):
         pass
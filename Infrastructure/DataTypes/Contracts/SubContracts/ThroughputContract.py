@@ -0,0 +1,21 @@
+from dataclasses import dataclass, field
+from typing import List
+
+
+@dataclass
+class ThroughputSearch:
+    # rates are multiples of the rate recorded in the trace
+    min_scale: float = 0.125
+    max_scale: float = 64.0
+    tolerance: float = 0.05  # stop once the first failing rate is within 5% of the last sustained one
+    repeats: int = 3
+    confidence: float = 0.95
+    backlog_growth: float = 2.0  # late vs. early median latency that counts as a growing backlog
+
+
+@dataclass
+class ParetoSweep:
+    # input_aggregation_number of the tool contract times rate scale of the trace
+    batch_sizes: List[int] = field(default_factory=lambda: [1, 10, 100, 1000])
+    scales: List[float] = field(default_factory=lambda: [0.5, 1.0, 2.0, 4.0, 8.0])
+    repeats: int = 1
@@ -0,0 +1,40 @@
+import hashlib
+import os
+from typing import List, Optional
+
+from Infrastructure.Builders.BuilderUtilities import to_prop_file
+from Infrastructure.DataTypes.FileRepresenters.PropertiesHandler import PropertiesHandler
+
+VARIABLE_ORDER_CACHE_FILE = "/variable_order.properties"
+
+
+class VariableOrderCache:
+    # key=<variables separated by ","> per line, variable names never contain "," or line breaks
+    def __init__(self, file):
+        self.file = file
+        self.properties = PropertiesHandler.from_file(file) if os.path.exists(file) else PropertiesHandler({})
+
+    @classmethod
+    def for_build_path(cls, path_to_build):
+        return cls(f"{path_to_build}{VARIABLE_ORDER_CACHE_FILE}")
+
+    @staticmethod
+    def key(image_id: str, input_files: List[str]) -> str:
+        digest = hashlib.sha256(image_id.encode("utf-8"))
+        for input_file in input_files:
+            with open(input_file, "rb") as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+        return digest.hexdigest()
+
+    def get(self, key) -> Optional[List[str]]:
+        value = self.properties.get_attr(key)
+        if value is None:
+            return None
+        return value.split(",") if value else []
+
+    def put(self, key, variable_order: List[str]):
+        # the file is rewritten as a whole and swapped in, a concurrent reader never sees a partial file
+        self.properties.set_attr(key, ",".join(variable_order))
+        os.makedirs(os.path.dirname(self.file), exist_ok=True)
+        to_prop_file(self.file, ".tmp", self.properties.in_dict)
+        os.replace(f"{self.file}.tmp", self.file)
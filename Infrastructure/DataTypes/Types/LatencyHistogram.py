@@ -0,0 +1,105 @@
+import base64
+import json
+import math
+import zlib
+from typing import Dict, Iterable, Optional
+
+SUB_BUCKET_BITS = 11  # relative bucket width below 2^-10, about three significant digits
+
+
+class LatencyHistogram:
+    # HdrHistogram-style log-linear buckets: a value is reduced to its SUB_BUCKET_BITS highest bits and the number
+    # of dropped bits, so the bucket count only depends on the value range. Buckets are kept sparse; min, max and
+    # the sum are exact.
+    def __init__(self, sub_bucket_bits: int = SUB_BUCKET_BITS):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.counts: Dict[int, int] = dict()
+        self.total = 0
+        self.sum = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+
+    def _index(self, value: int) -> int:
+        shift = max(0, value.bit_length() - self.sub_bucket_bits)
+        return (shift << self.sub_bucket_bits) | (value >> shift)
+
+    def _highest_equivalent(self, index: int) -> int:
+        shift = index >> self.sub_bucket_bits
+        mantissa = index & ((1 << self.sub_bucket_bits) - 1)
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, value: int, count: int = 1):
+        value = max(0, int(value))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.total += count
+        self.sum += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: 'LatencyHistogram') -> 'LatencyHistogram':
+        if other.sub_bucket_bits != self.sub_bucket_bits:
+            raise ValueError(f"Cannot merge histograms with {other.sub_bucket_bits} and {self.sub_bucket_bits} sub bucket bits")
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += other.total
+        self.sum += other.sum
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        return self
+
+    def percentile(self, q: float) -> Optional[int]:
+        # highest value equivalent to the bucket holding the q-th percentile, clamped to the exact extremes
+        if self.total == 0:
+            return None
+        rank = max(1, math.ceil(q / 100.0 * self.total))
+        seen = 0
+        for index in sorted(self.counts.keys()):
+            seen += self.counts[index]
+            if seen >= rank:
+                return max(self.min, min(self.max, self._highest_equivalent(index)))
+        return self.max
+
+    def mean(self) -> Optional[float]:
+        return self.sum / self.total if self.total else None
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        return {
+            "count": self.total, "mean": self.mean(), "p50": self.percentile(50), "p99": self.percentile(99),
+            "p99.9": self.percentile(99.9), "max": self.max
+        }
+
+    def encode(self) -> str:
+        # delta-encoded bucket indices, compressed; a few hundred bytes for typical runs
+        indices = sorted(self.counts.keys())
+        deltas = [b - a for (a, b) in zip([0] + indices, indices)]
+        payload = {
+            "bits": self.sub_bucket_bits, "min": self.min, "max": self.max, "sum": self.sum,
+            "buckets": [v for pair in zip(deltas, (self.counts[i] for i in indices)) for v in pair]
+        }
+        compressed = zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"), 9)
+        return base64.b64encode(compressed).decode("ascii")
+
+    @classmethod
+    def decode(cls, text: str) -> 'LatencyHistogram':
+        payload = json.loads(zlib.decompress(base64.b64decode(text)).decode("utf-8"))
+        histogram = cls(payload["bits"])
+        index = 0
+        buckets = payload["buckets"]
+        for i in range(0, len(buckets), 2):
+            index += buckets[i]
+            histogram.counts[index] = buckets[i + 1]
+        histogram.total = sum(histogram.counts.values())
+        histogram.sum = payload["sum"]
+        histogram.min = payload["min"]
+        histogram.max = payload["max"]
+        return histogram
+
+    @classmethod
+    def merged(cls, encoded: Iterable[str]) -> Optional['LatencyHistogram']:
+        result = None
+        for text in encoded:
+            histogram = cls.decode(text)
+            result = histogram if result is None else result.merge(histogram)
+        return result
@@ -0,0 +1,113 @@
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from Infrastructure.DataTypes.Types.LatencyHistogram import LatencyHistogram
+
+BATCH_CAPACITY = 128
+MIN_BATCHES = 8
+
+
+def mser_truncation(values: Sequence[float], max_fraction: float = 0.5) -> int:
+    # MSER (marginal standard error rule): the number of leading values to drop so that the standard error of
+    # the remaining mean is smallest. Only the first max_fraction of the series may be dropped.
+    n = len(values)
+    if n < 2:
+        return 0
+    # suffix sums turn every candidate into O(1)
+    suffix_sum = [0.0] * (n + 1)
+    suffix_sq = [0.0] * (n + 1)
+    for i in range(n - 1, -1, -1):
+        suffix_sum[i] = suffix_sum[i + 1] + values[i]
+        suffix_sq[i] = suffix_sq[i + 1] + values[i] * values[i]
+    best, best_d = None, 0
+    for d in range(0, int(n * max_fraction) + 1):
+        rest = n - d
+        if rest < 2:
+            break
+        mean = suffix_sum[d] / rest
+        statistic = max(0.0, suffix_sq[d] - rest * mean * mean) / (rest * rest)
+        if best is None or statistic < best:
+            best, best_d = statistic, d
+    return best_d
+
+
+@dataclass
+class _Batch:
+    blocks: int = 0
+    elapsed_ns: int = 0
+    events: int = 0
+    end_wall_ns: int = 0
+    histogram: Optional[LatencyHistogram] = None
+
+    def merge(self, other: '_Batch') -> '_Batch':
+        self.blocks += other.blocks
+        self.elapsed_ns += other.elapsed_ns
+        self.events += other.events
+        self.end_wall_ns = other.end_wall_ns
+        self.histogram.merge(other.histogram)
+        return self
+
+
+@dataclass
+class SteadyState:
+    warmup_blocks: int
+    warmup_events: int
+    warmup_s: float  # wall time of the replay up to the end of the warm-up
+    steady_blocks: int
+    steady_throughput: Optional[float]  # events per second of monitor time after the warm-up
+    histogram: LatencyHistogram  # latencies after the warm-up
+
+
+class SteadyStateDetector:
+    # Batch means of the per-step latency and throughput, at most BATCH_CAPACITY batches for any run length:
+    # when full, neighbouring batches are merged and the batch size doubles. At the end of the run the warm-up
+    # is the longer MSER truncation of the two batch-mean series.
+    def __init__(self, capacity: int = BATCH_CAPACITY):
+        self.capacity = capacity
+        self.batch_size = 1
+        self.batches: List[_Batch] = []
+        self.open = _Batch(histogram=LatencyHistogram())
+        self.last_processed = 0
+        self.elapsed_total_ns = 0
+
+    def record(self, elapsed_ns: int, processed: Optional[int] = None, wall_offset_ns: Optional[int] = None):
+        self.elapsed_total_ns += elapsed_ns
+        self.open.blocks += 1
+        self.open.elapsed_ns += elapsed_ns
+        self.open.histogram.record(elapsed_ns)
+        if processed is not None:
+            self.open.events += max(0, processed - self.last_processed)
+            self.last_processed = processed
+        # without the driver's wall offset, back-to-back processing time stands in for the replay time
+        self.open.end_wall_ns = wall_offset_ns + elapsed_ns if wall_offset_ns is not None else self.elapsed_total_ns
+        if self.open.blocks >= self.batch_size:
+            self.batches.append(self.open)
+            self.open = _Batch(histogram=LatencyHistogram())
+            if len(self.batches) >= self.capacity:
+                self.batches = [a.merge(b) for (a, b) in zip(self.batches[::2], self.batches[1::2])]
+                self.batch_size *= 2
+
+    def result(self) -> Optional[SteadyState]:
+        batches = self.batches + ([self.open] if self.open.blocks else [])
+        if not batches:
+            return None
+        warmup = 0
+        # the open batch is partial and does not take part in the detection
+        if len(self.batches) >= MIN_BATCHES:
+            latency = [b.elapsed_ns / b.blocks for b in self.batches]
+            throughput = [b.events / b.elapsed_ns if b.elapsed_ns else 0.0 for b in self.batches]
+            warmup = max(mser_truncation(latency), mser_truncation(throughput))
+
+        histogram = LatencyHistogram()
+        for batch in batches[warmup:]:
+            histogram.merge(batch.histogram)
+        steady_elapsed = sum(b.elapsed_ns for b in batches[warmup:])
+        steady_events = sum(b.events for b in batches[warmup:])
+        return SteadyState(
+            warmup_blocks=sum(b.blocks for b in batches[:warmup]),
+            warmup_events=sum(b.events for b in batches[:warmup]),
+            warmup_s=batches[warmup - 1].end_wall_ns / 1e9 if warmup else 0.0,
+            steady_blocks=histogram.total,
+            steady_throughput=steady_events * 1e9 / steady_elapsed if steady_elapsed else None,
+            histogram=histogram
+        )
@@ -1,4 +1,9 @@
+import re
 from bisect import bisect_right
+from collections import defaultdict
+from typing import Dict
+
+_MONPOLY_EVENT = re.compile(r'[^\s()@;]+\s*\((?:"[^"]*"|[^()"])*\)')
 
 
 class StratificationIndex:
@@ -34,4 +39,26 @@ class StratificationIndex:
     def is_boundary(self, x: int) -> bool:
         """True iff x is the final stratified tp of its block (verdict-valid point)."""
         i = bisect_right(self.boundaries, x) - 1
-        return x == self.boundaries[i + 1] - 1
\ No newline at end of file
+        return x == self.boundaries[i + 1] - 1
+
+
+def csv_events_per_tp(path_to_trace: str) -> Dict[int, int]:
+    # events per time point of a trace carrying tp= fields, empty if it has none
+    mapping = defaultdict(int)
+    with open(path_to_trace, "r") as f:
+        for line in f:
+            if "tp=" in line:
+                tp = int(line.split("tp=")[1].split(",")[0])  # int, not str: lexicographic order breaks for tp >= 10
+                mapping[tp] += 1
+    return dict(mapping)
+
+
+def monpoly_events_per_tp(path_to_trace: str) -> Dict[int, int]:
+    # events per time point of a MonPoly trace, every "@<ts>" line is the next time point
+    mapping = dict()
+    with open(path_to_trace, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("@"):
+                mapping[len(mapping)] = len(_MONPOLY_EVENT.findall(line))
+    return mapping
@@ -0,0 +1,127 @@
+from dataclasses import dataclass, field
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from Infrastructure.DataTypes.Verification.OutputDigest import VerificationStatus
+from Infrastructure.DataTypes.Verification.OutputStructures.AbstractOutputStrucutre import AbstractOutputStructure
+from Infrastructure.DataTypes.Verification.OutputStructures.Compare.Comparing import compare_tools
+from Infrastructure.DataTypes.Verification.OutputStructures.VerdictDigest import VerdictLevel, VerdictMerkleTree, \
+    UnsupportedStructure
+
+OracleCheck = Callable[[AbstractOutputStructure], Tuple[bool, str]]
+
+
+@dataclass
+class DeferredRun:
+    tool_name: str
+    setting_id: str
+    output_hash: str
+    timings: Tuple[float, float, float, float]
+    stats: Tuple
+    status: Optional[VerificationStatus] = None  # set for non-deterministic runs, otherwise decided on resolve
+
+
+@dataclass
+class _Output:
+    digests: Dict[VerdictLevel, Optional[bytes]] = field(default_factory=dict)
+    structure: Optional[AbstractOutputStructure] = None
+
+
+class DifferentialVerifier:
+    # Tool outputs of one setting are grouped by the root digest of their canonical verdicts. Groups are only
+    # checked against the oracle if the tools disagree. Oracle judgements hold for a digest in every repeat, the
+    # others only for the same set of digests. Parsed outputs are kept for the setting, a later repeat that
+    # disagrees still has them for the oracle.
+    def __init__(self):
+        self.outputs: Dict[Tuple[str, str], _Output] = dict()
+        self.oracle_judged: Dict[Tuple[VerdictLevel, bytes], Tuple[bool, str, VerificationStatus]] = dict()
+        self.judged: Dict[Tuple[FrozenSet, Tuple[VerdictLevel, bytes]], Tuple[bool, str, VerificationStatus]] = dict()
+        self.pending: List[DeferredRun] = []
+
+    def knows(self, tool_name: str, output_hash: str) -> bool:
+        # a known output needs no parsing again, its structure is kept for the later repeats
+        return (tool_name, output_hash) in self.outputs
+
+    def observe(self, tool_name: str, output_hash: str, structure: Optional[AbstractOutputStructure]):
+        output = _Output(structure=structure)
+        for level in VerdictLevel:
+            if structure is None:
+                output.digests[level] = None
+                continue
+            try:
+                output.digests[level] = VerdictMerkleTree.from_structure(structure, level).root()
+            except UnsupportedStructure:
+                output.digests[level] = None
+        self.outputs[(tool_name, output_hash)] = output
+
+    def defer(self, run: DeferredRun):
+        self.pending.append(run)
+
+    def resolve(self, oracle_check: Optional[OracleCheck]) -> List[Tuple[DeferredRun, bool, str, VerificationStatus]]:
+        runs, self.pending = self.pending, []
+        if not runs:
+            return []
+
+        outputs = [self.outputs[(run.tool_name, run.output_hash)] for run in runs]
+        # Tools are compared at the finest level all of them support, e.g. time points only next to DejaVu
+        level = VerdictLevel.ASSIGNMENTS
+        if any(o.digests[VerdictLevel.ASSIGNMENTS] is None for o in outputs):
+            level = VerdictLevel.TIME_POINTS
+
+        groups: Dict[object, List[int]] = dict()
+        for (i, output) in enumerate(outputs):
+            digest = output.digests[level]
+            key = (level, digest) if digest is not None else ("unsupported", i)
+            groups.setdefault(key, []).append(i)
+
+        agreeing = len(groups) == 1 and len(runs) > 1 and outputs[0].digests[level] is not None
+        if agreeing:
+            print(f"Differential: all {len(runs)} tools agree, oracle not consulted")
+        else:
+            print(f"Differential: {len(groups)} distinct outputs for {len(runs)} tools")
+
+        # judgements other than the oracle's depend on which outputs were compared
+        context = frozenset(groups)
+        judgements = dict()
+        for key, members in groups.items():
+            if key in self.oracle_judged:
+                judgements[key] = self.oracle_judged[key]
+                continue
+            if (context, key) in self.judged:
+                judgements[key] = self.judged[(context, key)]
+                continue
+            names = ", ".join(runs[i].tool_name for i in members)
+            structure = next((outputs[i].structure for i in members if outputs[i].structure is not None), None)
+            cacheable = isinstance(key[0], VerdictLevel)
+            if agreeing:
+                judgement = (True, f"Outputs agree ({names})", VerificationStatus.AGREED)
+            elif oracle_check is not None and structure is not None:
+                try:
+                    verified, msg = oracle_check(structure)
+                except Exception as e:
+                    verified, msg = False, str(e)
+                judgement = (verified, msg, VerificationStatus.VERIFIED)
+                if cacheable:
+                    self.oracle_judged[key] = judgement
+                judgements[key] = judgement
+                continue
+            elif len(groups) == 1:
+                judgement = (True, "No other tool or oracle to compare with", VerificationStatus.UNVERIFIED)
+            else:
+                other_members = next((m for m in groups.values() if m is not members), [])
+                other = next((outputs[i].structure for i in other_members if outputs[i].structure is not None), None)
+                msg = "Outputs differ and no oracle is configured"
+                if other is not None and structure is not None:
+                    msg = compare_tools(other, structure)[1]
+                judgement = (False, f"{msg} ({names})", VerificationStatus.DISAGREED)
+            judgements[key] = judgement
+            if cacheable:
+                self.judged[(context, key)] = judgement
+
+        resolved = []
+        for key, members in groups.items():
+            verified, msg, status = judgements[key]
+            for i in members:
+                run = runs[i]
+                resolved.append((run, verified, msg, run.status if run.status is not None else status))
+        return resolved
+
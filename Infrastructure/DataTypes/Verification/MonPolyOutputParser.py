@@ -0,0 +1,112 @@
+import re
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from Infrastructure.DataTypes.Verification.OutputStructures.SubTypes.Assignment import Assignment
+from Infrastructure.DataTypes.Verification.OutputStructures.SubTypes.Proposition import Proposition
+from Infrastructure.DataTypes.Verification.OutputStructures.SubTypes.VariableOrder import VariableOrdering
+
+READ_BUFFER_BYTES = 1 << 20
+BLOCK_CHARS = 1 << 20
+_VERDICT_LINE = re.compile(r"@(\d+)\s*\(time point (\d+)\):\s*(.*)")
+# the same line shape over a block of lines, a match never crosses a line end
+_VERDICT_LINES = re.compile(r"^@(\d+)[^\S\n]*\(time point (\d+)\):[^\S\n]*(.*)", re.MULTILINE)
+_TUPLES = re.compile(r"\(([^)]*)\)")
+
+
+def verdict_rows(tuples: str) -> List[List[str]]:
+    # "(a,b) (c,d)" -> [["a", "b"], ["c", "d"]], empty values are dropped
+    rows = [content.split(",") for content in _TUPLES.findall(tuples)]
+    return [row if "" not in row else [v for v in row if v] for row in rows]
+
+
+def parse_pattern(pattern_str: str):
+    match = _VERDICT_LINE.match(pattern_str)
+    if match is None:
+        raise ValueError(f"Could not parse line: {pattern_str}")
+    return int(match.group(1)), int(match.group(2)), verdict_rows(match.group(3))
+
+
+def _first_unparsed_line(block: str) -> str:
+    for line in block.split("\n"):
+        if _VERDICT_LINE.match(line) is None and not line.startswith("@MaxTS"):
+            return line
+    return ""
+
+
+def _text_blocks(text: str) -> Iterator[str]:
+    # slices of about BLOCK_CHARS that end at line ends, without the separating newline
+    start = 0
+    while True:
+        end = text.find("\n", start + BLOCK_CHARS)
+        if end < 0:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 1
+
+
+def _file_blocks(path: str) -> Iterator[str]:
+    # blocks of the file content as parse_monpoly_output sees it after strip()
+    with open(path, "r", buffering=READ_BUFFER_BYTES) as f:
+        text = ""
+        for data in iter(lambda: f.read(BLOCK_CHARS), ""):
+            text = text + data if text else data.lstrip()
+            end = text.rfind("\n")
+            # the trailing whitespace of the file must not become a blank line of its own
+            if end >= 0 and text[end:].strip():
+                yield text[:end]
+                text = text[end + 1:]
+        yield text.rstrip()
+
+
+def _parse_monpoly_blocks(verdicts, blocks: Iterable[str]):
+    # Every block is matched in one regex pass. A block is accepted if each of its lines is a verdict or @MaxTS
+    # line, the tuples of a time point are kept as text for the structure to decode when they are needed.
+    for block in blocks:
+        scanned = _VERDICT_LINES.findall(block)
+        lines = block.count("\n") + 1
+        if len(scanned) != lines - ("\n" + block).count("\n@MaxTS"):
+            raise ValueError(f"Could not parse line: {_first_unparsed_line(block)}")
+        verdicts.insert_encoded([(int(ts), int(tp), tuples) for (ts, tp, tuples) in scanned], verdict_rows)
+    return verdicts
+
+
+def parse_monpoly_output(verdicts, stdout_input):
+    if stdout_input == "":
+        return verdicts
+    return _parse_monpoly_blocks(verdicts, _text_blocks(stdout_input.strip()))
+
+
+def parse_monpoly_file(verdicts, path: str):
+    # block-wise variant of parse_monpoly_output for result files that should not be read as one string
+    with open(path, "r") as f:
+        if f.read(1) == "":
+            return verdicts
+    return _parse_monpoly_blocks(verdicts, _file_blocks(path))
+
+
+def monpoly_line_parser(variable_order: VariableOrdering):
+    def parse_line(line: str):
+        if line.startswith("@MaxTS"):
+            return None
+        ts, tp, vals = parse_pattern(line)
+        if not variable_order.retrieve_order():
+            return ts, tp, [Proposition(True)]
+        return ts, tp, [Assignment(va, variable_order) for va in vals]
+    return parse_line
+
+
+def monpoly_online_line_parser(variable_order: VariableOrdering):
+    # Online runs add -verbose and -nofilteremptytp: lines other than verdicts are skipped and an empty time
+    # point ("false" for propositional policies) yields no verdict.
+    def parse_line(line: str) -> Optional[Tuple[int, int, list]]:
+        match = _VERDICT_LINE.match(line)
+        if match is None:
+            return None
+        (ts, tp, rest) = match.groups()
+        vals = verdict_rows(rest)
+        if not variable_order.retrieve_order():
+            satisfied = rest.strip() == "true" or bool(vals)
+            return int(ts), int(tp), [Proposition(True)] if satisfied else []
+        return int(ts), int(tp), [Assignment(va, variable_order) for va in vals]
+    return parse_line
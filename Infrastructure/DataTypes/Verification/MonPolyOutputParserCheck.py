@@ -0,0 +1,186 @@
+import glob
+import os
+import re
+import sys
+import tempfile
+import time
+from typing import Callable, Iterator, List, Tuple
+
+from Infrastructure.DataTypes.Verification.MonPolyOutputParser import parse_monpoly_output, parse_monpoly_file
+from Infrastructure.DataTypes.Verification.OutputStructures.Structures.DiskVerdicts import DiskVerdicts
+from Infrastructure.DataTypes.Verification.OutputStructures.Structures.Verdicts import Verdicts
+from Infrastructure.DataTypes.Verification.OutputStructures.SubTypes.VariableOrder import VariableOrder
+from Infrastructure.DataTypes.Verification.OutputStructures.VerdictDigest import canonical_values, VerdictLevel, \
+    iter_sorted_canonical_verdicts
+
+# Differential check of the MonPoly output parser against the per-line regex parser it replaced. Outputs are
+# derived from the MonPoly trace fixtures of the case studies (one time point per trace line, the event arguments
+# as tuples) plus lines of unusual shape, and optionally read from result files given on the command line:
+#   python -m Infrastructure.DataTypes.Verification.MonPolyOutputParserCheck [monpoly_output ...]
+# Exits with 1 if the parsers disagree on a verdict or an error, or if the parser is slower than the reference.
+
+FIXTURES = "Archive/Docker/CaseStudies/*/data/Trace/*.log"
+EDGE_CASES = "\n".join([
+    "@0 (time point 0): (1,2) (3,4)",
+    "@0 (time point 1): ()",
+    "@1 (time point 2): (1,,2) (,3,)",
+    "@1   (time point 3):   (a,b)  (c,d)   ",
+    "@2 (time point 4): ((a,b) (c)d) trailing",
+    "@3 (time point 5): ",
+    "@4 (time point 6): (\"x y\",\"z\")",
+    "@4 (time point 7): (a,b)\r",
+    "@MaxTS = 4",
+])
+REJECTED = [
+    "@0 (time point 0): (1,2)\n\n@1 (time point 1): (3,4)",
+    "@0 (time point 0): (1,2)\n @1 (time point 1): (3,4)",
+    "@0 (time point 0): (1,2)\nverdict @1 (time point 1): (3,4)",
+    "@x (time point 0): (1,2)",
+    "   \n  ",
+]
+MIN_TIMING_S = 0.02
+_EVENT_ARGUMENTS = re.compile(r"\(([^()]*)\)")
+
+
+def reference_parse_pattern(pattern_str: str):
+    match = re.match(r'@(\d+)\s*\(time point (\d+)\):\s*(.*)', pattern_str)
+    tuples_list = [[num for num in tup.split(',') if num] for tup in re.findall(r'\(([^)]*)\)', match.group(3))]
+    return int(match.group(1)), int(match.group(2)), tuples_list
+
+
+def reference_parse_monpoly_output(verdicts, stdout_input):
+    if stdout_input == "":
+        return verdicts
+
+    for line in stdout_input.strip().split("\n"):
+        try:
+            ts, tp, vals = reference_parse_pattern(line)
+            verdicts.insert(vals, tp, ts)
+        except Exception:
+            if line.startswith("@MaxTS"):
+                pass
+            else:
+                raise ValueError(f"Could not parse line: {line}")
+    return verdicts
+
+
+def output_from_trace(path: str) -> str:
+    # every "@<ts> e(a, b) f(c);" line becomes "@<ts> (time point <i>): (a, b) (c)"
+    lines = []
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line.startswith("@"):
+                continue
+            ts = line[1:].split(" ")[0]
+            tuples = " ".join(f"({args})" for args in _EVENT_ARGUMENTS.findall(line))
+            lines.append(f"@{ts} (time point {len(lines)}): {tuples}")
+    return "\n".join(lines)
+
+
+def outputs(paths: List[str]) -> Iterator[Tuple[str, str]]:
+    yield "edge cases", EDGE_CASES
+    for (i, text) in enumerate(REJECTED):
+        yield f"rejected {i}", text
+    for path in sorted(glob.glob(FIXTURES)):
+        yield path, output_from_trace(path)
+    for path in paths:
+        with open(path, "r") as f:
+            yield path, f.read()
+
+
+def _snapshot(verdicts) -> Tuple:
+    # the canonical verdicts as comparisons read them, and the decoded values for Verdicts
+    canonical = list(iter_sorted_canonical_verdicts(verdicts, VerdictLevel.ASSIGNMENTS))
+    if isinstance(verdicts, DiskVerdicts):
+        return canonical, list(verdicts.iter_time_points()), verdicts.time_points()
+    decoded = [(ts, tp, canonical_values(values)) for (ts, tp, values) in verdicts.verdict]
+    return canonical, decoded, verdicts.tp_to_ts
+
+
+def _parsed(parse: Callable, structure: Callable, text: str):
+    try:
+        return parse(structure(), text)
+    except ValueError as e:
+        return e
+
+
+def _from_file(structure: Callable, text: str):
+    fd, path = tempfile.mkstemp(suffix=".monpoly")
+    with os.fdopen(fd, "w") as f:
+        f.write(text)
+    try:
+        return _parsed(parse_monpoly_file, structure, path)
+    finally:
+        os.remove(path)
+
+
+def _agree(expected, actual) -> bool:
+    if isinstance(expected, ValueError) or isinstance(actual, ValueError):
+        return str(expected) == str(actual) and type(expected) == type(actual)
+    return _snapshot(expected) == _snapshot(actual)
+
+
+def _read(verdicts):
+    # Verdicts may leave rows encoded, the canonical verdicts a comparison reads are part of the work. DiskVerdicts
+    # stores canonical rows while parsing, writing them to SQLite costs the same for both parsers.
+    if isinstance(verdicts, DiskVerdicts):
+        return
+    for _ in iter_sorted_canonical_verdicts(verdicts, VerdictLevel.ASSIGNMENTS):
+        pass
+
+
+def _seconds_per_parse(parse: Callable, structure: Callable, text: str) -> float:
+    # best of five rounds of at least MIN_TIMING_S each
+    best = None
+    for _ in range(5):
+        (runs, elapsed) = (0, 0.0)
+        while elapsed < MIN_TIMING_S:
+            verdicts = structure()
+            start = time.perf_counter()
+            _read(parse(verdicts, text))
+            elapsed += time.perf_counter() - start
+            runs += 1
+        best = elapsed / runs if best is None else min(best, elapsed / runs)
+    return best
+
+
+def check(name: str, text: str) -> List[str]:
+    failures = []
+    lines = text.count("\n") + 1
+    for order in [["a", "b"], []]:
+        variable_order = VariableOrder(order)
+        for kind in [Verdicts, DiskVerdicts]:
+            def structure():
+                return kind(variable_order)
+            label = f"{name} ({kind.__name__}, {len(order)} variables)"
+            expected = _parsed(reference_parse_monpoly_output, structure, text)
+            if not _agree(expected, _parsed(parse_monpoly_output, structure, text)):
+                failures.append(f"{label}: parser differs from the reference")
+                continue
+            if not _agree(expected, _from_file(structure, text)):
+                failures.append(f"{label}: file parser differs from the reference")
+                continue
+            if isinstance(expected, ValueError):
+                continue
+            reference_time = _seconds_per_parse(reference_parse_monpoly_output, structure, text)
+            parse_time = _seconds_per_parse(parse_monpoly_output, structure, text)
+            print(f"{label}: {lines / reference_time:,.0f} -> {lines / parse_time:,.0f} lines/s "
+                  f"(x{reference_time / parse_time:.1f})")
+            if parse_time > reference_time:
+                failures.append(f"{label}: parser is slower than the reference")
+    return failures
+
+
+def main(paths: List[str]) -> int:
+    failures = []
+    for (name, text) in outputs(paths):
+        failures += check(name, text)
+    for failure in failures:
+        print(failure)
+    print("Parsers agree" if not failures else f"{len(failures)} failures")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,83 @@
+import hashlib
+import os
+from collections import defaultdict
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable, Dict, Optional, Tuple
+
+CHUNK_SIZE = 1 << 20
+
+
+class VerificationStatus(Enum):
+    VERIFIED = "verified"
+    HASH_MATCH = "hash match"
+    NONDETERMINISTIC = "non-deterministic"
+    UNVERIFIED = "unverified"
+    AGREED = "agreed"
+    DISAGREED = "disagreed"
+    SAMPLED = "sampled"
+
+
+@dataclass
+class VerificationOutcome:
+    output_hash: Optional[str]
+    status: VerificationStatus
+
+
+class OutputDigest:
+    def __init__(self):
+        self.digest = hashlib.sha256()
+
+    def update(self, text: str):
+        for i in range(0, len(text), CHUNK_SIZE):
+            self.digest.update(text[i:i + CHUNK_SIZE].encode("utf-8", errors="ignore"))
+
+    def update_file(self, path: str):
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                self.digest.update(chunk)
+
+    def hexdigest(self) -> str:
+        return self.digest.hexdigest()
+
+
+@dataclass
+class OutputFileSummary:
+    lines: int
+    verdicts: int
+    output_hash: str
+
+
+def summarize_output_file(path: str, digest: OutputDigest, is_verdict: Callable[[bytes], bool]) -> OutputFileSummary:
+    # one pass over a tool output file: feeds the digest and counts lines and verdict lines
+    lines, verdicts, pending = 0, 0, b""
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.digest.update(chunk)
+                *complete, pending = (pending + chunk).split(b"\n")
+                lines += len(complete)
+                verdicts += sum(1 for line in complete if is_verdict(line))
+    if pending:
+        lines += 1
+        verdicts += 1 if is_verdict(pending) else 0
+    return OutputFileSummary(lines, verdicts, digest.hexdigest())
+
+
+class VerificationCache:
+    # Verification results of the raw outputs already seen for one setting, keyed by tool and output hash
+    def __init__(self):
+        self.outputs: Dict[str, Dict[str, Optional[Tuple[bool, str]]]] = defaultdict(dict)
+
+    def lookup(self, tool_name: str, output_hash: str) -> Optional[Tuple[bool, str]]:
+        return self.outputs[tool_name].get(output_hash)
+
+    def is_nondeterministic(self, tool_name: str, output_hash: str) -> bool:
+        seen = self.outputs[tool_name]
+        return len(seen) > 0 and output_hash not in seen
+
+    def store(self, tool_name: str, output_hash: str, result: Optional[Tuple[bool, str]]):
+        if self.outputs[tool_name].get(output_hash) is None:
+            self.outputs[tool_name][output_hash] = result
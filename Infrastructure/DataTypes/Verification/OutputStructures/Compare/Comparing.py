@@ -1,6 +1,46 @@
 from typing import Tuple, AnyStr
+
 from Infrastructure.DataTypes.Verification.OutputStructures.AbstractOutputStrucutre import AbstractOutputStructure
+from Infrastructure.DataTypes.Verification.OutputStructures.Compare.DiskVerdictsComparator import merge_join_comp
+from Infrastructure.DataTypes.Verification.OutputStructures.Structures.DatagolfVerdicts import DatagolfVerdicts
+from Infrastructure.DataTypes.Verification.OutputStructures.Structures.DiskVerdicts import DiskVerdicts
+from Infrastructure.DataTypes.Verification.OutputStructures.VerdictDigest import locate_divergence, UnsupportedStructure
 
 
 def comparing(oracle_structure: AbstractOutputStructure, tool_structure: AbstractOutputStructure) -> Tuple[bool, AnyStr]:
-    return oracle_structure.as_oracle(tool_structure)
+    # DataGolf verdicts are checked for inclusion and exclusion, not equality; its comparator streams disk verdicts
+    if isinstance(oracle_structure, DatagolfVerdicts):
+        verdict, msg = oracle_structure.as_oracle(tool_structure)
+    elif isinstance(oracle_structure, DiskVerdicts) or isinstance(tool_structure, DiskVerdicts):
+        verdict, msg = merge_join_comp(oracle_structure, tool_structure)
+    else:
+        verdict, msg = oracle_structure.as_oracle(tool_structure)
+    if verdict:
+        return verdict, msg
+    return verdict, msg + divergence_message(oracle_structure, tool_structure, "Oracle", "Tool")
+
+
+def compare_tools(left_structure: AbstractOutputStructure, right_structure: AbstractOutputStructure) -> Tuple[bool, AnyStr]:
+    try:
+        divergence = locate_divergence(left_structure, right_structure)
+    except UnsupportedStructure as e:
+        return False, str(e)
+    if divergence is None:
+        return True, "Outputs agree"
+    return False, "Outputs differ" + _format_divergence(divergence, "Left", "Right")
+
+
+def divergence_message(left_structure: AbstractOutputStructure, right_structure: AbstractOutputStructure,
+                       left_name: str, right_name: str) -> str:
+    try:
+        divergence = locate_divergence(left_structure, right_structure)
+    except UnsupportedStructure:
+        return ""
+    if divergence is None:
+        return ""
+    return _format_divergence(divergence, left_name, right_name)
+
+
+def _format_divergence(divergence, left_name: str, right_name: str) -> str:
+    (tp, left_values, right_values) = divergence
+    return f"\nFirst divergent time point {tp}:\n{left_name} {left_values}\n{right_name} {right_values}"
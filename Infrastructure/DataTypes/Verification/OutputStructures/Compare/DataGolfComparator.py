@@ -2,15 +2,19 @@ from typing import Tuple, Union
 
 from Infrastructure.DataTypes.Verification.OutputStructures.AbstractOutputStrucutre import AbstractOutputStructure
 from Infrastructure.DataTypes.Verification.OutputStructures.Structures.DatagolfVerdicts import DatagolfVerdicts
+from Infrastructure.DataTypes.Verification.OutputStructures.Structures.DiskVerdicts import DiskVerdicts
 from Infrastructure.DataTypes.Verification.OutputStructures.Structures.OooVerdicts import OooVerdicts
 from Infrastructure.DataTypes.Verification.OutputStructures.Structures.PropositionList import PropositionList
 from Infrastructure.DataTypes.Verification.OutputStructures.Structures.PropositionTree import PropositionTree
 from Infrastructure.DataTypes.Verification.OutputStructures.Structures.Verdicts import Verdicts
+from Infrastructure.DataTypes.Verification.OutputStructures.VerdictDigest import canonical_values
 
 
 def as_oracle(oracle: DatagolfVerdicts, other: AbstractOutputStructure) -> Tuple[bool, str]:
     if isinstance(other, OooVerdicts) or isinstance(other, Verdicts):
         return datagolf_to_verdicts_comp(oracle, other)
+    elif isinstance(other, DiskVerdicts):
+        return datagolf_to_disk_comp(oracle, other)
     elif isinstance(other, PropositionList):
         return datagolf_to_prop_comp(oracle, other)
     elif isinstance(other, PropositionTree):
@@ -39,6 +43,30 @@ def datagolf_to_verdicts_comp(oracle: DatagolfVerdicts, other: Union[Verdicts, O
     return True, "Checked"
 
 
+def datagolf_to_disk_comp(oracle: DatagolfVerdicts, other: DiskVerdicts) -> Tuple[bool, str]:
+    # The tool's verdicts are streamed in time point order and checked by their canonical strings
+    tool_time_points = other.time_points()
+    tool_iter = other.iter_time_points()
+    tool_val = next(tool_iter, None)
+    for time_point in sorted(oracle.time_points().keys()):
+        if time_point not in tool_time_points:
+            return False, f"Time point {time_point} missing"
+        while tool_val is not None and tool_val[0] < time_point:
+            tool_val = next(tool_iter, None)
+        other_v = set(tool_val[1]) if tool_val is not None and tool_val[0] == time_point else set()
+
+        pos = oracle.retrieve_positive_verdict(time_point)[2]
+        for v in pos:
+            if canonical_values([v])[0] not in other_v:
+                return False, f"Positive verdict {v} at time point {time_point} missing"
+
+        neg = oracle.retrieve_negative_verdict(time_point)[2]
+        for v in neg:
+            if canonical_values([v])[0] in other_v:
+                return False, f"Negative verdict {v} at time point {time_point} present"
+    return True, "Checked"
+
+
 def datagolf_to_prop_comp(oracle: DatagolfVerdicts, other: PropositionList) -> Tuple[bool, str]:
     return False, "Closed Formulas are not supported"
 
@@ -0,0 +1,57 @@
+from typing import List, Tuple
+
+from Infrastructure.DataTypes.Verification.OutputStructures.AbstractComparator import verdicts_to_proposition_tree
+from Infrastructure.DataTypes.Verification.OutputStructures.AbstractOutputStrucutre import AbstractOutputStructure
+from Infrastructure.DataTypes.Verification.OutputStructures.PDTHelper import equality_between_pdts
+from Infrastructure.DataTypes.Verification.OutputStructures.Structures.PropositionTree import PropositionTree
+from Infrastructure.DataTypes.Verification.OutputStructures.Structures.Verdicts import Verdicts
+from Infrastructure.DataTypes.Verification.OutputStructures.VerdictDigest import VerdictLevel, level_for, \
+    iter_sorted_canonical_verdicts, parse_canonical_assignment
+
+
+def as_oracle(oracle: AbstractOutputStructure, other: AbstractOutputStructure) -> Tuple[bool, str]:
+    return merge_join_comp(oracle, other)
+
+
+def merge_join_comp(oracle: AbstractOutputStructure, other: AbstractOutputStructure) -> Tuple[bool, str]:
+    # Both sides are streamed in time point order, so disk-backed verdicts are never loaded as a whole
+    level = level_for(oracle, other)
+    oracle_iter = iter_sorted_canonical_verdicts(oracle, level)
+    other_iter = iter_sorted_canonical_verdicts(other, level)
+    oracle_val = next(oracle_iter, None)
+    other_val = next(other_iter, None)
+
+    while oracle_val is not None or other_val is not None:
+        if other_val is None or (oracle_val is not None and oracle_val[0] < other_val[0]):
+            return False, f"Tool is missing verdicts at time point {oracle_val[0]}"
+        if oracle_val is None or other_val[0] < oracle_val[0]:
+            return False, f"Tool has additional verdicts at time point {other_val[0]}"
+        if oracle_val[1] != other_val[1] and not (
+                level == VerdictLevel.ASSIGNMENTS and _pdt_equivalent(oracle, other, oracle_val[0], oracle_val[1], other_val[1])
+        ):
+            return False, f"Verdict values differ at time point {oracle_val[0]} =>\nOracle {oracle_val[1]}\nTool {other_val[1]}"
+        oracle_val = next(oracle_iter, None)
+        other_val = next(other_iter, None)
+    return True, "Verified"
+
+
+def _pdt_equivalent(oracle: AbstractOutputStructure, other: AbstractOutputStructure, time_point: int,
+                    oracle_values: List[str], other_values: List[str]) -> bool:
+    # Canonical strings of a PDT only list finite assignment sets. Like the in-memory comparators, a PDT is
+    # compared structurally with the tree of the verdicts on the other side, built for this time point only.
+    if isinstance(other, PropositionTree) and not isinstance(oracle, PropositionTree):
+        (tree, values) = (other, oracle_values)
+    elif isinstance(oracle, PropositionTree) and not isinstance(other, PropositionTree):
+        (tree, values) = (oracle, other_values)
+    else:
+        return False
+    order = tree.retrieve_order()
+    if not order:
+        return False
+    verdicts = Verdicts(tree.variable_order)
+    verdicts.insert([parse_canonical_assignment(v, order) for v in values], time_point, 0)
+    try:
+        verdicts_tree = verdicts_to_proposition_tree(verdicts, tree.variable_order)
+        return equality_between_pdts(order, verdicts_tree.forest[time_point], tree.forest[time_point])
+    except Exception:
+        return False
@@ -0,0 +1,126 @@
+import os
+import sqlite3
+import tempfile
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from Infrastructure.DataTypes.Verification.OutputStructures.AbstractOutputStrucutre import AbstractOutputStructure
+from Infrastructure.DataTypes.Verification.OutputStructures.Structures.Verdicts import Verdicts
+from Infrastructure.DataTypes.Verification.OutputStructures.SubTypes.Assignment import Assignment
+from Infrastructure.DataTypes.Verification.OutputStructures.SubTypes.Proposition import Proposition
+from Infrastructure.DataTypes.Verification.OutputStructures.SubTypes.VariableOrder import VariableOrdering
+
+SPILL_THRESHOLD_BYTES = 1 << 28  # raw outputs above 256 MiB are verified from disk
+BATCH_SIZE = 50000
+
+
+class DiskVerdicts(AbstractOutputStructure):
+    # Verdicts kept as canonical strings in a temporary SQLite database, so memory stays bounded by the batch
+    # size. Values are read back sorted by time point and value for merge-join comparisons.
+    def __init__(self, variable_order: VariableOrdering, directory: Optional[str] = None):
+        from Infrastructure.DataTypes.Verification.OutputStructures.VerdictDigest import canonical_values, \
+            canonical_row_formatter
+        self._canonical = canonical_values
+        self._format_row = canonical_row_formatter(variable_order.retrieve_order())
+        self.variable_order = variable_order
+
+        fd, self.path = tempfile.mkstemp(suffix=".verdicts.db", dir=directory)
+        os.close(fd)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute("PRAGMA journal_mode = OFF")
+        self.connection.execute("PRAGMA synchronous = OFF")
+        self.connection.execute("CREATE TABLE verdicts (tp INTEGER, value TEXT)")
+        self.connection.execute("CREATE TABLE time_points (tp INTEGER PRIMARY KEY, ts INTEGER)")
+        self.rows: List[Tuple[int, str]] = []
+        self.pending_time_points: Dict[int, int] = dict()
+        self.indexed = False
+
+    def retrieve_order(self) -> List[str]:
+        return self.variable_order.retrieve_order()
+
+    def as_oracle(self, other: 'AbstractOutputStructure') -> Tuple[bool, str]:
+        from Infrastructure.DataTypes.Verification.OutputStructures.Compare.DiskVerdictsComparator import as_oracle
+        return as_oracle(self, other)
+
+    def insert(self, value, time_point, time_stamp):
+        if not self.variable_order.retrieve_order():
+            values = [Proposition(True)]
+        else:
+            values = value if isinstance(value, list) else [value]
+            values = [Assignment(va, self.variable_order) for va in values]
+        self.insert_canonical(self._canonical(values), time_point, time_stamp)
+
+    def insert_encoded(self, entries: List[Tuple[int, int, str]], decode: Callable[[str], List[List[str]]]):
+        # parser fast path for (ts, tp, encoded values), the rows are stored as canonical strings right away
+        if not self.variable_order.retrieve_order():
+            closed = self._canonical([Proposition(True)])
+            for (ts, tp, _) in entries:
+                self.insert_canonical(closed, tp, ts)
+            return
+        format_row = self._format_row
+        for (ts, tp, encoded) in entries:
+            self.insert_canonical(sorted([format_row(row) for row in decode(encoded)]), tp, ts)
+
+    def insert_canonical(self, canonical: List[str], time_point: int, time_stamp: int):
+        self.pending_time_points[time_point] = time_stamp
+        self.rows.extend((time_point, c) for c in canonical)
+        if len(self.rows) >= BATCH_SIZE or len(self.pending_time_points) >= BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            self.connection.executemany("INSERT INTO verdicts VALUES (?, ?)", self.rows)
+            self.rows = []
+            self.indexed = False
+        if self.pending_time_points:
+            self.connection.executemany("INSERT OR REPLACE INTO time_points VALUES (?, ?)", self.pending_time_points.items())
+            self.pending_time_points = dict()
+        self.connection.commit()
+
+    def time_points(self) -> Dict[int, int]:
+        self.flush()
+        return dict(self.connection.execute("SELECT tp, ts FROM time_points"))
+
+    def retrieve(self, time_point) -> Optional[Tuple[int, int, List[str]]]:
+        self.flush()
+        row = self.connection.execute("SELECT ts FROM time_points WHERE tp = ?", (time_point,)).fetchone()
+        if row is None:
+            return None
+        values = [v for (v,) in self.connection.execute(
+            "SELECT value FROM verdicts WHERE tp = ? ORDER BY value", (time_point,))]
+        return row[0], time_point, values
+
+    def iter_time_points(self) -> Iterator[Tuple[int, List[str]]]:
+        # (tp, sorted canonical values) in ascending time point order
+        self.flush()
+        if not self.indexed:
+            self.connection.execute("CREATE INDEX IF NOT EXISTS verdicts_order ON verdicts (tp, value)")
+            self.indexed = True
+        current_tp, values = None, []
+        for (tp, value) in self.connection.execute("SELECT tp, value FROM verdicts ORDER BY tp, value"):
+            if tp != current_tp:
+                if values:
+                    yield current_tp, values
+                current_tp, values = tp, []
+            values.append(value)
+        if values:
+            yield current_tp, values
+
+    def __len__(self):
+        self.flush()
+        return self.connection.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+
+    def close(self):
+        if getattr(self, "connection", None) is not None:
+            self.connection.close()
+            self.connection = None
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def __del__(self):
+        self.close()
+
+
+def new_verdicts(variable_order: VariableOrdering, output_size: int) -> Union[Verdicts, DiskVerdicts]:
+    if output_size > SPILL_THRESHOLD_BYTES:
+        return DiskVerdicts(variable_order)
+    return Verdicts(variable_order=variable_order)
@@ -1,16 +1,38 @@
-from typing import Dict, Tuple
+from typing import Callable, Dict, Iterator, List, Tuple
 
 from Infrastructure.DataTypes.Verification.OutputStructures.AbstractOutputStrucutre import AbstractOutputStructure
 from Infrastructure.DataTypes.Verification.OutputStructures.SubTypes.Assignment import Assignment
 from Infrastructure.DataTypes.Verification.OutputStructures.SubTypes.Proposition import Proposition
+from Infrastructure.DataTypes.Verification.OutputStructures.SubTypes.ValueType import ValueType
 from Infrastructure.DataTypes.Verification.OutputStructures.SubTypes.VariableOrder import VariableOrdering
 
 
 class Verdicts(AbstractOutputStructure):
     def __init__(self, variable_order: VariableOrdering):
-        self.verdict = list()
+        self._verdict = list()
         self.tp_to_ts = dict()
         self.variable_order = variable_order
+        # (ts, tp, encoded values) appended after _verdict, decoded into rows on first access
+        self._encoded: List[Tuple[int, int, str]] = []
+        self._decode: Callable[[str], List[List[str]]] = lambda encoded: []
+
+    @property
+    def verdict(self) -> List[Tuple[int, int, List[ValueType]]]:
+        self._decode_encoded()
+        return self._verdict
+
+    def _decode_encoded(self):
+        if self._encoded:
+            order = self.variable_order.retrieve_order()
+            decode = self._decode
+            shared: Dict[str, List[Assignment]] = dict()
+            for (ts, tp, encoded) in self._encoded:
+                # equal tuple lists share their assignments
+                values = shared.get(encoded)
+                if values is None:
+                    values = shared[encoded] = [Assignment.from_order(row, order) for row in decode(encoded)]
+                self._verdict.append((ts, tp, list(values)))
+            self._encoded = []
 
     def retrieve_order(self):
         return self.variable_order.retrieve_order()
@@ -20,7 +42,7 @@ class Verdicts(AbstractOutputStructure):
         return as_oracle(self, other)
 
     def retrieve(self, time_point):
-        for (tp, _, val) in self.verdict:
+        for (_, tp, val) in self.verdict:
             if tp == time_point:
                 return self.tp_to_ts[time_point], time_point, val
         return None
@@ -29,10 +51,30 @@ class Verdicts(AbstractOutputStructure):
         return self.tp_to_ts
 
     def insert(self, value, time_point, time_stamp):
+        self._decode_encoded()
         self.tp_to_ts[time_point] = time_stamp
         if not self.variable_order.retrieve_order():
             values = [Proposition(True)]  # needs to consider negation eventually
         else:
             values = value if isinstance(value, list) else [value]
             values = list(map(lambda va: Assignment(va, self.variable_order), values))
-        self.verdict.append((time_stamp, time_point, values))
+        self._verdict.append((time_stamp, time_point, values))
+
+    def insert_encoded(self, entries: List[Tuple[int, int, str]], decode: Callable[[str], List[List[str]]]):
+        # parser fast path for (ts, tp, encoded values), decode turns the encoded values into rows of a time point
+        if not self.variable_order.retrieve_order():
+            self._verdict.extend((ts, tp, [Proposition(True)]) for (ts, tp, _) in entries)
+        else:
+            if decode is not self._decode:
+                self._decode_encoded()
+            self._decode = decode
+            self._encoded.extend(entries)
+        self.tp_to_ts.update((tp, ts) for (ts, tp, _) in entries)
+
+    def iter_encoded_rows(self) -> Iterator[Tuple[int, int, List[List[str]]]]:
+        # (ts, tp, rows) of the entries not decoded yet, canonical comparisons read them without assignments
+        for (ts, tp, encoded) in self._encoded:
+            yield ts, tp, self._decode(encoded)
+
+    def decoded(self) -> List[Tuple[int, int, List[ValueType]]]:
+        return self._verdict
@@ -9,6 +9,14 @@ class Assignment(ValueType):
         self.order = variable_order.retrieve_order()
         self.values = values
 
+    @classmethod
+    def from_order(cls, values: List[Any], order: List[str]) -> 'Assignment':
+        # parsers build many assignments over one variable order, they share the order list
+        assignment = cls.__new__(cls)
+        assignment.order = order
+        assignment.values = values
+        return assignment
+
     def __repr__(self):
         return f"Assignment({self.values}, {self.order})"
 
@@ -0,0 +1,130 @@
+import math
+import os
+import random
+from bisect import bisect_right
+from typing import List, Optional, Tuple
+
+from Infrastructure.DataTypes.Contracts.SubContracts.SamplingContract import VerificationSampling
+from Infrastructure.DataTypes.Types.StratificationIndex import StratificationIndex, csv_events_per_tp, \
+    monpoly_events_per_tp
+from Infrastructure.DataTypes.Verification.OutputStructures.AbstractOutputStrucutre import AbstractOutputStructure
+from Infrastructure.DataTypes.Verification.OutputStructures.VerdictDigest import VerdictLevel, level_for, \
+    iter_canonical_verdicts, canonical_verdicts_in, UnsupportedStructure
+from Infrastructure.Oracles.AbstractOracleTemplate import AbstractOracleTemplate
+
+
+def trace_stratification(path_to_trace: str) -> Optional[StratificationIndex]:
+    # events per time point of a CSV trace with tp= fields or of a MonPoly trace, None for other formats
+    if not os.path.exists(path_to_trace):
+        return None
+    events_per_tp = csv_events_per_tp(path_to_trace) or monpoly_events_per_tp(path_to_trace)
+    if not events_per_tp:
+        return None
+    return StratificationIndex(events_per_tp)
+
+
+def _output_stratification(*structures: AbstractOutputStructure) -> StratificationIndex:
+    last_tp = 0
+    for structure in structures:
+        for tp, _ in iter_canonical_verdicts(structure, VerdictLevel.TIME_POINTS):
+            last_tp = max(last_tp, tp)
+    return StratificationIndex({tp: 1 for tp in range(0, last_tp + 1)})
+
+
+def sample_time_points(index: StratificationIndex, sample_size: int, seed: int, strata: int) -> List[int]:
+    tps = index.tps
+    if sample_size >= len(tps):
+        return list(tps)
+
+    # Strata hold equal shares of the events, so dense parts of the trace are split finer. Samples are
+    # allocated proportionally to the number of time points of a stratum.
+    strata = max(1, min(strata, len(tps)))
+    cuts = [0]
+    for s in range(1, strata):
+        position = bisect_right(index.boundaries, s * index.total // strata) - 1
+        cuts.append(max(cuts[-1], min(position, len(tps))))
+    cuts.append(len(tps))
+
+    sizes = [cuts[i + 1] - cuts[i] for i in range(strata)]
+    quotas = [sample_size * size / len(tps) for size in sizes]
+    allocation = [int(q) for q in quotas]
+    by_remainder = sorted(range(strata), key=lambda i: quotas[i] - allocation[i], reverse=True)
+    for i in by_remainder[:sample_size - sum(allocation)]:
+        allocation[i] += 1
+
+    rng = random.Random(seed)
+    sample = []
+    for i in range(strata):
+        sample += rng.sample(tps[cuts[i]:cuts[i + 1]], min(allocation[i], sizes[i]))
+    return sorted(sample)
+
+
+def _log_binomial_cdf(k: int, n: int, p: float) -> float:
+    if p <= 0.0:
+        return 0.0
+    if p >= 1.0:
+        return 0.0 if k >= n else -math.inf
+    terms = [
+        math.lgamma(n + 1) - math.lgamma(i + 1) - math.lgamma(n - i + 1) + i * math.log(p) + (n - i) * math.log1p(-p)
+        for i in range(0, k + 1)
+    ]
+    peak = max(terms)
+    return peak + math.log(sum(math.exp(t - peak) for t in terms))
+
+
+def error_rate_upper_bound(failures: int, samples: int, confidence: float) -> float:
+    # one-sided Clopper-Pearson bound
+    if samples == 0 or failures >= samples:
+        return 1.0
+    log_alpha = math.log(1.0 - confidence)
+    low, high = failures / samples, 1.0
+    for _ in range(64):
+        mid = (low + high) / 2
+        if _log_binomial_cdf(failures, samples, mid) > log_alpha:
+            low = mid
+        else:
+            high = mid
+    return high
+
+
+def sampled_comparison(
+        oracle_structure: AbstractOutputStructure, tool_structure: AbstractOutputStructure,
+        sampling: VerificationSampling, index: Optional[StratificationIndex] = None
+) -> Tuple[bool, str]:
+    level = level_for(oracle_structure, tool_structure)
+    if index is None:
+        index = _output_stratification(oracle_structure, tool_structure)
+
+    sample = sample_time_points(index, sampling.sample_size, sampling.seed, sampling.strata)
+    sampled = set(sample)
+    expected = canonical_verdicts_in(oracle_structure, level, sampled)
+    actual = canonical_verdicts_in(tool_structure, level, sampled)
+    failures = [tp for tp in sample if expected.get(tp, []) != actual.get(tp, [])]
+
+    population = len(index.tps)
+    if len(sample) == population:
+        bound = len(failures) / population if population else 0.0
+    else:
+        bound = error_rate_upper_bound(len(failures), len(sample), sampling.confidence)
+    msg = (f"Sampled {len(sample)} of {population} time points (seed {sampling.seed}): {len(failures)} wrong, "
+           f"error rate <= {bound:.4%} at {sampling.confidence:.0%} confidence")
+    if failures:
+        tp = failures[0]
+        msg += f"\nFirst divergent sampled time point {tp}:\nOracle {expected.get(tp, [])}\nTool {actual.get(tp, [])}"
+    return not failures, msg
+
+
+def sampled_verify(
+        oracle: AbstractOracleTemplate, sampling: VerificationSampling, path_to_folder: str, data_file: str,
+        result_file: str, tool_structure: AbstractOutputStructure
+) -> Optional[Tuple[bool, str]]:
+    # None if the oracle or output structure cannot be sampled, the caller then verifies exhaustively
+    oracle_structure = oracle.reference_verdicts(result_file)
+    if oracle_structure is None:
+        return None
+    try:
+        return sampled_comparison(
+            oracle_structure, tool_structure, sampling, trace_stratification(f"{path_to_folder}/{data_file}")
+        )
+    except UnsupportedStructure:
+        return None
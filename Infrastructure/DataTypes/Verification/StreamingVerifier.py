@@ -0,0 +1,107 @@
+from collections import deque
+from typing import Callable, Optional, Tuple, List
+
+from Infrastructure.DataTypes.Verification.OutputStructures.AbstractOutputStrucutre import AbstractOutputStructure
+from Infrastructure.DataTypes.Verification.OutputStructures.Structures.DiskVerdicts import DiskVerdicts
+from Infrastructure.DataTypes.Verification.OutputStructures.SubTypes.ValueType import ValueType
+from Infrastructure.DataTypes.Verification.OutputStructures.VerdictDigest import canonical_values, VerdictLevel, \
+    iter_sorted_canonical_verdicts
+
+StreamLineParser = Callable[[str], Optional[Tuple[int, int, List[ValueType]]]]
+
+
+# The line parser must yield time points in ascending order; an empty verdict set counts as no verdict. The
+# oracle's verdicts are read in time point order as the tool's time points arrive, disk-backed oracles are
+# never loaded as a whole.
+class StreamingVerifier:
+    def __init__(self, oracle: AbstractOutputStructure, parse_line: StreamLineParser, context_size: int = 5):
+        self.parse_line = parse_line
+        self.oracle = oracle
+        self.expected_verdicts = iter_sorted_canonical_verdicts(oracle, VerdictLevel.ASSIGNMENTS)
+        self.expected: Optional[Tuple[int, List[str]]] = next(self.expected_verdicts, None)
+
+        self.context = deque(maxlen=context_size)
+        self.current_tp: Optional[int] = None
+        self.current_ts: Optional[int] = None
+        self.current_values: List[ValueType] = []
+        self.checked = 0
+        self.divergence: Optional[str] = None
+
+    def feed(self, line: str) -> bool:
+        if self.divergence is not None:
+            return False
+        line = line.strip()
+        if not line:
+            return True
+
+        self.context.append(line)
+        try:
+            parsed = self.parse_line(line)
+        except Exception as e:
+            self._diverge(self.current_tp, self.current_ts, f"Could not parse tool output: {e}", None, None)
+            return False
+        if parsed is None:
+            return True
+
+        ts, tp, values = parsed
+        if self.current_tp is not None and tp != self.current_tp:
+            self._check_current()
+            if self.divergence is not None:
+                return False
+        if tp != self.current_tp:
+            self.current_tp, self.current_ts, self.current_values = tp, ts, []
+        self.current_values.extend(values)
+        return True
+
+    def finish(self) -> Tuple[bool, str]:
+        if self.divergence is None and self.current_tp is not None:
+            self._check_current()
+            self.current_tp = None
+        if self.divergence is None and self.expected is not None:
+            tp, expected = self.expected
+            self._diverge(tp, self._oracle_ts(tp), "Tool is missing verdicts", expected, [])
+        if self.divergence is not None:
+            return False, self.divergence
+        return True, f"Verified ({self.checked} time points streamed)"
+
+    def prefix_result(self) -> Tuple[bool, str]:
+        # for runs that were cut short: only the time points closed so far count, missing verdicts do not
+        if self.divergence is not None:
+            return False, self.divergence
+        return True, f"Verified prefix ({self.checked} time points streamed)"
+
+    def _check_current(self):
+        tp, ts = self.current_tp, self.current_ts
+        actual = canonical_values(self.current_values)
+
+        if self.expected is not None and self.expected[0] < tp:
+            missing_tp, expected = self.expected
+            self._diverge(missing_tp, self._oracle_ts(missing_tp), "Tool is missing verdicts", expected, [])
+            return
+
+        if self.expected is not None and self.expected[0] == tp:
+            _, expected = self.expected
+            self.expected = next(self.expected_verdicts, None)
+            if expected != actual:
+                self._diverge(tp, ts, "Verdict values differ", expected, actual)
+                return
+        elif actual:
+            self._diverge(tp, ts, "Tool has additional verdicts", [], actual)
+            return
+        self.checked += 1
+
+    def _oracle_ts(self, tp: int) -> Optional[int]:
+        # only needed for divergence messages
+        if isinstance(self.oracle, DiskVerdicts):
+            found = self.oracle.retrieve(tp)
+            return found[0] if found is not None else None
+        return self.oracle.time_points().get(tp)
+
+    def _diverge(self, tp, ts, reason, expected, actual):
+        where = f"at time point {tp} (ts {ts})" if tp is not None else "before the first time point"
+        msg = f"First divergence {where}: {reason}"
+        if expected is not None:
+            msg += f"\nOracle {expected}\nTool {actual}"
+        if self.context:
+            msg += "\nContext:\n" + "\n".join(f"  {line}" for line in self.context)
+        self.divergence = msg
@@ -5,12 +5,21 @@ import os
 from datetime import datetime
 from typing import List, Any, AnyStr
 
+import pandas as pd
+from omegaconf import open_dict
+
+from Infrastructure.Analysis.Aggregators.ColumnarStore import RESULT_STORE_FORMATS, open_result_store
 from Infrastructure.Analysis.AutomatedAnalysis import dispatch_analysis
+from Infrastructure.Analysis.Regression.Bisection import BISECT_REPEATS, Bisection, check_repeats
+from Infrastructure.Analysis.Regression.ResultHistory import HISTORY_FILE, REGRESSION_EXIT_CODE, ResultHistory, \
+    history_samples
 from Infrastructure.Frontend.CLI.cli_args import CLIArgs
 from Infrastructure.DataLoader.Resolver import BenchmarkResolver, Location
 from Infrastructure.DataTypes.PathManager.PathManager import PathManager
 from Infrastructure.Frontend.Parser.YamlParser import YamlParser, ExperimentSuiteParser, YamlParserException
 from Infrastructure.BenchmarkBuilder.BenchmarkBuilder import BenchmarkBuilder
+from Infrastructure.Builders.ToolBuilder.LocalSourceBuild import LocalSourceImage, commit_range, git_output
+from Infrastructure.Monitors.MonitorManager import ValidReturnType
 from Infrastructure.constants import LENGTH, PATH_TO_PROJECT, PATH_TO_BUILD, PATH_TO_EXPERIMENTS, PATH_TO_ARCHIVE, \
     PATH_TO_BENCHMARK, PATH_TO_RESULTS, PATH_TO_FOLDER, PATH_TO_INFRA
 
@@ -30,6 +39,9 @@ class CLI:
 
         self.result_base_folder = f"{self.infra_folder}/results"
         self.result_analysis_folder = f"{self.infra_folder}/analysis_results"
+        # outside results/, --clean-all keeps the history
+        self.history_file = f"{self.infra_folder}/history/{HISTORY_FILE}"
+        self.regressions = 0
 
         self.path_manager.add_path(PATH_TO_PROJECT, self.path_to_module)
         self.path_manager.add_path(PATH_TO_BUILD, self.build_folder)
@@ -88,6 +100,15 @@ Examples:
   
   # Analyze results after running (saves analysis output to a timestamped folder in the analysis directory)
   python -m Infrastructure.main experiments/my_experiment.yaml --analyze
+
+  # Verify while the tools run and stop each tool at its first wrong verdict
+  python -m Infrastructure.main experiments/my_experiment.yaml --stream-verify --stop-on-divergence
+
+  # Compare the tools against each other and only consult the oracle when they disagree
+  python -m Infrastructure.main experiments/my_experiment.yaml --differential
+
+  # Find the commit of a monitor that introduced a regression, built from a local clone
+  python -m Infrastructure.main experiments/my_experiment.yaml --bisect MonPoly --good v1.2 --bad master --source ../monpoly
             """
         )
         
@@ -146,10 +167,133 @@ Examples:
             help='Run automated analysis on the results after execution'
         )
 
+        parser.add_argument(
+            '--stream-verify',
+            action='store_true',
+            help='Verify tool output against the oracle while the tool is running (offline and online)'
+        )
+
+        parser.add_argument(
+            '--stop-on-divergence',
+            action='store_true',
+            help='With --stream-verify, stop the tool container at the first divergent time point'
+        )
+
+        parser.add_argument(
+            '--differential',
+            action='store_true',
+            help='Compare offline tool outputs with each other and only run the oracle on disagreement'
+        )
+
+        parser.add_argument(
+            '--output-to-file',
+            action='store_true',
+            help='Write offline tool output to the scratch folder instead of collecting it from the container logs'
+        )
+
+        parser.add_argument(
+            '--online-records',
+            action='store_true',
+            help='Keep the per-step records of online runs as JSON lines next to the experiment results'
+        )
+
+        parser.add_argument(
+            '--throughput-search',
+            action='store_true',
+            help='Search the maximum sustainable event rate of each online monitor instead of running fixed rates'
+        )
+
+        parser.add_argument(
+            '--pareto-sweep',
+            action='store_true',
+            help='Run each online monitor over a grid of batch sizes and event rates for a throughput/latency frontier'
+        )
+
+        parser.add_argument(
+            '--telemetry',
+            action='store_true',
+            help='Sample CPU, memory, throttling and I/O of online monitor containers alongside the replay'
+        )
+
+        parser.add_argument(
+            '--result-store',
+            choices=RESULT_STORE_FORMATS,
+            default='sqlite',
+            help='Columnar store the results are flushed to while the experiment runs (default: sqlite)'
+        )
+
+        parser.add_argument(
+            '--no-csv',
+            action='store_true',
+            help='Do not export the results as CSV files after the experiment'
+        )
+
+        parser.add_argument(
+            '--no-history',
+            action='store_true',
+            help='Do not append the measurements of this run to the results history'
+        )
+
+        parser.add_argument(
+            '--set-baseline',
+            action='store_true',
+            help='Store this run as the baseline of its experiment for every tool'
+        )
+
+        parser.add_argument(
+            '--compare-baseline',
+            action='store_true',
+            help='Test every setting against the stored baseline and exit with code 3 on a significant regression'
+        )
+
+        parser.add_argument(
+            '--bisect',
+            type=str,
+            default=None,
+            metavar='MONITOR',
+            help='Find the first commit of the monitor\'s tool between --good and --bad that regresses the experiment'
+        )
+
+        parser.add_argument(
+            '--good',
+            type=str,
+            default=None,
+            help='With --bisect, the last known good commit, branch or tag'
+        )
+
+        parser.add_argument(
+            '--bad',
+            type=str,
+            default=None,
+            help='With --bisect, the first known bad commit, branch or tag'
+        )
+
+        parser.add_argument(
+            '--source',
+            type=str,
+            default=None,
+            help='With --bisect, a local git clone of the tool the images are built from'
+        )
+
+        parser.add_argument(
+            '--bisect-repeats',
+            type=int,
+            default=BISECT_REPEATS,
+            help=f'With --bisect, repeats per commit (default: {BISECT_REPEATS})'
+        )
+
         return parser
 
     def run(self, argv: List[str] = None):
         args = self.parser.parse_args(argv)
+        if args.differential and (args.stream_verify or args.stop_on_divergence):
+            self.parser.error("--differential cannot be combined with --stream-verify or --stop-on-divergence")
+        if args.throughput_search and args.pareto_sweep:
+            self.parser.error("--throughput-search cannot be combined with --pareto-sweep")
+        if args.no_history and (args.set_baseline or args.compare_baseline):
+            self.parser.error("--no-history cannot be combined with --set-baseline or --compare-baseline")
+        if args.bisect and not (args.good and args.bad and args.source):
+            self.parser.error("--bisect requires --good, --bad and --source")
 
         cli_args = CLIArgs(
             debug=args.debug,
@@ -158,6 +302,24 @@ Examples:
             clean=args.clean,
             clean_all=args.clean_all,
             analyze=args.analyze,
+            stream_verify=args.stream_verify or args.stop_on_divergence,
+            stop_on_divergence=args.stop_on_divergence,
+            differential=args.differential,
+            output_to_file=args.output_to_file,
+            online_records=args.online_records,
+            throughput_search=args.throughput_search,
+            pareto_sweep=args.pareto_sweep,
+            telemetry=args.telemetry,
+            result_store=args.result_store,
+            csv_export=not args.no_csv,
+            history=not args.no_history,
+            set_baseline=args.set_baseline,
+            compare_baseline=args.compare_baseline,
+            bisect=args.bisect,
+            bisect_good=args.good,
+            bisect_bad=args.bad,
+            bisect_source=args.source,
+            bisect_repeats=args.bisect_repeats,
         )
 
         config_name = args.config
@@ -178,7 +340,11 @@ Examples:
         is_suite = args.suite or self._is_suite_config(config_path)
         os.makedirs(self.result_base_folder, exist_ok=True)
 
-        if is_suite:
+        if cli_args.bisect:
+            if is_suite:
+                self.parser.error("--bisect runs a single experiment, not a suite")
+            self.run_bisection(config_name=config_name, cli_args=cli_args, dry_run=args.dry_run)
+        elif is_suite:
             if args.verbose:
                 print("Detected experiment suite configuration")
             self.run_experiment_suite(
@@ -195,6 +361,125 @@ Examples:
                 cli_args=cli_args
             )
 
+        if self.regressions:
+            print(f"✗ {self.regressions} significant regression(s) against the baseline", file=sys.stderr)
+            sys.exit(REGRESSION_EXIT_CODE)
+
+    def _record_history(self, experiment_name: str, results, monitors: List[Any], cli_args: CLIArgs, result_folder: str):
+        image_ids = {m.tool.name: m.tool.image.get_image_id() for m in monitors if isinstance(m, ValidReturnType)}
+        samples = history_samples(results, image_ids)
+        history = ResultHistory(self.history_file)
+        try:
+            # compared before recording, a run that is also stored as the new baseline is compared to the old one
+            comparison = history.compare_to_baseline(experiment_name, samples) if cli_args.compare_baseline else None
+            session = history.record(experiment_name, samples)
+            if cli_args.set_baseline:
+                tools = sorted(samples["tool"].unique())
+                history.set_baseline(experiment_name, tools, session)
+                print(f"Stored run {session} as the baseline of {experiment_name} for {', '.join(tools)}")
+        finally:
+            history.close()
+
+        if comparison is None:
+            return
+        filepath = os.path.join(result_folder, f"{experiment_name}_baseline_comparison.csv")
+        comparison.to_csv(filepath, index=False)
+        print(f"Baseline comparison written to: {filepath}")
+        for row in comparison[comparison["verdict"] == "regression"].itertuples():
+            print(
+                f"✗ Regression {row.tool} {row.setting} {row.metric}: median {row.baseline_median:.4g} -> "
+                f"{row.current_median:.4g}, p={row.p_value:.3g}, delta={row.cliffs_delta:.2f}"
+            )
+            self.regressions += 1
+        insufficient = comparison[comparison["verdict"] == "insufficient"]
+        if not insufficient.empty:
+            print(f"{len(insufficient)} comparison(s) have too few runs for a significant result, raise repeats")
+
+    def run_bisection(self, config_name: AnyStr, cli_args: CLIArgs, dry_run: bool = False):
+        yaml_file = os.path.join(self.benchmark_settings_folder, config_name)
+        experiment_name = os.path.splitext(os.path.basename(yaml_file))[0]
+        self.path_manager.add_path(PATH_TO_FOLDER, self.path_manager.get_path(PATH_TO_EXPERIMENTS) + "/" + experiment_name)
+        source = cli_args.bisect_source
+
+        try:
+            parser = YamlParser(
+                yaml_path=yaml_file, path_to_build=self.build_folder,
+                path_to_experiments=self.experiment_folder, path_manager=self.path_manager
+            )
+            monitor = next((m for m in parser.cfg.get('monitors', []) if m.get('name') == cli_args.bisect), None)
+            if monitor is None:
+                raise YamlParserException(f"No monitor named {cli_args.bisect} in {config_name}")
+            repeats = max(parser.get_repeat_experiments(), cli_args.bisect_repeats)
+            check_repeats(repeats)
+            commits = commit_range(source, cli_args.bisect_good, cli_args.bisect_bad)
+            print(f"Bisecting {cli_args.bisect} ({monitor.get('identifier')}) over {len(commits)} commits of {source}, "
+                  f"{repeats} repeats per commit")
+            if dry_run:
+                for commit in commits:
+                    print(f"  {commit}")
+                return None
+
+            local_image = LocalSourceImage(monitor.get('identifier'), source, self.path_to_module, parser.runtime_setting())
+            result_folder = self._create_timestamped_result_folder(f"{experiment_name}_bisect")
+
+            def probe(commit: str) -> pd.DataFrame:
+                local_image.build(commit)
+                # a fresh parse per commit, the ToolManager then finds the image of the pinned commit
+                probe_parser = YamlParser(
+                    yaml_path=yaml_file, path_to_build=self.build_folder,
+                    path_to_experiments=self.experiment_folder, path_manager=self.path_manager
+                )
+                with open_dict(probe_parser.cfg):
+                    for m in probe_parser.cfg.monitors:
+                        if m.get('name') == cli_args.bisect:
+                            m['commit'] = commit
+                    probe_parser.cfg['repeats'] = repeats
+                (coordinator, monitor_manager, _, _) = probe_parser.parse_experiment(
+                    cli_args=cli_args, experiment_name=experiment_name
+                )
+                benchmark = BenchmarkBuilder(
+                    experiment_name=experiment_name,
+                    coordinator=coordinator,
+                    tools_to_build=[cli_args.bisect],
+                    repeat_runs=repeats,
+                    cli_args=cli_args,
+                    result_store=open_result_store(cli_args.result_store, result_folder, f"{experiment_name}_{commit[:12]}"),
+                )
+                monitors = monitor_manager.get_monitors([cli_args.bisect])
+                results = benchmark.run(monitors)
+                image_ids = {m.tool.name: m.tool.image.get_image_id() for m in monitors if isinstance(m, ValidReturnType)}
+                return history_samples(results, image_ids)
+
+            result = Bisection(commits, probe).run()
+            summary = result.summary()
+            summary.to_csv(os.path.join(result_folder, f"{experiment_name}_bisect.csv"), index=False)
+            comparisons = [c.assign(commit=commit) for (commit, c) in result.comparisons.items()]
+            if comparisons:
+                pd.concat(comparisons, ignore_index=True).to_csv(
+                    os.path.join(result_folder, f"{experiment_name}_bisect_comparisons.csv"), index=False
+                )
+
+            print(f"\n{'='*LENGTH}")
+            for row in summary.itertuples():
+                print(f"  {row.commit[:12]} {row.verdict:<8} {row.regressions}/{row.comparisons} regressed")
+            if result.first_bad is None:
+                print(f"✓ No significant regression of {cli_args.bisect} between {cli_args.bisect_good} and {cli_args.bisect_bad}")
+            else:
+                subject = git_output(source, "log", "-1", "--format=%s", result.first_bad)
+                print(f"✗ First regressing commit of {cli_args.bisect}: {result.first_bad} {subject}")
+            print(f"  Results saved to: {result_folder}")
+            return result
+
+        except YamlParserException as e:
+            print(f"✗ Configuration error: {e}", file=sys.stderr)
+            sys.exit(1)
+        except Exception as e:
+            print(f"✗ Error bisecting {cli_args.bisect}: {e}", file=sys.stderr)
+            if cli_args.verbose:
+                import traceback
+                traceback.print_exc()
+            sys.exit(1)
+
     @staticmethod
     def _is_suite_config(config_path: str) -> bool:
         try:
@@ -231,12 +516,18 @@ Examples:
                 print(f"✓ Configuration validated successfully: {yaml_file}")
                 return None
 
+            if result_folder is None:
+                result_folder = self._create_timestamped_result_folder(experiment_name)
+            # the aggregator flushes its tables into the store while the experiment runs
+            result_store = open_result_store(cli_args.result_store, result_folder, experiment_name)
+
             benchmark = BenchmarkBuilder(
                 experiment_name=experiment_name,
                 coordinator=coordinator,
                 tools_to_build=tools_to_build,
                 repeat_runs=num_repeats,
                 cli_args=cli_args,
+                result_store=result_store,
             )
 
             monitors = monitor_manager.get_monitors(tools_to_build)
@@ -245,6 +536,8 @@ Examples:
                 print(f"Running experiment with {len(monitors)} monitor(s)...")
 
             results = benchmark.run(monitors)
+            if cli_args.history:
+                self._record_history(experiment_name, results, monitors, cli_args, result_folder)
             if getattr(cli_args, "analyze", False):
                 print(f"Running automated analysis on results...")
                 analysis_base = os.path.join(self.path_manager.get_path(PATH_TO_INFRA), "analysis_results")
@@ -262,22 +555,21 @@ Examples:
                 analysis_results = analysis.run(results)
                 for analysis_name, analysis_df in analysis_results.items():
                     analysis_df.to_csv(os.path.join(analysis_run_folder, f"{analysis_name}.csv"), index=False)
+                analysis.save_plots(analysis_run_folder, analysis_results)
 
             if not is_suite:
                 if cli_args.clean_all:
                     self._clean_all()
                 elif cli_args.clean:
                     for folder in os.listdir(self.result_base_folder):
-                        if folder.startswith(experiment_name):
+                        if folder.startswith(experiment_name) and os.path.join(self.result_base_folder, folder) != result_folder:
                             shutil.rmtree(os.path.join(self.result_base_folder, folder), ignore_errors=True)
                     for folder in os.listdir(self.result_analysis_folder):
                         if folder.startswith(experiment_name):
                             shutil.rmtree(os.path.join(self.result_analysis_folder, folder), ignore_errors=True)
 
-            if result_folder is None:
-                result_folder = self._create_timestamped_result_folder(experiment_name)
-
-            results.to_csv(result_folder, experiment_name)
+            if cli_args.csv_export:
+                results.to_csv(result_folder, experiment_name)
 
             print(f"✓ Experiment completed: {experiment_name}")
             print(f"  Results saved to: {result_folder}")
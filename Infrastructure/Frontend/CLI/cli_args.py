@@ -3,7 +3,13 @@ class CLIArgs:
             self, debug: bool = False, verbose: bool = False,
             measure: bool = True, clean: bool = False,
             clean_all: bool = False, short_cut: bool = False,
-            analyze: bool = False):
+            analyze: bool = False, stream_verify: bool = False,
+            stop_on_divergence: bool = False, differential: bool = False,
+            output_to_file: bool = False, online_records: bool = False,
+            throughput_search: bool = False, pareto_sweep: bool = False, telemetry: bool = False,
+            result_store: str = "sqlite", csv_export: bool = True, history: bool = True,
+            set_baseline: bool = False, compare_baseline: bool = False, bisect: str = None,
+            bisect_good: str = None, bisect_bad: str = None, bisect_source: str = None, bisect_repeats: int = 6):
         self.debug = debug
         self.verbose = verbose
         self.measure = measure
@@ -11,3 +17,21 @@ class CLIArgs:
         self.clean_all = clean_all
         self.short_cut = short_cut
         self.analyze = analyze
+        self.stream_verify = stream_verify
+        self.stop_on_divergence = stop_on_divergence
+        self.differential = differential
+        self.output_to_file = output_to_file
+        self.online_records = online_records
+        self.throughput_search = throughput_search
+        self.pareto_sweep = pareto_sweep
+        self.telemetry = telemetry
+        self.result_store = result_store
+        self.csv_export = csv_export
+        self.history = history
+        self.set_baseline = set_baseline
+        self.compare_baseline = compare_baseline
+        self.bisect = bisect
+        self.bisect_good = bisect_good
+        self.bisect_bad = bisect_bad
+        self.bisect_source = bisect_source
+        self.bisect_repeats = bisect_repeats
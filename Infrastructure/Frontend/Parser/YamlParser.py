@@ -20,7 +20,10 @@ from Infrastructure.DataTypes.Contracts.SubContracts.ScriptSetupContract import
 from Infrastructure.Frontend.CLI.cli_args import CLIArgs
 from Infrastructure.DataTypes.Contracts.AbstractContract import AbstractContract
 from Infrastructure.DataTypes.Contracts.SubContracts.CaseStudyContract import CaseStudySetupContract
+from Infrastructure.DataTypes.Contracts.SubContracts.RateProfile import RateProfile, RatePhase, PhaseKind
+from Infrastructure.DataTypes.Contracts.SubContracts.SamplingContract import VerificationSampling
 from Infrastructure.DataTypes.Contracts.SubContracts.SyntheticContract import SyntheticExperiment
+from Infrastructure.DataTypes.Contracts.SubContracts.ThroughputContract import ThroughputSearch, ParetoSweep
 from Infrastructure.DataTypes.Contracts.SubContracts.TimeBounds import TimeGuardingTool, TimeConstraints, GenerationConstraints, RunTimeConstraints
 from Infrastructure.DataTypes.PathManager.PathManager import PathManager
 from Infrastructure.DataTypes.Types.custome_type import BranchOrRelease, OnlineOffline, online_offline_from_string, \
@@ -144,7 +147,16 @@ class YamlParser:
         elif data_contract_name.lower() == "script":
             fixed = bool(data_setup.get('fixed', False))
             script_name = data_setup.get('script_name')
-            return ScriptSetupContract(name=data_setup.get('name'), fixed=fixed, script_name=script_name)
+            recording = data_setup.get('recording')
+            if recording is not None and not os.path.isabs(recording):
+                recording = os.path.join(self.config_dir, recording)
+            replay_scale = float(data_setup.get('replay_scale', 1.0))
+            if replay_scale <= 0:
+                raise YamlParserException(f"replay_scale must be positive, got {replay_scale}")
+            return ScriptSetupContract(
+                name=data_setup.get('name'), fixed=fixed, script_name=script_name, recording=recording,
+                replay_scale=replay_scale
+            )
         else:
             folder_files = _discover_contract_names(self.path_to_project + "/Archive/Implementations", "DataGenerators")
             if _contract_names(folder_files, data_contract_name):
@@ -332,6 +344,65 @@ class YamlParser:
             return oracle_dict.get('name')
         return None
 
+    def parse_verification_sampling(self) -> Optional[VerificationSampling]:
+        oracle_config = self.cfg.get('oracle', {})
+        if isinstance(oracle_config, dict):
+            oracle_dict = oracle_config
+        else:
+            oracle_dict = OmegaConf.to_container(oracle_config, resolve=True)
+
+        sampling = oracle_dict.get('sampling') if oracle_dict else None
+        if not sampling:
+            return None
+        if 'sample_size' not in sampling:
+            raise YamlParserException(f"Oracle sampling configuration missing 'sample_size': {sampling}")
+        confidence = float(sampling.get('confidence', 0.95))
+        if not 0.0 < confidence < 1.0:
+            raise YamlParserException(f"Oracle sampling confidence must lie in (0, 1): {confidence}")
+        return VerificationSampling(
+            sample_size=int(sampling['sample_size']),
+            seed=int(sampling.get('seed', 0)),
+            confidence=confidence,
+            strata=int(sampling.get('strata', 10))
+        )
+
+    def parse_throughput_search(self) -> ThroughputSearch:
+        if 'throughput_search' not in self.cfg:
+            return ThroughputSearch()
+        search = OmegaConf.to_container(self.cfg['throughput_search'], resolve=True) or {}
+        defaults = ThroughputSearch()
+        result = ThroughputSearch(
+            min_scale=float(search.get('min_scale', defaults.min_scale)),
+            max_scale=float(search.get('max_scale', defaults.max_scale)),
+            tolerance=float(search.get('tolerance', defaults.tolerance)),
+            repeats=int(search.get('repeats', defaults.repeats)),
+            confidence=float(search.get('confidence', defaults.confidence)),
+            backlog_growth=float(search.get('backlog_growth', defaults.backlog_growth))
+        )
+        if not 0 < result.min_scale <= 1.0 <= result.max_scale:
+            raise YamlParserException(f"Throughput search needs min_scale <= 1 <= max_scale: {search}")
+        if result.tolerance <= 0 or result.repeats < 1 or result.backlog_growth <= 1.0:
+            raise YamlParserException(f"Invalid throughput search configuration: {search}")
+        if not 0.0 < result.confidence < 1.0:
+            raise YamlParserException(f"Throughput search confidence must lie in (0, 1): {result.confidence}")
+        return result
+
+    def parse_pareto_sweep(self) -> ParetoSweep:
+        if 'pareto_sweep' not in self.cfg:
+            return ParetoSweep()
+        sweep = OmegaConf.to_container(self.cfg['pareto_sweep'], resolve=True) or {}
+        defaults = ParetoSweep()
+        result = ParetoSweep(
+            batch_sizes=[int(b) for b in sweep.get('batch_sizes', defaults.batch_sizes)],
+            scales=[float(s) for s in sweep.get('scales', defaults.scales)],
+            repeats=int(sweep.get('repeats', defaults.repeats))
+        )
+        if not result.batch_sizes or any(b < 1 for b in result.batch_sizes):
+            raise YamlParserException(f"Pareto sweep batch sizes must be positive: {sweep}")
+        if not result.scales or any(s <= 0 for s in result.scales) or result.repeats < 1:
+            raise YamlParserException(f"Invalid pareto sweep configuration: {sweep}")
+        return result
+
     def get_repeat_experiments(self) -> int:
         if 'repeats' not in self.cfg:
             return 1
@@ -377,6 +448,9 @@ class YamlParser:
                 seeds=self.parse_seeds(), runtime_settings=runtime_settings,
                 online_settings=online_experiments_settings
             )
+        coordinator.verification_sampling = self.parse_verification_sampling()
+        coordinator.throughput_search = self.parse_throughput_search()
+        coordinator.pareto_sweep = self.parse_pareto_sweep()
         return coordinator, monitor_manager, self.get_tools_to_build(), self.get_repeat_experiments()
 
     def runtime_setting(self) -> OnlineOffline:
@@ -418,7 +492,51 @@ class YamlParser:
             accumulated_latency=acc_lat,
             timestamp_units=ts_units,
             batch_delimiter=batch_delim,
-            mode=mode
+            mode=mode,
+            rate_profile=self.parse_rate_profile(online_dict.get('rate_profile'))
+        )
+
+    def parse_rate_profile(self, profile_dict: Optional[Dict]) -> Optional[RateProfile]:
+        if not profile_dict:
+            return None
+
+        replay_file = profile_dict.get('replay')
+        if replay_file is not None and not os.path.isabs(replay_file):
+            replay_file = os.path.join(self.config_dir, replay_file)
+        if replay_file is not None and not os.path.exists(replay_file):
+            raise YamlParserException(f"Rate profile replay file not found: {replay_file}")
+
+        phases = []
+        for phase in profile_dict.get('phases', []):
+            kind_str = str(phase.get('type', 'step')).lower()
+            try:
+                kind = PhaseKind(kind_str)
+            except ValueError:
+                raise YamlParserException(f"Unknown rate profile phase type: {kind_str}")
+            if 'duration' not in phase:
+                raise YamlParserException(f"Rate profile phase without duration: {phase}")
+            rate_phase = RatePhase(
+                kind=kind, duration=float(phase['duration']), scale=float(phase.get('scale', 1.0)),
+                to_scale=float(phase['to_scale']) if 'to_scale' in phase else None,
+                burst_scale=float(phase['burst_scale']) if 'burst_scale' in phase else None,
+                period=float(phase['period']) if 'period' in phase else None,
+                duty=float(phase.get('duty', 0.5))
+            )
+            if rate_phase.duration <= 0 or rate_phase.scale <= 0:
+                raise YamlParserException(f"Rate profile phases need a positive duration and scale: {phase}")
+            if kind == PhaseKind.RAMP and (rate_phase.to_scale is None or rate_phase.to_scale <= 0):
+                raise YamlParserException(f"Ramp phase needs a positive to_scale: {phase}")
+            if kind == PhaseKind.BURST and (rate_phase.burst_scale is None or rate_phase.burst_scale <= 0
+                                            or rate_phase.period is None or rate_phase.period <= 0
+                                            or not 0.0 < rate_phase.duty < 1.0):
+                raise YamlParserException(f"Burst phase needs burst_scale, period and a duty in (0, 1): {phase}")
+            phases.append(rate_phase)
+
+        if not phases and replay_file is None:
+            raise YamlParserException(f"Rate profile needs phases or a replay file: {profile_dict}")
+        return RateProfile(
+            phases=phases, repeat=bool(profile_dict.get('repeat', False)), replay_file=replay_file,
+            recovery_factor=float(profile_dict.get('recovery_factor', 1.5))
         )
 
 
@@ -1,25 +1,32 @@
+import re
 import sys
 import time
 from abc import ABC, abstractmethod
-from collections import defaultdict
-from typing import Dict, AnyStr, Any, Tuple, List, Optional, Union
+from typing import Callable, Dict, AnyStr, Any, Tuple, List, Optional, Union
 
 from Infrastructure.AutoConversion.AutoPolicyConverter import AutoPolicyConverter
 from Infrastructure.AutoConversion.AutoTraceConverter import AutoTraceConverter
 from Infrastructure.AutoConversion.InputOutputPolicyFormats import InputOutputPolicyFormats
 from Infrastructure.Builders.BuilderUtilities import run_online_image
-from Infrastructure.Builders.OnlineExperiementPipeline import build_pipeline
+from Infrastructure.Builders.OnlineDriverProtocol import OnlineRunSummary, DriverBlock
+from Infrastructure.Builders.OnlineExperiementPipeline import build_pipeline, online_volumes
 from Infrastructure.Builders.ToolBuilder.ToolImageManager import AbstractToolImageManager
 from Infrastructure.DataTypes.Contracts.OnlineExperimentContract import OnlineExperimentContractGeneral
-from Infrastructure.DataTypes.Types.StratificationIndex import StratificationIndex
+from Infrastructure.DataTypes.Contracts.SubContracts.SamplingContract import VerificationSampling
+from Infrastructure.DataTypes.Types.StratificationIndex import StratificationIndex, csv_events_per_tp
 from Infrastructure.Frontend.CLI.cli_args import CLIArgs
 from Infrastructure.DataTypes.PathManager.PathManager import PathManager
 from Infrastructure.DataTypes.Verification.OutputStructures.AbstractOutputStrucutre import AbstractOutputStructure
+from Infrastructure.DataTypes.Verification.OutputDigest import OutputDigest, VerificationCache, VerificationOutcome, \
+    VerificationStatus, summarize_output_file
+from Infrastructure.DataTypes.Verification.Differential import DifferentialVerifier
+from Infrastructure.DataTypes.Verification.SampledVerification import sampled_verify
+from Infrastructure.DataTypes.Verification.StreamingVerifier import StreamingVerifier, StreamLineParser
 from Infrastructure.AutoConversion.InputOutputTraceFormats import InputOutputTraceFormats
 from Infrastructure.Monitors.MonitorExceptions import ToolException, ResultErrorException, TimedOut
 from Infrastructure.Oracles.AbstractOracleTemplate import AbstractOracleTemplate
 from Infrastructure.constants import SIGNATURE_KEY, FOLDER_KEY, TRACE_KEY, POLICY_KEY, PATH_TO_BUILD, PATH_TO_ARCHIVE, \
-    PATH_TO_TRACE_INPUT, PATH_TO_TRACE_OUTPUT, PATH_TO_INTERMEDIATE_WORKSPACE, IMAGE_POSTFIX, Policy_File, \
+    PATH_TO_TRACE_INPUT, PATH_TO_TRACE_OUTPUT, PATH_TO_INTERMEDIATE_WORKSPACE, Policy_File, \
     Signature_File, NOMEASURE, STRATIFIED, STRATIFIED_MAP, TRACE_TARGET_FORMAT
 from Infrastructure.printing import print_headline, print_footline
 
@@ -48,6 +55,21 @@ class OfflineRunnable(ABC):
     def post_processing_offline(self, stdout_input: AnyStr) -> AbstractOutputStructure:
         pass
 
+    def offline_stream_parser(self) -> Optional[StreamLineParser]:
+        return None
+
+    def offline_result_files(self) -> List[str]:
+        return []
+
+    def post_processing_offline_file(self, path: str) -> AbstractOutputStructure:
+        # tools that can parse their output lazily override this
+        with open(path, "r") as f:
+            return self.post_processing_offline(f.read())
+
+    @staticmethod
+    def offline_verdict_line(line: bytes) -> bool:
+        return bool(line.strip())
+
 
 class OnlineRunnable(ABC):
     @abstractmethod
@@ -66,6 +88,9 @@ class OnlineRunnable(ABC):
     def post_processing_online(self, stdout_input: AnyStr) -> AbstractOutputStructure:
         pass
 
+    def online_stream_parser(self) -> Optional[StreamLineParser]:
+        return None
+
 
 class BaseMonitorTemplate(AutoConvertable):
     def __init__(self, image: AbstractToolImageManager, name, params: Dict[AnyStr, Any]):
@@ -144,7 +169,10 @@ def run_monitor_online(
         path_to_folder: AnyStr, data_file: AnyStr, signature_file: AnyStr, policy_file: AnyStr,
         path_manager: PathManager, trace_source_format: InputOutputTraceFormats,
         policy_source_format: InputOutputPolicyFormats, cli_args: CLIArgs,
-        online_experiment_contract: OnlineExperimentContractGeneral, script_name: Optional[str] = None
+        online_experiment_contract: OnlineExperimentContractGeneral, script_name: Optional[str] = None,
+        raw_records_path: Optional[str] = None, on_block: Optional[Callable[[DriverBlock], None]] = None,
+        oracle: Optional[AbstractOracleTemplate] = None, result_file: Optional[str] = None,
+        telemetry_path: Optional[str] = None, data_files: Optional[Dict[str, str]] = None
 ):
     print_headline(f"Run (Online) {mon.name}")
 
@@ -163,16 +191,16 @@ def run_monitor_online(
         policy_file = mon.params[POLICY_KEY]
         signature_file = mon.params[SIGNATURE_KEY]
 
-    target_name = f"online_experiment_{mon.name.lower()}{IMAGE_POSTFIX}"
     additional_compilation_data = mon.online_compile()
     start_build_comp = time.perf_counter()
 
-    build_pipeline(
+    target_name = build_pipeline(
         tool_image_manager=mon.image, path_to_build=path_manager.get_path(PATH_TO_BUILD),
-        path_to_archive=path_manager.get_path(PATH_TO_ARCHIVE), path_to_folder=path_to_folder,
-        data_source=data_source, policy_file=policy_file, signature_file=signature_file,
-        target_image_name=target_name, compilation_details=additional_compilation_data
+        path_to_archive=path_manager.get_path(PATH_TO_ARCHIVE),
+        target_image_prefix=f"online_experiment_{mon.name.lower()}", compilation_details=additional_compilation_data,
+        verbose=cli_args.verbose
     )
+    volumes = online_volumes(path_to_folder, data_source, policy_file, signature_file, data_files)
     end_build_comp = time.perf_counter()
     build_comp_elapsed = end_build_comp - start_build_comp
 
@@ -181,29 +209,71 @@ def run_monitor_online(
         print("OnlineExperimentContractTool not defined")
         raise ValueError(f"Monitor {mon.name} has no online experiment contract")
 
+    verifier, unverified_reason = None, None
+    if not cli_args.stream_verify:
+        unverified_reason = "--stream-verify not set"
+    elif script_name is not None:
+        unverified_reason = "script and recording sources have no oracle result"
+    elif oracle is None:
+        unverified_reason = "no oracle result for the streamed trace"
+    else:
+        reference = oracle.streaming_reference(result_file)
+        parse_line = mon.online_stream_parser()
+        if reference is None:
+            unverified_reason = "the oracle has no streaming reference"
+        elif parse_line is None:
+            unverified_reason = f"{mon.name} has no online line parser"
+        else:
+            verifier = StreamingVerifier(reference, parse_line)
+
+    def on_verified_block(block: DriverBlock):
+        # the [Output lines of a step are only held until they are fed to the verifier
+        if block.output is not None and verifier.divergence is None:
+            for line in block.output:
+                if not verifier.feed(line):
+                    break
+        if on_block is not None:
+            on_block(block)
+
     tool_command, name = mon.construct_online_command()
     output, total_elapsed_s, total_count, latency_err_msg, code = run_online_image(
         image_name=target_name, tool_command=tool_command,
         online_experiment_contract=online_experiment_contract,
         tool_online_experiment_contract=tool_online_experiment_contract,
-        verbose=cli_args.verbose
+        verbose=cli_args.verbose, raw_records_path=raw_records_path,
+        on_block=on_verified_block if verifier is not None else on_block, volumes=volumes,
+        telemetry_path=telemetry_path
     )
 
     print(f"Prep:        {preprocessing_elapsed}\nBuilding: {build_comp_elapsed}")
     print(f"Runtime:     {total_elapsed_s}\nTotal Count: {total_count}")
+    if isinstance(output, OnlineRunSummary) and output.elapsed_ns.count > 0:
+        print(f"Blocks:      {output.blocks}, latency mean {output.elapsed_ns.mean:.0f} ns, max {output.elapsed_ns.max} ns")
     if latency_err_msg is not None:
         print(f"Latency Extraction Error: {latency_err_msg}")
 
-    # todo post processing of results and latency extraction (future work)
-
-    # todo verify results with oracle (future work)
+    if verifier is None and isinstance(output, OnlineRunSummary):
+        output.verification_status, output.verification = VerificationStatus.UNVERIFIED, unverified_reason
+        if cli_args.stream_verify:
+            print(f"Online verification skipped: {unverified_reason}")
+    elif verifier is not None and isinstance(output, OnlineRunSummary):
+        # a run stopped at a latency limit is only checked up to where it got
+        verified, msg = verifier.finish() if code == 0 else verifier.prefix_result()
+        output.verified, output.verification = verified, msg
+        output.verification_status = VerificationStatus.VERIFIED
+        print_headline(f"Verified: {verified}")
+        if code == 0 and not verified:
+            raise ResultErrorException((preprocessing_elapsed, build_comp_elapsed, total_elapsed_s, total_count), msg)
 
     return preprocessing_elapsed, build_comp_elapsed, total_elapsed_s, total_count, output, code
 
 
 def run_monitor_offline(mon: Union[OfflineRunnable, BaseMonitorTemplate], timeout_value, path_to_folder: AnyStr, data_file: AnyStr, signature_file: AnyStr, policy_file: AnyStr,
                         path_manager: PathManager, trace_source_format: InputOutputTraceFormats, policy_source_format: InputOutputPolicyFormats,
-                        result_file, cli_args: CLIArgs, oracle: Optional[AbstractOracleTemplate] = None) -> Tuple[float, float, float, float]:
+                        result_file, cli_args: CLIArgs, oracle: Optional[AbstractOracleTemplate] = None,
+                        verification_cache: Optional[VerificationCache] = None,
+                        differential: Optional[DifferentialVerifier] = None,
+                        sampling: Optional[VerificationSampling] = None) -> Tuple[float, float, float, float, VerificationOutcome]:
     print_headline(f"Run (Offline) {mon.name}")
 
     preprocessing_elapsed = mon.preprocessing(
@@ -222,36 +292,136 @@ def run_monitor_offline(mon: Union[OfflineRunnable, BaseMonitorTemplate], timeou
     end_compile = time.perf_counter()
     compile_elapsed = end_compile - start_compile
 
+    verifier = None
+    if cli_args.stream_verify and oracle is not None:
+        reference = oracle.streaming_reference(result_file)
+        parse_line = mon.offline_stream_parser()
+        if reference is not None and parse_line is not None:
+            verifier = StreamingVerifier(reference, parse_line)
+        elif cli_args.verbose:
+            print(f"Streaming verification not supported for {mon.name}, verifying after the run")
+
+    digest = OutputDigest()
+
+    def on_line(line: str) -> bool:
+        digest.update(line + "\n")
+        return verifier.feed(line)
+
     start = time.perf_counter()
     cmd, name = mon.construct_offline_command()
     measure = False if mon.params.get(NOMEASURE) else True
-    out, code = mon.image.run_offline(parameters=cmd, path_to_data=path_to_folder, time_out=timeout_value, name=name, measure=measure)
+    # tools started through the image entrypoint (empty name) cannot be wrapped to redirect their output
+    output_file = None
+    if cli_args.output_to_file and verifier is None and name != "":
+        output_file = re.sub(r"[^\w.-]", "_", mon.name) + ".out"
+    output_path = f"{path_to_folder}/scratch/{output_file}" if output_file is not None else None
+    if verifier is None:
+        out, code = mon.image.run_offline(
+            parameters=cmd, path_to_data=path_to_folder, time_out=timeout_value, name=name, measure=measure,
+            output_file=output_file
+        )
+        aborted = False
+    else:
+        out, code, aborted = mon.image.run_offline_streaming(
+            parameters=cmd, path_to_data=path_to_folder, on_line=on_line, time_out=timeout_value, name=name,
+            measure=measure, stop_on_abort=cli_args.stop_on_divergence
+        )
     end = time.perf_counter()
     run_offline_elapsed = end - start
 
+    if aborted and cli_args.stop_on_divergence:
+        print_headline("Verified: False (stopped at first divergence)")
+        raise ResultErrorException(
+            (preprocessing_elapsed, compile_elapsed, run_offline_elapsed, 0.0), verifier.divergence,
+            VerificationOutcome(None, VerificationStatus.VERIFIED)
+        )
+
     if code != 0:
         raise TimedOut(f"Timed out: {mon.name}") if code == 124 else ToolException(out)
 
-    start = time.perf_counter()
-    res = mon.post_processing_offline(out)
-    end = time.perf_counter()
-    postprocessing_elapsed = end - start
+    if output_path is not None:
+        summary = summarize_output_file(output_path, digest, mon.offline_verdict_line)
+        print(f"Output:      {summary.lines} lines, {summary.verdicts} verdicts")
+    elif verifier is None:
+        digest.update(out)
+    for result_path in mon.offline_result_files():
+        digest.update_file(result_path)
+    output_hash = digest.hexdigest()
+
+    nondeterministic = verification_cache is not None and verification_cache.is_nondeterministic(mon.name, output_hash)
+    if nondeterministic:
+        print(f"Non-deterministic output: {mon.name} produced output that differs from an earlier repeat")
+    status = VerificationStatus.NONDETERMINISTIC if nondeterministic else VerificationStatus.VERIFIED
+    known = verification_cache.lookup(mon.name, output_hash) if verification_cache is not None else None
+
+    if differential is not None and verifier is None:
+        # verdicts are judged by the builder once all tools of the setting have run
+        if differential.knows(mon.name, output_hash):
+            postprocessing_elapsed = 0.0
+        else:
+            start = time.perf_counter()
+            res = mon.post_processing_offline_file(output_path) if output_path is not None else mon.post_processing_offline(out)
+            end = time.perf_counter()
+            postprocessing_elapsed = end - start
+            differential.observe(mon.name, output_hash, res)
+        print(f"Prep:        {preprocessing_elapsed}\nCompilation: {compile_elapsed}\nRuntime:     {run_offline_elapsed}\nPost:        {postprocessing_elapsed}")
+        if verification_cache is not None:
+            verification_cache.store(mon.name, output_hash, None)
+        print_footline()
+        return preprocessing_elapsed, compile_elapsed, run_offline_elapsed, postprocessing_elapsed, VerificationOutcome(output_hash, status)
+
+    if verifier is not None:
+        verified, msg = verifier.finish()
+        postprocessing_elapsed = 0.0
+        print(f"Prep:        {preprocessing_elapsed}\nCompilation: {compile_elapsed}\nRuntime:     {run_offline_elapsed}\nPost:        {postprocessing_elapsed}")
+        print_headline(f"Verified: {verified}")
+    elif oracle is not None and known is not None:
+        verified, msg = known
+        status = VerificationStatus.HASH_MATCH
+        postprocessing_elapsed = 0.0
+        print(f"Prep:        {preprocessing_elapsed}\nCompilation: {compile_elapsed}\nRuntime:     {run_offline_elapsed}\nPost:        {postprocessing_elapsed}")
+        print_headline(f"Verified: {verified} (output identical to a verified repeat)")
+    else:
+        start = time.perf_counter()
+        res = mon.post_processing_offline_file(output_path) if output_path is not None else mon.post_processing_offline(out)
+        end = time.perf_counter()
+        postprocessing_elapsed = end - start
+
+        print(f"Prep:        {preprocessing_elapsed}\nCompilation: {compile_elapsed}\nRuntime:     {run_offline_elapsed}\nPost:        {postprocessing_elapsed}")
 
-    print(f"Prep:        {preprocessing_elapsed}\nCompilation: {compile_elapsed}\nRuntime:     {run_offline_elapsed}\nPost:        {postprocessing_elapsed}")
+        if oracle is None:
+            if verification_cache is not None:
+                verification_cache.store(mon.name, output_hash, None)
+            if not nondeterministic:
+                status = VerificationStatus.UNVERIFIED
+            print_footline()
+            return preprocessing_elapsed, compile_elapsed, run_offline_elapsed, postprocessing_elapsed, VerificationOutcome(output_hash, status)
 
-    if oracle is not None:
         try:
-            verified, msg = oracle.verify(path_to_folder, data_file, res, signature_file, f"scratch/{policy_file}", result_file)
+            sampled = None
+            if sampling is not None:
+                sampled = sampled_verify(oracle, sampling, path_to_folder, data_file, result_file, res)
+            if sampled is not None:
+                verified, msg = sampled
+                if not nondeterministic:
+                    status = VerificationStatus.SAMPLED
+            else:
+                verified, msg = oracle.verify(path_to_folder, data_file, res, signature_file, f"scratch/{policy_file}", result_file)
         except Exception as e:
             if cli_args.verbose:
                 print(f"Oracle verification failed with exception: {e}")
-            raise ResultErrorException((preprocessing_elapsed, compile_elapsed, run_offline_elapsed, postprocessing_elapsed), str(e))
+            verified, msg = False, str(e)
         print_headline(f"Verified: {verified}")
-        if not verified:
-            raise ResultErrorException((preprocessing_elapsed, compile_elapsed, run_offline_elapsed, postprocessing_elapsed), msg)
+
+    if verification_cache is not None:
+        verification_cache.store(mon.name, output_hash, (verified, msg))
+    outcome = VerificationOutcome(output_hash, status)
+    timings = (preprocessing_elapsed, compile_elapsed, run_offline_elapsed, postprocessing_elapsed)
+    if not verified:
+        raise ResultErrorException(timings, msg, outcome)
 
     print_footline()
-    return preprocessing_elapsed, compile_elapsed, run_offline_elapsed, postprocessing_elapsed
+    return preprocessing_elapsed, compile_elapsed, run_offline_elapsed, postprocessing_elapsed, outcome
 
 
 def find_trace_path(mon: BaseMonitorTemplate, path_manager: PathManager, trace_source_format: InputOutputTraceFormats) -> Tuple[Optional[InputOutputTraceFormats], Optional[int]]:
@@ -289,12 +459,7 @@ def find_policy_path(mon: BaseMonitorTemplate, path_manager: PathManager, policy
 
 
 def init_stratification_map(src_format: InputOutputTraceFormats, target_format: InputOutputTraceFormats, data_file, path_to_data) -> StratificationIndex:
-    mapping = defaultdict(int)
-    with open(f"{path_to_data}/{data_file}", "r") as f:
-        for line in f:
-            if line.__contains__("tp="):
-                tp = int(line.split("tp=")[1].split(",")[0])  # int, not str: lexicographic order breaks for tp >= 10
-                mapping[tp] += 1
+    mapping = csv_events_per_tp(f"{path_to_data}/{data_file}")
 
     # DejaVu's stratified trace emits one breaker event per timepoint to mark the
     # timepoint switch, and that breaker consumes a (1-based) DejaVu event index.
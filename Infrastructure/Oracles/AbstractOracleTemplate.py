@@ -32,3 +32,9 @@ class AbstractOracleTemplate(ABC):
             self, path_to_result_folder: str, data_file: str, tool_verdicts: AbstractOutputStructure,
             sig_file: Optional[str], policy_file: str, result_file: str) -> Tuple[bool, AnyStr]:
         pass
+
+    def reference_verdicts(self, result_file: str) -> Optional[AbstractOutputStructure]:
+        return None
+
+    def streaming_reference(self, result_file: str) -> Optional[AbstractOutputStructure]:
+        return self.reference_verdicts(result_file)